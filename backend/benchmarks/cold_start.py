@@ -0,0 +1,136 @@
+"""
+Cold start of the FastAPI app: import time, warm-up time, RSS after boot and which
+heavy libraries got loaded, each measured in a fresh interpreter.
+
+`python -X importtime` profiles `import main`; the slowest top-level imports are
+listed. With `--max-import-ms` / `--max-rss-mb` the run exits non-zero when a
+budget is exceeded, and heavy libraries imported by `import main` alone are always
+reported as a regression. Warming up geo or news fetches from the configured
+upstreams; export the benchmarks.fake_upstreams URLs first to stay offline.
+
+    cd backend
+    python -m benchmarks.cold_start
+    python -m benchmarks.cold_start --warmup geo,news,market --runs 5
+    python -m benchmarks.cold_start --max-import-ms 1500 --max-rss-mb 150
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries that must only be imported on first use (or by APP_WARMUP)
+HEAVY_MODULES = ["pandas", "geopandas", "numpy", "rasterio", "pyproj", "shapely", "yfinance", "bs4", "lxml"]
+
+PROBE = """
+import json, os, sys, time
+import psutil
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+heavy_after_import = [m for m in {heavy!r} if m in sys.modules]
+main.warm_up({warmup!r})
+warmed = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "warmup_ms": (warmed - imported) * 1000,
+    "rss_mb": psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024),
+    "heavy_after_import": heavy_after_import,
+    "heavy_after_warmup": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def probe_env():
+    env = dict(os.environ)
+    # Measure import and warm-up only; migrations would write to the real database
+    env.setdefault("DB_AUTO_MIGRATE", "0")
+    env.setdefault("APP_WARMUP", "")
+    # Fresh snapshot and share price files per probe: nothing to restore, nothing
+    # written next to the data
+    workdir = tempfile.mkdtemp(prefix="bursa-cold-start-")
+    env.setdefault("SNAPSHOT_DB_PATH", os.path.join(workdir, "upstream_snapshots.db"))
+    env.setdefault("SHARE_PRICE_DB_PATH", os.path.join(workdir, "share_prices.db"))
+    return env
+
+
+def run_probe(warmup):
+    code = PROBE.format(heavy=HEAVY_MODULES, warmup=warmup)
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=probe_env(),
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_profile(top: int):
+    """[(cumulative ms, module)] for the slowest top-level imports of `import main`."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            cwd=BACKEND_DIR, env=probe_env(), capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Top-level entries are the ones with no nesting indent
+        if name.startswith(" ") and not name.startswith("  "):
+            rows.append((int(cumulative) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--warmup", default="", help="comma separated subsystems, as APP_WARMUP")
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--max-import-ms", type=float, help="fail if median import time exceeds this")
+    parser.add_argument("--max-rss-mb", type=float, help="fail if median RSS after boot exceeds this")
+    parser.add_argument("--json", help="write results here")
+    args = parser.parse_args()
+
+    warmup = [name for name in args.warmup.split(",") if name]
+    runs = [run_probe(warmup) for _ in range(args.runs)]
+    summary = {
+        "import_ms": statistics.median(r["import_ms"] for r in runs),
+        "warmup_ms": statistics.median(r["warmup_ms"] for r in runs),
+        "rss_mb": statistics.median(r["rss_mb"] for r in runs),
+        "heavy_after_import": runs[0]["heavy_after_import"],
+        "heavy_after_warmup": runs[0]["heavy_after_warmup"],
+    }
+
+    print(f"⏱️ import main: {summary['import_ms']:.0f} ms (median of {args.runs})")
+    if warmup:
+        print(f"⏱️ warm-up {','.join(warmup)}: {summary['warmup_ms']:.0f} ms")
+    print(f"🧠 RSS after boot: {summary['rss_mb']:.1f} MB")
+    print(f"📦 Heavy modules after import: {', '.join(summary['heavy_after_import']) or 'none'}")
+    if warmup:
+        print(f"📦 Heavy modules after warm-up: {', '.join(summary['heavy_after_warmup']) or 'none'}")
+
+    profile = import_profile(args.top)
+    print(f"\n{'cumulative ms':>14}  module")
+    for ms, name in profile:
+        print(f"{ms:>14.1f}  {name}")
+
+    failures = []
+    if summary["heavy_after_import"]:
+        failures.append(f"heavy modules imported at startup: {', '.join(summary['heavy_after_import'])}")
+    if args.max_import_ms is not None and summary["import_ms"] > args.max_import_ms:
+        failures.append(f"import took {summary['import_ms']:.0f} ms (budget {args.max_import_ms:.0f} ms)")
+    if args.max_rss_mb is not None and summary["rss_mb"] > args.max_rss_mb:
+        failures.append(f"RSS {summary['rss_mb']:.1f} MB (budget {args.max_rss_mb:.0f} MB)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "summary": summary, "runs": runs,
+                       "import_profile": profile, "failures": failures}, f, indent=2)
+        print(f"✅ Results written to {args.json}")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Payload size and latency of ?format=columnar against the default records format
+for the time-series routes.
+
+    cd backend
+    python -m benchmarks.columnar_payload --repeat 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+ROUTES = [
+    "/api/raw-material-prices",
+    "/api/mpob-statistics",
+    "/api/container-freight-index",
+    "/api/production/{company}",
+    "/api/earnings/{company}",
+]
+
+
+def measure(client: TestClient, url: str, repeat: int):
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append(time.perf_counter() - start)
+        response.raise_for_status()
+        size = len(response.content)
+    return size, statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--company", default="GENP")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    import main as app_module
+    client = TestClient(app_module.app)
+
+    print(f"{'route':<32}{'records B':>12}{'columnar B':>12}{'size':>8}{'records ms':>12}{'columnar ms':>13}")
+    for route in ROUTES:
+        url = route.format(company=args.company)
+        records_size, records_ms = measure(client, url, args.repeat)
+        columnar_size, columnar_ms = measure(client, f"{url}?format=columnar", args.repeat)
+        ratio = columnar_size / records_size if records_size else 0
+        print(f"{url:<32}{records_size:>12}{columnar_size:>12}{ratio:>8.0%}{records_ms:>12.2f}{columnar_ms:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
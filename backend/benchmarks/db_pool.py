@@ -0,0 +1,80 @@
+"""
+Per-request SQLite overhead: a fresh sqlite3.connect() per request (the old route
+pattern) versus borrowing from db.ConnectionPool, under concurrent load.
+
+    cd backend
+    python -m benchmarks.db_pool --requests 2000 --concurrency 1 8 32
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import DB_PATH, ConnectionPool  # noqa: E402
+
+QUERY = """
+    SELECT date, raw_material, volume
+    FROM company_monthly_production
+    WHERE company_short_name = ?
+    AND date >= '2025-01-01'
+    ORDER BY date ASC
+"""
+
+
+def run_per_request(db_path: str, company: str) -> float:
+    start = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    conn.execute(QUERY, (company,)).fetchall()
+    conn.close()
+    return time.perf_counter() - start
+
+
+def run_pooled(pool: ConnectionPool, company: str) -> float:
+    start = time.perf_counter()
+    with pool.connection() as conn:
+        conn.execute(QUERY, (company,)).fetchall()
+    return time.perf_counter() - start
+
+
+def measure(fn, n_requests: int, concurrency: int):
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        wall_start = time.perf_counter()
+        latencies = list(executor.map(lambda _: fn(), range(n_requests)))
+        wall = time.perf_counter() - wall_start
+    latencies.sort()
+    return {
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "rps": n_requests / wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--company", default="GENP")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--pool-size", type=int, default=8)
+    args = parser.parse_args()
+
+    pool = ConnectionPool(args.db, size=args.pool_size)
+    print(f"{'mode':<12}{'conc':>6}{'mean ms':>10}{'p95 ms':>10}{'req/s':>10}")
+    for concurrency in args.concurrency:
+        for mode, fn in (
+            ("per-request", lambda: run_per_request(args.db, args.company)),
+            ("pooled", lambda: run_pooled(pool, args.company)),
+        ):
+            fn()  # warm up
+            r = measure(fn, args.requests, concurrency)
+            print(f"{mode:<12}{concurrency:>6}{r['mean_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['rps']:>10.0f}")
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Local stand-ins for the upstream services the API calls, so benchmarks run offline.
+
+`FakeUpstreams` serves the api.data.gov.my weather forecast, earthquake and fuel price
+endpoints plus The Edge news search pages from a threaded HTTP server on localhost;
+`env()` returns the environment overrides that point main.py at it. Yahoo Finance is
+replaced in-process by `fake_yf_download`, which returns deterministic daily closes
+in the same multi-ticker frame layout as `yf.download`.
+
+    cd backend
+    python -m benchmarks.fake_upstreams --port 8765 --latency-ms 50
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIONS_PATH = os.path.join(BASE_DIR, "..", "src", "data", "weather_station_base.csv")
+
+FORECAST_DAYS = 7
+SUMMARIES = ["Tiada hujan", "Hujan di beberapa tempat", "Ribut petir di beberapa tempat", "Berangin", "Berjerebu"]
+NEWS_PAGE_SIZE = 10
+NEWS_HEADLINES = [
+    "CPO futures extend gains on firmer soybean oil",
+    "Palm oil exports rise in first half of the month",
+    "Plantation stocks rally as FFB output recovers",
+    "Crude palm oil inventories seen falling on strong demand",
+    "Ringgit weakness supports palm oil prices",
+]
+
+
+def forecast_payload(seed: int = 7):
+    rng = random.Random(seed)
+    stations = pd.read_csv(STATIONS_PATH)["location_name"]
+    start = date.today()
+    return [
+        {
+            "location": {"location_id": f"St{i:03d}", "location_name": name},
+            "date": (start + timedelta(days=d)).isoformat(),
+            "morning_forecast": rng.choice(SUMMARIES),
+            "afternoon_forecast": rng.choice(SUMMARIES),
+            "night_forecast": rng.choice(SUMMARIES),
+            "summary_forecast": rng.choice(SUMMARIES),
+            "summary_when": "Petang",
+            "min_temp": rng.randint(22, 25),
+            "max_temp": rng.randint(30, 35),
+        }
+        for i, name in enumerate(stations)
+        for d in range(FORECAST_DAYS)
+    ]
+
+
+def earthquake_payload(seed: int = 7, events: int = 50):
+    rng = random.Random(seed)
+    now = pd.Timestamp.utcnow().floor("s").tz_localize(None)
+    return [
+        {
+            "utcdatetime": (now - pd.Timedelta(hours=6 * i)).isoformat(),
+            "localdatetime": (now - pd.Timedelta(hours=6 * i - 8)).isoformat(),
+            "lat": round(rng.uniform(-5, 10), 2),
+            "lon": round(rng.uniform(95, 125), 2),
+            "depth": rng.randint(5, 200),
+            "location": f"Synthetic region {i}",
+            "location_original": f"Synthetic region {i}",
+            "n_distancemas": f"{rng.randint(100, 1500)} km",
+            "n_distancerest": "",
+            "nbm_distancemas": "",
+            "nbm_distancerest": "",
+            "magdefault": round(rng.uniform(2.5, 6.5), 1),
+            "magtypedefault": "mb",
+            "status": "NORMAL",
+            "visible": True,
+            "lat_vector": "", "lon_vector": "",
+        }
+        for i in range(events)
+    ]
+
+
+def diesel_payload(days: int = 30):
+    end = date.today()
+    return [
+        {
+            "series_type": "level",
+            "date": (end - timedelta(weeks=w)).isoformat(),
+            "ron95": 2.05, "ron97": round(3.40 + 0.01 * (w % 5), 2),
+            "diesel": round(2.85 + 0.02 * (w % 7), 2), "diesel_eastmsia": 2.15,
+        }
+        for w in range(days)
+    ]
+
+
+def news_page(offset: int, base_url: str) -> bytes:
+    items = []
+    for i in range(offset, offset + NEWS_PAGE_SIZE):
+        headline = NEWS_HEADLINES[i % len(NEWS_HEADLINES)]
+        published = (date.today() - timedelta(days=i // 3)).strftime("%d %b %Y")
+        items.append(f"""
+        <div class="NewsList_newsListItem">
+          <div><img class="NewsList_newsImage__j_h0a" src="{base_url}/images/{i}.jpg"/></div>
+          <div class="NewsList_newsListText__hstO7">
+            <a href="/node/{700000 - i}">
+              <span class="NewsList_newsListItemHead__dg7eK">{headline} ({i})</span>
+              <span class="NewsList_newsList__2fXyv">KUALA LUMPUR: palmoil futures on Bursa Malaysia Derivatives moved in session {i}.</span>
+            </a>
+          </div>
+          <div class="NewsList_infoNewsListSubMobile__SPmAG"><span>{published}</span></div>
+        </div>""")
+    return f"<html><body>{''.join(items)}</body></html>".encode()
+
+
+def fake_yf_download(tickers, start=None, end=None, progress=False, **kwargs):
+    """Deterministic stand-in for yf.download returning a (Price, Ticker) column frame."""
+    tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+    end = pd.Timestamp(end or date.today()).normalize()
+    start = pd.Timestamp(start or end - pd.Timedelta(days=30)).normalize()
+    index = pd.bdate_range(start, end, inclusive="left", name="Date")
+
+    closes = {}
+    for ticker in tickers:
+        rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+        level = rng.uniform(0.5, 30.0)
+        closes[ticker] = level * np.exp(np.cumsum(rng.normal(0, 0.01, len(index))))
+
+    fields = {
+        "Close": closes,
+        "High": {t: v * 1.01 for t, v in closes.items()},
+        "Low": {t: v * 0.99 for t, v in closes.items()},
+        "Open": closes,
+        "Volume": {t: np.full(len(index), 1e6) for t in tickers},
+    }
+    columns = pd.MultiIndex.from_product([list(fields), tickers], names=["Price", "Ticker"])
+    data = np.column_stack([fields[f][t] for f, t in columns]) if len(index) else np.empty((0, len(columns)))
+    return pd.DataFrame(data, index=index, columns=columns)
+
+
+class FakeUpstreams:
+    """Threaded localhost server for the weather, earthquake, diesel and news upstreams."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0, seed: int = 7):
+        self.latency = latency_ms / 1000
+        self.bodies = {
+            "/weather/forecast": json.dumps(forecast_payload(seed)).encode(),
+            "/weather/warning/earthquake/": json.dumps(earthquake_payload(seed)).encode(),
+            "/data-catalogue": json.dumps(diesel_payload()).encode(),
+        }
+        self.hits = {}
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self):
+        base = self.base_url
+        return {
+            "WEATHER_FORECAST_API_URL": f"{base}/weather/forecast",
+            "EARTHQUAKE_API_URL": f"{base}/weather/warning/earthquake/",
+            "DIESEL_API_URL": f"{base}/data-catalogue?id=fuelprice&limit=30",
+            "NEWS_BASE_URL": base,
+        }
+
+    def _handler(self):
+        upstreams = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                with upstreams._lock:
+                    upstreams.hits[url.path] = upstreams.hits.get(url.path, 0) + 1
+                if upstreams.latency:
+                    time.sleep(upstreams.latency)
+
+                if url.path == "/news-search-results":
+                    offset = int(parse_qs(url.query).get("offset", ["0"])[0])
+                    body, content_type = news_page(offset, upstreams.base_url), "text/html; charset=utf-8"
+                elif url.path in upstreams.bodies:
+                    body, content_type = upstreams.bodies[url.path], "application/json"
+                else:
+                    self.send_error(404)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeUpstreams":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-upstreams", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay added to every upstream response")
+    args = parser.parse_args()
+
+    upstreams = FakeUpstreams(args.host, args.port, args.latency_ms).start()
+    print(f"🧪 Fake upstreams listening on {upstreams.base_url}. Export these before starting uvicorn:")
+    for key, value in upstreams.env().items():
+        print(f"export {key}='{value}'")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        upstreams.stop()
+
+
+if __name__ == "__main__":
+    main()
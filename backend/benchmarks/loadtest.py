@@ -0,0 +1,228 @@
+"""
+Offline load test: per-route p50/p95/p99 latency and throughput at several concurrency
+levels, against the real app served by uvicorn on localhost.
+
+The database comes from `--db` or is generated with benchmarks.synthetic_db; upstream
+APIs are served by benchmarks.fake_upstreams and Yahoo Finance is replaced in-process,
+so no network access is needed. Save a run with `--json` and pass it as `--baseline`
+on the next run to print the change in p95 per route.
+
+    cd backend
+    python -m benchmarks.loadtest --estates 20000 --requests 200 --concurrency 1 8 32
+    python -m benchmarks.loadtest --routes mspo trade --json after.json --baseline before.json
+"""
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_upstreams import FakeUpstreams, fake_yf_download  # noqa: E402
+
+# {company} is filled from company_master_table, cycling through companies per request
+ROUTES = [
+    "/api/company/{company}",
+    "/api/company/{company}/dashboard",
+    "/api/production/{company}",
+    "/api/production/{company}?format=columnar",
+    "/api/extraction/{company}",
+    "/api/plantation-area/{company}",
+    "/api/earnings/{company}",
+    "/api/company/sankey/{company}",
+    "/api/company/sankey/{company}?period=all",
+    "/api/peers",
+    "/api/shareprice/{company}",
+    "/api/shareprices",
+    "/api/mpob-statistics",
+    "/api/raw-material-prices",
+    "/api/raw-material-prices?format=columnar",
+    "/api/raw-material-prices?window=10Y&resolution=weekly&max_points=500",
+    "/api/container-freight-index",
+    "/api/trade-data",
+    "/api/trade-data/network",
+    "/api/news",
+    "/api/diesel-prices",
+    "/api/mspo-certified-entities",
+    "/api/mspo-certified-entities?shape=normalized",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int):
+    import uvicorn
+    import yfinance
+    import main as app_module
+
+    # The app imports yfinance lazily, so patching the module covers every call
+    yfinance.download = fake_yf_download
+    server = uvicorn.Server(uvicorn.Config(app_module.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="uvicorn", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("uvicorn failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+
+def company_names(db_path: str):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute("SELECT company_short_name FROM company_master_table")]
+    finally:
+        conn.close()
+
+
+class Client:
+    """One keep-alive session per worker thread, like a browser tab."""
+
+    def __init__(self, base_url: str, etag: bool):
+        self.base_url = base_url
+        self.etag = etag
+        self.local = threading.local()
+
+    def get(self, path: str):
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = requests.Session()
+            self.local.etags = {}
+        headers = {}
+        if self.etag and path in self.local.etags:
+            headers["If-None-Match"] = self.local.etags[path]
+
+        start = time.perf_counter()
+        try:
+            response = session.get(self.base_url + path, headers=headers, timeout=120)
+            body = response.content
+        except requests.RequestException as e:
+            # Counted as an error (status 0) so one dropped connection doesn't end the run
+            print(f"⚠️ GET {path} failed: {type(e).__name__}: {e}")
+            return time.perf_counter() - start, 0, 0
+        elapsed = time.perf_counter() - start
+
+        if self.etag and "etag" in response.headers:
+            self.local.etags[path] = response.headers["etag"]
+        return elapsed, response.status_code, len(body)
+
+
+def run_level(client: Client, paths, n_requests: int, concurrency: int):
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        wall_start = time.perf_counter()
+        results = list(executor.map(lambda i: client.get(paths[i % len(paths)]), range(n_requests)))
+        wall = time.perf_counter() - wall_start
+
+    latencies = np.array([r[0] for r in results]) * 1000
+    errors = sum(1 for _, status, _ in results if status == 0 or status >= 400)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "concurrency": concurrency,
+        "requests": n_requests,
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "rps": round(n_requests / wall, 1),
+        "errors": errors,
+        "bytes": int(np.mean([r[2] for r in results])),
+    }
+
+
+def print_results(results, baseline=None):
+    baseline = {(r["route"], r["concurrency"]): r for r in (baseline or [])}
+    print(f"\n{'route':<45} {'conc':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'bytes':>9} {'err':>4}  Δp95")
+    for r in results:
+        before = baseline.get((r["route"], r["concurrency"]))
+        delta = f"{(r['p95_ms'] / before['p95_ms'] - 1) * 100:+.0f}%" if before and before["p95_ms"] else ""
+        print(f"{r['route']:<45} {r['concurrency']:>4} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+              f"{r['rps']:>8.1f} {r['bytes']:>9} {r['errors']:>4}  {delta}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="existing database; generated into a temp dir if omitted")
+    parser.add_argument("--wind-raster", help="existing wind GeoTIFF; generated if omitted")
+    parser.add_argument("--companies", type=int, default=28)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--categories", type=int, default=6)
+    parser.add_argument("--estates", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=200, help="requests per route per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--warmup", type=int, default=3, help="unmeasured requests per route")
+    parser.add_argument("--routes", nargs="*", help="only routes containing one of these substrings")
+    parser.add_argument("--etag", action="store_true", help="revalidate with If-None-Match like a browser")
+    parser.add_argument("--upstream-latency-ms", type=float, default=0.0)
+    parser.add_argument("--json", help="write results here")
+    parser.add_argument("--baseline", help="earlier --json output to compare against")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bursa-bench-")
+    db_path = args.db or os.path.join(workdir, "bursa_palmai_database.db")
+    wind_path = args.wind_raster or os.path.join(workdir, "wind.tif")
+    # db.py, snapshots.py and share_prices.py read these at import time, so set them
+    # before anything imports them
+    os.environ["BURSA_DB_PATH"] = db_path
+    os.environ["WIND_PATH"] = wind_path
+    os.environ["SNAPSHOT_DB_PATH"] = os.path.join(workdir, "upstream_snapshots.db")
+    os.environ["SHARE_PRICE_DB_PATH"] = os.path.join(workdir, "share_prices.db")
+    from benchmarks.synthetic_db import generate, write_wind_raster
+
+    if not args.db:
+        print(f"🧪 Generating synthetic database ({args.companies} companies, {args.years} years, "
+              f"{args.estates} estates)...")
+        generate(db_path, args.companies, args.years, args.categories, args.estates)
+    if not args.wind_raster:
+        write_wind_raster(wind_path)
+
+    upstreams = FakeUpstreams(latency_ms=args.upstream_latency_ms).start()
+    os.environ.update(upstreams.env())
+
+    port = free_port()
+    server, thread = start_server(port)
+    client = Client(f"http://127.0.0.1:{port}", args.etag)
+    companies = company_names(db_path)
+
+    routes = [r for r in ROUTES if not args.routes or any(s in r for s in args.routes)]
+    results = []
+    try:
+        for route in routes:
+            paths = [route.format(company=c) for c in companies] if "{company}" in route else [route]
+            for i in range(args.warmup):
+                client.get(paths[i % len(paths)])
+            for concurrency in args.concurrency:
+                result = run_level(client, paths, args.requests, concurrency)
+                result["route"] = route
+                results.append(result)
+                print(f"⏱️ {route} x{concurrency}: p95 {result['p95_ms']} ms, {result['rps']} req/s")
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+        upstreams.stop()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    print_results(results, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "upstream_hits": upstreams.hits, "results": results}, f, indent=2)
+        print(f"✅ Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
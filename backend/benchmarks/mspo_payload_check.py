@@ -0,0 +1,104 @@
+"""
+Check that /api/mspo-certified-entities serves estates with no Aqueduct match.
+
+A synthetic database is generated with an Aqueduct summary covering only one estate,
+so every other estate carries missing flood and drought labels. Both the flat
+and the normalized shape must answer 200 with those labels as JSON null (a NaN left in
+the flat records made the stdlib encoder fail with a 500). Upstreams are served by
+benchmarks.fake_upstreams. Exits non-zero on any failure.
+
+    cd backend
+    python -m benchmarks.mspo_payload_check
+    python -m benchmarks.mspo_payload_check --estates 2000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_upstreams import FakeUpstreams  # noqa: E402
+
+ROUTES = ["/api/mspo-certified-entities", "/api/mspo-certified-entities?shape=normalized"]
+MATCHED_ENTITY = "Estate 000001"  # estate 0 is a mill
+MATCHED_COMPANY = "Estate Holdings 1"
+
+
+def write_aqueduct(directory: str) -> None:
+    """One plantation per hazard summary: the first synthetic estate that is not a mill."""
+    os.makedirs(directory, exist_ok=True)
+    for hazard in ("cfr", "rfr", "drr"):
+        with open(os.path.join(directory, f"{hazard}_summary.csv"), "w") as f:
+            f.write(f",company,plantation,gfw_fid,{hazard}_label,pct_overlap\n")
+            f.write(f"0,{MATCHED_COMPANY},{MATCHED_ENTITY},1,High,80.0\n")
+
+
+def reject_constant(name: str):
+    raise ValueError(f"non-standard JSON constant {name}")
+
+
+def estate_rows(path: str, payload: dict):
+    return payload["estates"] if "shape=normalized" in path else payload["data"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--estates", type=int, default=300)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bursa-mspo-check-")
+    # Read at import time, so set before anything imports the app
+    os.environ.update({
+        "BURSA_DB_PATH": os.path.join(workdir, "bursa_palmai_database.db"),
+        "WIND_PATH": os.path.join(workdir, "wind.tif"),
+        "AQUEDUCT_DIR": os.path.join(workdir, "aqueduct"),
+        "SNAPSHOT_DB_PATH": os.path.join(workdir, "upstream_snapshots.db"),
+        "SHARE_PRICE_DB_PATH": os.path.join(workdir, "share_prices.db"),
+        "APP_WARMUP": "",
+    })
+    from benchmarks.synthetic_db import generate, write_wind_raster
+
+    generate(os.environ["BURSA_DB_PATH"], companies=3, years=1, categories=2, estates=args.estates)
+    write_wind_raster(os.environ["WIND_PATH"])
+    write_aqueduct(os.environ["AQUEDUCT_DIR"])
+
+    upstreams = FakeUpstreams().start()
+    os.environ.update(upstreams.env())
+    from fastapi.testclient import TestClient
+    import main as app_module
+
+    failures = []
+    try:
+        client = TestClient(app_module.app, raise_server_exceptions=False)
+        for path in ROUTES:
+            response = client.get(path)
+            if response.status_code != 200:
+                failures.append(f"{path}: HTTP {response.status_code}")
+                continue
+            try:
+                rows = estate_rows(path, json.loads(response.text, parse_constant=reject_constant))
+            except ValueError as e:
+                failures.append(f"{path}: {e}")
+                continue
+            matched = [r for r in rows if r["entity"] == MATCHED_ENTITY]
+            unmatched = [r for r in rows if r["entity"] != MATCHED_ENTITY]
+            if not unmatched or any(r["cfr_label"] is not None or r["drr_pct_overlap"] is not None
+                                    for r in unmatched):
+                failures.append(f"{path}: estates without an Aqueduct match should have null labels")
+            if not matched or any(r["cfr_label"] != "High" for r in matched):
+                failures.append(f"{path}: {MATCHED_ENTITY} lost its Aqueduct label")
+            print(f"{path}: {len(rows)} rows, {len(unmatched)} without an Aqueduct match")
+    finally:
+        upstreams.stop()
+
+    if failures:
+        for failure in failures:
+            print("❌", failure)
+        sys.exit(1)
+    print("✅ Estates without an Aqueduct match serialize as null")
+
+
+if __name__ == "__main__":
+    main()
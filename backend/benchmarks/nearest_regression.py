@@ -0,0 +1,92 @@
+"""
+Regression check for spatial.NearestLocator against the lookup it replaced:
+geopy's geodesic() distance to every location, then pandas idxmin.
+
+Seeded random stations and query points over Peninsular Malaysia and Borneo are
+compared on both the nearest index and the distance in km; some stations have
+missing coordinates and a few stations are duplicated to exercise tie-breaking.
+Exits non-zero on any mismatch.
+
+    cd backend
+    python -m benchmarks.nearest_regression
+    python -m benchmarks.nearest_regression --points 3000 --stations 60 --seed 7
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from spatial import NearestLocator  # noqa: E402
+
+# (min_lat, max_lat, min_lon, max_lon)
+REGIONS = [(1.2, 6.7, 99.6, 104.5), (0.8, 7.4, 109.5, 119.3)]
+KM_TOLERANCE = 1e-6
+
+
+def random_points(rng: np.random.Generator, n: int) -> pd.DataFrame:
+    region = rng.integers(0, len(REGIONS), n)
+    bounds = np.array(REGIONS)[region]
+    return pd.DataFrame({
+        "lat": rng.uniform(bounds[:, 0], bounds[:, 1]),
+        "lon": rng.uniform(bounds[:, 2], bounds[:, 3]),
+    })
+
+
+def reference(points: pd.DataFrame, stations: pd.DataFrame):
+    """Nearest station label and km per point, the way the routes used to compute them."""
+    from geopy.distance import geodesic
+
+    nearest, km = [], []
+    for point in points.itertuples():
+        distances = stations.apply(
+            lambda s: geodesic((point.lat, point.lon), (s.lat, s.lon)).km
+            if pd.notna(s.lat) and pd.notna(s.lon) else np.nan,
+            axis=1,
+        )
+        idx = distances.idxmin()
+        nearest.append(idx)
+        km.append(distances[idx])
+    return np.array(nearest), np.array(km)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=500)
+    parser.add_argument("--stations", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    stations = random_points(rng, args.stations)
+    stations.loc[rng.choice(len(stations), size=max(1, len(stations) // 10), replace=False), "lat"] = np.nan
+    stations = pd.concat([stations, stations.iloc[:3]], ignore_index=True)  # exact duplicates: first wins
+    points = random_points(rng, args.points)
+
+    start = time.perf_counter()
+    expected_idx, expected_km = reference(points, stations)
+    reference_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    locator = NearestLocator(stations["lat"], stations["lon"])
+    actual_idx, actual_km = locator.query(points["lat"], points["lon"])
+    locator_s = time.perf_counter() - start
+
+    index_mismatches = int(np.sum(actual_idx != expected_idx))
+    km_error = float(np.max(np.abs(actual_km - expected_km)))
+    print(f"{args.points} points x {len(stations)} stations: "
+          f"geodesic+idxmin {reference_s:.2f}s, NearestLocator {locator_s:.4f}s")
+    print(f"index mismatches: {index_mismatches}, max km difference: {km_error:.2e}")
+
+    if index_mismatches or km_error > KM_TOLERANCE:
+        print("❌ NearestLocator disagrees with geodesic() + idxmin")
+        sys.exit(1)
+    print("✅ NearestLocator matches geodesic() + idxmin")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Synthetic bursa_palmai_database.db generator for offline benchmarks.
+
+Builds every table the API reads at a configurable scale, with dates running up to
+today so the rolling-window routes return data, plus an optional wind-speed GeoTIFF
+covering Peninsular Malaysia and Borneo.
+
+    cd backend
+    python -m benchmarks.synthetic_db --out /tmp/bench.db --companies 28 --years 10 \\
+        --categories 6 --estates 20000 --wind-raster /tmp/bench_wind.tif
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations import apply_migrations  # noqa: E402
+
+SCHEMA = """
+CREATE TABLE company_master_table (
+    company_short_name TEXT, company_long_name TEXT, company_stock_code TEXT,
+    company_board TEXT, company_description TEXT, company_website TEXT, company_rolename TEXT
+);
+CREATE TABLE company_monthly_production (date TEXT, company_short_name TEXT, raw_material TEXT, volume REAL);
+CREATE TABLE company_extraction_rate (date TEXT, company_short_name TEXT, value REAL, category TEXT);
+CREATE TABLE company_plantation_area (date TEXT, company_short_name TEXT, value REAL, category TEXT);
+CREATE TABLE company_earnings_data (
+    company_short_name TEXT, date TEXT, revenue REAL, net_profit REAL, net_profit_margin REAL
+);
+CREATE TABLE company_financials_data (company_short_name TEXT, date TEXT, source TEXT, target TEXT, value REAL);
+CREATE TABLE mpob_stats (date TEXT, category TEXT, value REAL);
+CREATE TABLE commodities_data (date TEXT, category TEXT, value REAL);
+CREATE TABLE containerized_freight_index (date TEXT, category TEXT, value REAL);
+CREATE TABLE trade_data (
+    reporterISO TEXT, partnerISO TEXT, reporterDesc TEXT, refMonth TEXT, cmdCode TEXT, fobvalue REAL
+);
+CREATE TABLE mspo_certified_entities (
+    company TEXT, parent_company TEXT, entity TEXT, mpobl_license_number TEXT, audit_scope TEXT,
+    category TEXT, state TEXT, status TEXT, latitude REAL, longitude REAL,
+    certified_area_ha TEXT, planted_area_ha TEXT
+);
+"""
+
+RAW_MATERIALS = ["FFB", "CPO", "PK"]
+AREA_CATEGORIES = ["Mature", "Immature", "Planted"]
+COMMODITIES = ["CPO", "Soybean Oil", "Sunflower Oil", "Rapeseed Oil", "Brent", "Gasoil", "Urea", "Potash"]
+MPOB_CATEGORIES = ["Production", "Exports", "Imports", "Closing Stocks", "Domestic Disappearance", "Yield"]
+FREIGHT_ROUTES = ["Composite", "Shanghai-Rotterdam", "Shanghai-Genoa", "Shanghai-Los Angeles"]
+TRADE_COUNTRIES = ["MYS", "IDN", "IND", "CHN", "NLD", "PAK", "USA", "BGD", "PHL", "EGY", "TUR", "VNM", "KEN", "JPN"]
+TRADE_COMMODITIES = ["1511 - Palm oil and its fractions", "1513 - Palm kernel oil", "1507 - Soya-bean oil"]
+SANKEY_FLOWS = [
+    ("Plantation", "Revenue", 0.55), ("Downstream", "Revenue", 0.45),
+    ("Revenue", "Cost of sales", 0.72), ("Revenue", "Gross profit", 0.28),
+    ("Gross profit", "Operating expenses", 0.12), ("Gross profit", "Operating profit", 0.16),
+    ("Operating profit", "Tax", 0.04), ("Operating profit", "Net profit", 0.12),
+]
+# (state, lat range, lon range)
+STATES = [
+    ("Pahang", (2.8, 4.6), (101.8, 103.4)), ("Perak", (3.8, 5.8), (100.5, 101.6)),
+    ("Kedah", (5.2, 6.4), (100.3, 101.0)), ("Johor", (1.5, 2.7), (102.6, 104.2)),
+    ("Sabah", (4.3, 6.9), (116.0, 118.9)), ("Sarawak", (1.0, 4.5), (110.0, 115.0)),
+]
+
+
+def month_starts(start: date, end: date):
+    current = date(start.year, start.month, 1)
+    while current <= end:
+        yield current
+        current = date(current.year + (current.month == 12), current.month % 12 + 1, 1)
+
+
+def quarter_ends(start: date, end: date):
+    for year in range(start.year, end.year + 1):
+        for month, day in ((3, 31), (6, 30), (9, 30), (12, 31)):
+            d = date(year, month, day)
+            if start <= d <= end:
+                yield d
+
+
+def generate(path: str, companies: int = 28, years: int = 5, categories: int = 6,
+             estates: int = 20000, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    if os.path.exists(path):
+        os.remove(path)
+
+    end = date.today()
+    start = date(end.year - years, 1, 1)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+
+    shorts = [f"CO{i:03d}" for i in range(companies)]
+    conn.executemany(
+        "INSERT INTO company_master_table VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(s, f"{s} Plantations Berhad", str(1000 + i), "Main", "Synthetic plantation company",
+          f"https://example.com/{s.lower()}", "Plantation") for i, s in enumerate(shorts)]
+    )
+
+    production, extraction, area, earnings, financials = [], [], [], [], []
+    for s in shorts:
+        scale = rng.uniform(0.2, 5.0)
+        for m in month_starts(start, end):
+            d = m.isoformat()
+            for raw in RAW_MATERIALS:
+                production.append((d, s, raw, round(rng.uniform(10_000, 200_000) * scale, 2)))
+            extraction.append((d, s, round(rng.uniform(19.0, 22.5), 2), "OER"))
+            extraction.append((d, s, round(rng.uniform(4.0, 5.5), 2), "KER"))
+        for year in range(start.year, end.year + 1):
+            for cat in AREA_CATEGORIES:
+                area.append((str(year), s, round(rng.uniform(5_000, 150_000) * scale, 1), cat))
+        for q in quarter_ends(start, end):
+            revenue = rng.uniform(200e6, 5e9) * scale
+            margin = rng.uniform(2, 25)
+            earnings.append((s, q.isoformat(), revenue, revenue * margin / 100, round(margin, 2)))
+            for source, target, share in SANKEY_FLOWS:
+                financials.append((s, q.isoformat(), source, target, revenue * share))
+
+    conn.executemany("INSERT INTO company_monthly_production VALUES (?, ?, ?, ?)", production)
+    conn.executemany("INSERT INTO company_extraction_rate VALUES (?, ?, ?, ?)", extraction)
+    conn.executemany("INSERT INTO company_plantation_area VALUES (?, ?, ?, ?)", area)
+    conn.executemany("INSERT INTO company_earnings_data VALUES (?, ?, ?, ?, ?)", earnings)
+    conn.executemany("INSERT INTO company_financials_data VALUES (?, ?, ?, ?, ?)", financials)
+
+    commodity_rows, freight_rows = [], []
+    levels = {c: rng.uniform(50, 5000) for c in COMMODITIES}
+    day = start
+    while day <= end:
+        for c in COMMODITIES[:max(categories, 1)]:
+            levels[c] *= 1 + rng.gauss(0, 0.01)
+            commodity_rows.append((day.isoformat(), c, round(levels[c], 2)))
+        if day.weekday() == 4:
+            for route in FREIGHT_ROUTES:
+                freight_rows.append((day.isoformat(), route, round(rng.uniform(800, 4000), 2)))
+        day += timedelta(days=1)
+    conn.executemany("INSERT INTO commodities_data VALUES (?, ?, ?)", commodity_rows)
+    conn.executemany("INSERT INTO containerized_freight_index VALUES (?, ?, ?)", freight_rows)
+    conn.executemany(
+        "INSERT INTO mpob_stats VALUES (?, ?, ?)",
+        [(m.isoformat(), c, round(rng.uniform(1e5, 2e6), 1))
+         for m in month_starts(start, end) for c in MPOB_CATEGORIES[:max(categories, 1)]]
+    )
+
+    trade_rows = []
+    for year in range(start.year, end.year + 1):
+        for reporter in TRADE_COUNTRIES + ["WORLD"]:
+            for partner in TRADE_COUNTRIES:
+                if reporter == partner:
+                    continue
+                for cmd in TRADE_COMMODITIES:
+                    flow = rng.choice(["M", "X"])
+                    trade_rows.append((reporter, partner, flow, str(year), cmd, rng.lognormvariate(16, 2)))
+    conn.executemany("INSERT INTO trade_data VALUES (?, ?, ?, ?, ?, ?)", trade_rows)
+
+    mspo_rows = []
+    for i in range(estates):
+        state, (lat0, lat1), (lon0, lon1) = rng.choice(STATES)
+        planted = rng.uniform(50, 5000)
+        mspo_rows.append((
+            f"Estate Holdings {i % 500}", shorts[i % len(shorts)] if shorts else None,
+            f"Estate {i:06d}", f"{500000 + i:06d}{rng.randint(10000, 99999)}", "Oil palm plantation",
+            "ESTATE" if i % 10 else "MILL", state, "ACTIVE" if i % 20 else "SUSPENDED",
+            rng.uniform(lat0, lat1), rng.uniform(lon0, lon1),
+            f"{planted * rng.uniform(0.6, 1.0):.2f}", f"{planted:.2f}",
+        ))
+    conn.executemany("INSERT INTO mspo_certified_entities VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", mspo_rows)
+
+    conn.commit()
+    conn.close()
+    apply_migrations(path)
+
+
+def write_wind_raster(path: str, seed: int = 7) -> None:
+    """0.01 degree EPSG:4326 wind-speed grid over Malaysia with a nodata strip in the sea."""
+    import numpy as np
+    import rasterio
+    from rasterio.transform import from_origin
+
+    rng = np.random.default_rng(seed)
+    west, north, res = 99.0, 8.0, 0.01
+    height, width = 800, 2000
+    values = rng.gamma(4.0, 1.5, size=(height, width)).astype("float32")
+    values[-20:, :] = -9999.0
+    with rasterio.open(
+        path, "w", driver="GTiff", height=height, width=width, count=1, dtype="float32",
+        crs="EPSG:4326", transform=from_origin(west, north, res, res), nodata=-9999.0,
+    ) as dataset:
+        dataset.write(values, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--companies", type=int, default=28)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--categories", type=int, default=6, help="commodity and MPOB series")
+    parser.add_argument("--estates", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--wind-raster", help="also write a synthetic wind GeoTIFF here")
+    args = parser.parse_args()
+
+    generate(args.out, args.companies, args.years, args.categories, args.estates, args.seed)
+    if args.wind_raster:
+        write_wind_raster(args.wind_raster, args.seed)
+    print(f"✅ Synthetic database written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import threading
+import time
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from metrics import count_cache
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache whose entries expire `ttl` seconds after they are set.
+    Shared by routes that serve the same upstream data (e.g. share prices). Named
+    caches report hits and misses to /api/metrics.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024, name: Optional[str] = None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.name = name
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._data[key]
+                entry = None
+        if self.name:
+            count_cache(self.name, "miss" if entry is None else "hit")
+        return default if entry is None else entry[1]
+
+    def get_many(self, keys: Iterable[Hashable]) -> Tuple[Dict[Hashable, Any], List[Hashable]]:
+        """Return (hits, misses) for the given keys in a single pass."""
+        hits: Dict[Hashable, Any] = {}
+        misses: List[Hashable] = []
+        for key in keys:
+            value = self.get(key)
+            if value is None:
+                misses.append(key)
+            else:
+                hits[key] = value
+        return hits, misses
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            if len(self._data) >= self.maxsize and key not in self._data:
+                self._evict()
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def _evict(self) -> None:
+        # Drop expired entries first, then the entry closest to expiry
+        now = time.monotonic()
+        expired = [k for k, (exp, _) in self._data.items() if exp <= now]
+        for k in expired:
+            del self._data[k]
+        if len(self._data) >= self.maxsize:
+            oldest = min(self._data, key=lambda k: self._data[k][0])
+            del self._data[oldest]
+            if self.name:
+                count_cache(self.name, "evict")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
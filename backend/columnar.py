@@ -0,0 +1,65 @@
+"""
+Columnar response format for the time-series routes (`?format=columnar`).
+
+Instead of one JSON object per row the payload is
+    {"columns": [...], "dates": [...], "series": {column: [values aligned to dates]}}
+built straight from cursor rows and serialized with orjson.
+"""
+from typing import Any, Dict, Iterable, List, Sequence
+
+import orjson
+from fastapi.responses import Response
+
+
+class ColumnarResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+def long_to_columnar(rows: Iterable[Sequence]) -> Dict[str, Any]:
+    """
+    Pivot (date, key, value) rows - e.g. (date, category, value) - into columns.
+    Dates keep their first-seen order; missing points are None.
+    """
+    dates: List[Any] = []
+    date_positions: Dict[Any, int] = {}
+    series: Dict[Any, List[Any]] = {}
+
+    for day, key, value in rows:
+        pos = date_positions.get(day)
+        if pos is None:
+            pos = date_positions[day] = len(dates)
+            dates.append(day)
+
+        values = series.get(key)
+        if values is None:
+            values = series[key] = []
+        if len(values) < pos:
+            values.extend([None] * (pos - len(values)))
+        if len(values) == pos:
+            values.append(value)
+        else:
+            values[pos] = value
+
+    for values in series.values():
+        values.extend([None] * (len(dates) - len(values)))
+
+    return {"columns": list(series), "dates": dates, "series": series}
+
+
+def wide_to_columnar(columns: Sequence[str], rows: Iterable[Sequence],
+                     date_column: str = "date", exclude: Sequence[str] = ()) -> Dict[str, Any]:
+    """Split already-wide rows (one value per column) into a date axis plus one array per column."""
+    rows = list(rows)
+    date_idx = columns.index(date_column)
+    value_columns = [
+        (i, name) for i, name in enumerate(columns)
+        if i != date_idx and name not in exclude
+    ]
+    return {
+        "columns": [name for _, name in value_columns],
+        "dates": [row[date_idx] for row in rows],
+        "series": {name: [row[i] for row in rows] for i, name in value_columns},
+    }
@@ -0,0 +1,129 @@
+"""
+Per-company dashboard bundle.
+
+Everything the company page needs (profile, production, extraction, plantation area
+and earnings) is read on one pooled connection inside a single read transaction, so
+all five sections come from the same database snapshot. The precomputed Sankey graphs
+of every reporting period are only read by the routes that serve them. Bundles and
+graphs are cached per company and data version, so a data reload invalidates them.
+"""
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence
+
+import orjson
+
+import queries
+from cache import TTLCache
+from db import data_version, pool
+from sankey import Graph
+
+COMPANY_BUNDLE_TTL = 60 * 60
+
+bundle_cache = TTLCache(ttl=COMPANY_BUNDLE_TTL, maxsize=256, name="company_bundle")
+sankey_cache = TTLCache(ttl=COMPANY_BUNDLE_TTL, maxsize=256, name="company_sankey")
+
+
+class QueryResult:
+    """Column names plus raw cursor rows, with the records view built once on demand."""
+
+    __slots__ = ("columns", "rows", "_records")
+
+    def __init__(self, columns: Sequence[str], rows: List[tuple]):
+        self.columns = list(columns)
+        self.rows = rows
+        self._records: Optional[List[Dict[str, Any]]] = None
+
+    def records(self) -> List[Dict[str, Any]]:
+        if self._records is None:
+            self._records = [dict(zip(self.columns, row)) for row in self.rows]
+        return self._records
+
+
+class CompanyBundle:
+    __slots__ = ("profile", "production", "extraction", "plantation_area", "earnings")
+
+    def __init__(self, profile: Optional[Dict[str, Any]], production: QueryResult,
+                 extraction: QueryResult, plantation_area: QueryResult,
+                 earnings: QueryResult):
+        self.profile = profile
+        self.production = production
+        self.extraction = extraction
+        self.plantation_area = plantation_area
+        self.earnings = earnings
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "company": self.profile or {"error": "Company not found"},
+            "production": self.production.records(),
+            "extraction": self.extraction.records(),
+            "plantation_area": self.plantation_area.records(),
+            "earnings": self.earnings.records(),
+        }
+
+
+def run_query(conn: sqlite3.Connection, query: str, params: Sequence) -> QueryResult:
+    cur = conn.execute(query, params)
+    columns = [d[0] for d in cur.description]
+    return QueryResult(columns, cur.fetchall())
+
+
+def build_profile(row: Optional[tuple]) -> Optional[Dict[str, Any]]:
+    if not row:
+        return None
+    return {
+        "company_long_name": row[1],
+        "company_stock_code": row[2],
+        "company_board": row[3],
+        "company_description": row[4],
+        "company_website": row[5],
+        "company_rolename": row[6]
+    }
+
+
+def load_sankey_graphs(conn: sqlite3.Connection, short_name: str) -> Dict[str, Graph]:
+    """period -> graph, oldest first."""
+    try:
+        rows = conn.execute(queries.COMPANY_SANKEY, (short_name,)).fetchall()
+    except sqlite3.OperationalError as e:
+        # Table not created yet (migrations disabled and no Sankey refresh has run)
+        print("⚠️ Sankey table unavailable:", e)
+        return {}
+    return {period: orjson.loads(graph) for period, graph in rows}
+
+
+def load_company_bundle(conn: sqlite3.Connection, short_name: str) -> CompanyBundle:
+    params = (short_name,)
+    conn.execute("BEGIN")
+    try:
+        profile = build_profile(conn.execute(queries.COMPANY_PROFILE, params).fetchone())
+        production = run_query(conn, queries.COMPANY_PRODUCTION, params)
+        extraction = run_query(conn, queries.COMPANY_EXTRACTION_RATE, params)
+        plantation_area = run_query(conn, queries.COMPANY_PLANTATION_AREA, params)
+        earnings = run_query(conn, queries.COMPANY_EARNINGS, params)
+    finally:
+        conn.rollback()
+    return CompanyBundle(profile, production, extraction, plantation_area, earnings)
+
+
+def get_company_bundle(company_short_name: str) -> CompanyBundle:
+    """Cached bundle for a company at the current data version."""
+    short_name = company_short_name.upper()
+    key = (short_name, data_version())
+    bundle = bundle_cache.get(key)
+    if bundle is None:
+        with pool.connection() as conn:
+            bundle = load_company_bundle(conn, short_name)
+        bundle_cache.set(key, bundle)
+    return bundle
+
+
+def get_sankey_graphs(company_short_name: str) -> Dict[str, Graph]:
+    """Cached Sankey graphs of every period for a company at the current data version."""
+    short_name = company_short_name.upper()
+    key = (short_name, data_version())
+    graphs = sankey_cache.get(key)
+    if graphs is None:
+        with pool.connection() as conn:
+            graphs = load_sankey_graphs(conn, short_name)
+        sankey_cache.set(key, graphs)
+    return graphs
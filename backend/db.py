@@ -0,0 +1,179 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from metrics import span
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.getenv(
+    "BURSA_DB_PATH",
+    os.path.join(BASE_DIR, "..", "src", "data", "bursa_palmai_database.db")
+)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", str(64 * 1024)))
+DB_STATEMENT_CACHE = int(os.getenv("DB_STATEMENT_CACHE", "256"))
+
+
+class ConnectionPool:
+    """
+    Pool of read-only SQLite connections shared by the API routes.
+
+    Connections are opened lazily (up to `size`) in read-only URI mode with a large
+    mmap window, page cache and prepared-statement cache, then reused across requests.
+    Idle connections are handed out last-in-first-out so a busy thread keeps getting a
+    warm connection. If the database file is swapped out on reload, idle connections
+    to the old file are discarded.
+    """
+
+    def __init__(self, path: str, size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT,
+                 mmap_size: int = DB_MMAP_SIZE, cache_size_kb: int = DB_CACHE_SIZE_KB,
+                 statement_cache: int = DB_STATEMENT_CACHE):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self.statement_cache = statement_cache
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._file_id = None
+        self._conn_file_ids = {}
+
+    def _open(self) -> sqlite3.Connection:
+        uri = f"file:{quote(os.path.abspath(self.path))}?mode=ro"
+        conn = sqlite3.connect(
+            uri, uri=True, check_same_thread=False, cached_statements=self.statement_cache
+        )
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = {-int(self.cache_size_kb)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = self._open()
+        self._conn_file_ids[id(conn)] = self._file_id
+        return conn
+
+    def _current_file_id(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_dev, st.st_ino)
+
+    def _discard_idle(self) -> None:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(conn)
+
+    def _close(self, conn: sqlite3.Connection) -> None:
+        self._conn_file_ids.pop(id(conn), None)
+        conn.close()
+        with self._lock:
+            self._created -= 1
+
+    def _checkout(self) -> sqlite3.Connection:
+        file_id = self._current_file_id()
+        if file_id != self._file_id:
+            self._discard_idle()
+            self._file_id = file_id
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No database connection available after {self.timeout}s") from None
+
+    def _checkin(self, conn: sqlite3.Connection) -> None:
+        if self._conn_file_ids.get(id(conn)) != self._file_id:
+            self._close(conn)
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a `with` block."""
+        with span("db", "pool_wait"):
+            conn = self._checkout()
+        try:
+            with span("db", "connection"):
+                yield conn
+        finally:
+            self._checkin(conn)
+
+    @contextmanager
+    def dedicated(self):
+        """
+        A connection of its own with the pool's settings, closed when the block exits.
+        For long-lived readers such as streamed exports, so a slow client never holds
+        one of the pooled connections the routes share.
+        """
+        conn = self._open()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def close(self) -> None:
+        self._discard_idle()
+
+
+def data_version(path: str = DB_PATH) -> str:
+    """
+    Cheap token that changes whenever the database file (or its WAL) is written.
+    Used to key caches that must be invalidated when data is reloaded.
+    """
+    parts = []
+    for suffix in ("", "-wal"):
+        try:
+            st = os.stat(path + suffix)
+        except FileNotFoundError:
+            parts.append("0")
+            continue
+        parts.append(f"{st.st_mtime_ns:x}-{st.st_size:x}")
+    return ".".join(parts)
+
+
+@contextmanager
+def write_connection(path: str = DB_PATH):
+    """
+    Short-lived read-write connection for migrations and data loads.
+    Commits when the block exits cleanly, otherwise the changes are discarded.
+    """
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+pool = ConnectionPool(DB_PATH)
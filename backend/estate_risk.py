@@ -0,0 +1,302 @@
+"""
+Precomputed per-estate risk in the `estate_risk` table.
+
+Wind speed and wind risk class only depend on where an estate is, and the Aqueduct
+coastal flood (cfr), riverine flood (rfr) and drought (drr) summaries only on which
+plantation it is, so they are computed once per estate instead of on every
+/api/mspo-certified-entities request. `refresh_estate_risk()` recomputes only estates
+that are new or whose coordinates changed (or every estate when one of the input
+files changed), updates the descriptive columns of the rest in place and drops
+estates that left the MSPO list. pandas and the raster/spatial helpers are only
+imported by the refresh itself.
+
+    cd backend
+    python estate_risk.py             # incremental refresh
+    python estate_risk.py --full      # recompute every estate
+"""
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import metrics
+import queries
+from db import DB_PATH, pool, write_connection
+from migrations import create_tables
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "..", "src", "data")
+STATION_PATH = os.path.join(DATA_DIR, "weather_station_base.csv")
+WIND_PATH = os.getenv("WIND_PATH", os.path.join(DATA_DIR, "MYS_wind-speed_10m.tif"))
+AQUEDUCT_DIR = os.getenv("AQUEDUCT_DIR", os.path.join(DATA_DIR, "aqueduct"))
+AQUEDUCT_HAZARDS = ("cfr", "rfr", "drr")  # coastal flood, riverine flood, drought
+WIND_METHODS = ("nearest", "bilinear")
+# Bump when the computation itself changes so every row is recomputed
+ESTATE_RISK_VERSION = "1"
+
+DESCRIPTIVE_COLUMNS = [
+    "company_name", "parent_company", "entity", "mpobl_license_number", "category",
+    "certified_area", "planted_area", "certified_area_pct",
+]
+RISK_COLUMNS = [
+    "wind_speed_nearest", "wind_risk_nearest", "wind_speed_bilinear", "wind_risk_bilinear",
+] + [f"{hazard}_{suffix}" for hazard in AQUEDUCT_HAZARDS for suffix in ("label", "pct_overlap")]
+COLUMNS = ["estate_key"] + DESCRIPTIVE_COLUMNS + ["latitude", "longitude"] + RISK_COLUMNS + ["inputs_hash"]
+
+_NAME_NOISE = re.compile(r"\b(estate|ladang|sdn|bhd|berhad|plantations?|the)\b|[^a-z0-9]+")
+
+
+@lru_cache(maxsize=1)
+def load_wind_data():
+    from raster import RasterGrid
+
+    print("🌬️ Loading Malaysia wind speed raster (10m height)...")
+
+    try:
+        grid = RasterGrid.from_geotiff(WIND_PATH)
+        print("✅ Wind speed raster loaded.")
+        return grid
+    except Exception as e:
+        print("❌ Failed to load wind raster:", e)
+        return None
+
+
+def classify_wind_risk(speed) -> str:
+    if speed is None or speed != speed:  # NaN
+        return "unknown"
+    elif speed < 5:
+        return "low"
+    elif speed < 10:
+        return "medium"
+    else:
+        return "high"
+
+
+def normalize_name(name) -> str:
+    return _NAME_NOISE.sub(" ", str(name or "").lower()).strip()
+
+
+def aqueduct_paths() -> Dict[str, str]:
+    return {hazard: os.path.join(AQUEDUCT_DIR, f"{hazard}_summary.csv") for hazard in AQUEDUCT_HAZARDS}
+
+
+def inputs_hash() -> str:
+    """Fingerprint of every input file; a change invalidates all stored rows."""
+    digest = hashlib.sha1(ESTATE_RISK_VERSION.encode())
+    for path in [WIND_PATH, *aqueduct_paths().values()]:
+        try:
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        except OSError:
+            digest.update(f"{path}:missing".encode())
+    return digest.hexdigest()
+
+
+def load_estates(conn: sqlite3.Connection) -> "pd.DataFrame":
+    """Active MSPO estates with cleaned areas and a stable `estate_key`."""
+    import numpy as np
+    import pandas as pd
+
+    df = pd.read_sql_query(queries.MSPO_CERTIFIED_ENTITIES, conn)
+
+    for col in ["certified_area", "planted_area"]:
+        df[col] = pd.to_numeric(
+            df[col].replace(["", " ", "-", None, "NA", "N/A"], np.nan),  # type: ignore
+            errors="coerce",
+        )
+    df["certified_area_pct"] = df["certified_area"] / df["planted_area"].replace(0, np.nan) * 100
+    df = df.dropna(subset=["certified_area_pct"]).copy()
+    df["certified_area_pct"] = df["certified_area_pct"].round(2)
+
+    df["estate_key"] = (
+        df["mpobl_license_number"].fillna("").astype(str) + "|"
+        + df["entity"].fillna("").astype(str) + "|"
+        + df["company_name"].fillna("").astype(str)
+    )
+    return df.drop_duplicates(subset="estate_key").reset_index(drop=True)
+
+
+def load_aqueduct() -> Dict[str, "pd.DataFrame"]:
+    """
+    {hazard: frame of (company_key, plantation_key, label, pct_overlap)} with the
+    dominant label per plantation. A plantation made of several GFW polygons gets the
+    label with the highest mean overlap across them.
+    """
+    import pandas as pd
+
+    summaries = {}
+    for hazard, path in aqueduct_paths().items():
+        if not os.path.exists(path):
+            print(f"⚠️ Aqueduct summary missing: {path}")
+            continue
+        df = pd.read_csv(path, index_col=0)
+        label = f"{hazard}_label"
+        df["company_key"] = df["company"].map(normalize_name)
+        df["plantation_key"] = df["plantation"].map(normalize_name)
+
+        polygons = df.groupby(["company_key", "plantation_key"])["gfw_fid"].nunique().rename("polygons")
+        shares = df.groupby(["company_key", "plantation_key", label])["pct_overlap"].sum().reset_index()
+        shares = shares.join(polygons, on=["company_key", "plantation_key"])
+        shares["pct_overlap"] = (shares["pct_overlap"] / shares["polygons"]).round(2)
+        dominant = shares.sort_values("pct_overlap", ascending=False).drop_duplicates(
+            subset=["company_key", "plantation_key"])
+        summaries[hazard] = dominant[["company_key", "plantation_key", label, "pct_overlap"]]
+    return summaries
+
+
+def match_aqueduct(estates: "pd.DataFrame", summary: "pd.DataFrame", hazard: str) -> "pd.DataFrame":
+    """Join one hazard summary on plantation name, using the company only to break ties."""
+    label, pct = f"{hazard}_label", f"{hazard}_pct_overlap"
+    keys = estates[["estate_key"]].assign(
+        plantation_key=estates["entity"].map(normalize_name),
+        company_key=estates["company_name"].map(normalize_name),
+    )
+    keys = keys[keys["plantation_key"] != ""]
+    candidates = keys.merge(summary.rename(columns={"company_key": "aqueduct_company", "pct_overlap": pct}),
+                            on="plantation_key", how="inner")
+    candidates = candidates.assign(same_company=candidates["aqueduct_company"] == candidates["company_key"])
+    ambiguous = candidates.groupby("estate_key")["aqueduct_company"].transform("nunique") > 1
+    # A plantation name shared by several companies only counts when the company matches too
+    matched = candidates[~ambiguous | candidates["same_company"]]
+    matched = matched.sort_values("same_company", ascending=False).drop_duplicates(subset="estate_key")
+    return matched[["estate_key", label, pct]]
+
+
+def compute_risk(estates: "pd.DataFrame") -> "pd.DataFrame":
+    """Add RISK_COLUMNS to a frame of estates (as returned by load_estates)."""
+    import numpy as np
+
+    estates = estates.copy()
+
+    wind_grid = load_wind_data()
+    for method in WIND_METHODS:
+        speed = f"wind_speed_{method}"
+        if wind_grid is None or estates.empty:
+            estates[speed] = np.nan
+        else:
+            with metrics.span("compute", "wind_sample", rows=len(estates), method=method):
+                estates[speed] = wind_grid.sample(estates["latitude"], estates["longitude"], method=method)
+        estates[f"wind_risk_{method}"] = estates[speed].map(classify_wind_risk)
+
+    for hazard, summary in load_aqueduct().items():
+        estates = estates.merge(match_aqueduct(estates, summary, hazard), on="estate_key", how="left")
+    for column in RISK_COLUMNS:
+        if column not in estates:
+            estates[column] = None
+    return estates
+
+
+def stored_estates(conn: sqlite3.Connection) -> Dict[str, tuple]:
+    """{estate_key: (latitude, longitude, inputs_hash, *DESCRIPTIVE_COLUMNS)} as stored."""
+    return {key: tuple(values) for key, *values in conn.execute(queries.ESTATE_RISK_STORED)}
+
+
+def stale_estates(stored: Dict[str, tuple], estates: "pd.DataFrame", fingerprint: str) -> "pd.Series":
+    """Boolean mask of estates that are new, moved, or were computed from other inputs."""
+    import pandas as pd
+
+    return pd.Series(
+        [
+            stored.get(key, ())[:3] != (lat, lon, fingerprint)
+            for key, lat, lon in zip(estates["estate_key"], estates["latitude"], estates["longitude"])
+        ],
+        index=estates.index, dtype=bool,
+    )
+
+
+def _rows(df: "pd.DataFrame", columns: List[str]) -> List[tuple]:
+    # NaN -> NULL, numpy scalars -> Python values
+    frame = df[columns].astype(object).where(df[columns].notna(), None)
+    return list(frame.itertuples(index=False, name=None))
+
+
+def refresh_estate_risk(path: str = DB_PATH, full: bool = False) -> Dict[str, int]:
+    """Bring `estate_risk` in line with the MSPO list. Returns counts for logging."""
+    import pandas as pd
+
+    fingerprint = inputs_hash()
+    with write_connection(path) as conn:
+        create_tables(conn)
+        estates = load_estates(conn)
+        stored = stored_estates(conn)
+    if full:
+        stale = pd.Series(True, index=estates.index)
+    else:
+        stale = stale_estates(stored, estates, fingerprint)
+
+    # Compute outside the write connection so readers aren't held up
+    changed = estates[stale]
+    computed = compute_risk(changed).assign(inputs_hash=fingerprint)
+    # Names and areas can change without moving the estate
+    renamed = [row for row in _rows(estates[~stale], DESCRIPTIVE_COLUMNS + ["estate_key"])
+               if stored[row[-1]][3:] != row[:-1]]
+    removed = set(stored) - set(estates["estate_key"])
+
+    # Every write bumps the data version and with it the ETags of the routes reading it
+    if not len(computed) and not renamed and not removed:
+        print(f"✅ Estate risk up to date: {len(estates)} estates unchanged.")
+        return {"estates": len(estates), "recomputed": 0, "updated": 0, "removed": 0}
+
+    placeholders = ", ".join("?" * len(COLUMNS))
+    updates = ", ".join(f"{c} = excluded.{c}" for c in COLUMNS[1:])
+    descriptive = ", ".join(DESCRIPTIVE_COLUMNS)
+
+    with write_connection(path) as conn:
+        if len(computed):
+            conn.executemany(
+                f"INSERT INTO estate_risk ({', '.join(COLUMNS)}) VALUES ({placeholders}) "
+                f"ON CONFLICT (estate_key) DO UPDATE SET {updates}",
+                _rows(computed, COLUMNS),
+            )
+        if renamed:
+            conn.executemany(
+                f"UPDATE estate_risk SET ({descriptive}) = ({', '.join('?' * len(DESCRIPTIVE_COLUMNS))}) "
+                f"WHERE estate_key = ?",
+                renamed,
+            )
+        if removed:
+            conn.executemany("DELETE FROM estate_risk WHERE estate_key = ?", [(key,) for key in removed])
+
+    print(f"✅ Estate risk refreshed: {len(computed)} recomputed, {len(renamed)} updated, "
+          f"{len(estates) - len(computed) - len(renamed)} unchanged, {len(removed)} removed.")
+    return {"estates": len(estates), "recomputed": len(computed), "updated": len(renamed), "removed": len(removed)}
+
+
+def with_wind_sampling(df: "pd.DataFrame", wind_sampling: str) -> "pd.DataFrame":
+    """Expose one sampling method's columns as `mean_wind_speed_10m` / `wind_risk`."""
+    return df.rename(columns={
+        f"wind_speed_{wind_sampling}": "mean_wind_speed_10m",
+        f"wind_risk_{wind_sampling}": "wind_risk",
+    })
+
+
+def read_estate_risk() -> Optional["pd.DataFrame"]:
+    """Every stored estate, or None when the table hasn't been populated yet."""
+    import pandas as pd
+
+    try:
+        with pool.connection() as conn:
+            df = pd.read_sql_query(queries.ESTATE_RISK, conn)
+    except (sqlite3.OperationalError, pd.errors.DatabaseError) as e:
+        # Table not created yet (migrations disabled and no refresh has run)
+        print("⚠️ Estate risk table unavailable:", e)
+        return None
+    return None if df.empty else df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--full", action="store_true", help="recompute every estate")
+    args = parser.parse_args()
+    refresh_estate_risk(args.db, full=args.full)
+
+
+if __name__ == "__main__":
+    main()
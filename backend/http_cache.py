@@ -0,0 +1,83 @@
+"""
+Conditional GET support keyed on data versions instead of response bodies.
+
+Each versioned route declares which data sources it depends on ("db" for
+bursa_palmai_database.db, or the name of a refreshed upstream loader). The ETag is
+derived from the request URL plus the current version of those sources, so a
+matching If-None-Match is answered with 304 before the route runs a single query.
+"""
+import hashlib
+from typing import Callable, Dict, Optional, Sequence
+
+from starlette.datastructures import Headers
+from starlette.routing import Match, Router
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class ETagMiddleware:
+    def __init__(self, app: ASGIApp, router: Router,
+                 route_sources: Dict[str, Sequence[str]],
+                 version_sources: Dict[str, Callable[[], object]]):
+        self.app = app
+        self.router = router
+        self.route_sources = route_sources
+        self.version_sources = version_sources
+
+    def route_template(self, scope: Scope) -> Optional[str]:
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", None)
+        return None
+
+    def compute_etag(self, scope: Scope, sources: Sequence[str], headers: Headers) -> str:
+        digest = hashlib.sha1()
+        digest.update(scope["path"].encode())
+        digest.update(b"?" + scope.get("query_string", b""))
+        for name in sources:
+            digest.update(f"|{name}={self.version_sources[name]()}".encode())
+        # Compressed and identity bodies are different representations
+        if "gzip" in headers.get("accept-encoding", ""):
+            digest.update(b"|gzip")
+        return f'"{digest.hexdigest()[:32]}"'
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        template = self.route_template(scope)
+        sources = self.route_sources.get(template) if template else None
+        if not sources:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        etag = self.compute_etag(scope, sources, headers)
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match:
+            candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            if etag in candidates or "*" in candidates:
+                await send({
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": [
+                        (b"etag", etag.encode()),
+                        (b"cache-control", b"no-cache"),
+                        (b"vary", b"Accept-Encoding"),
+                    ],
+                })
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+        async def send_with_etag(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                response_headers = list(message.get("headers", []))
+                response_headers += [(b"etag", etag.encode()), (b"cache-control", b"no-cache")]
+                if not any(key.lower() == b"vary" for key, _ in response_headers):
+                    response_headers.append((b"vary", b"Accept-Encoding"))
+                message["headers"] = response_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
@@ -0,0 +1,163 @@
+"""
+Shared HTTP client for the upstream APIs.
+
+One httpx.AsyncClient with pooled keep-alive connections runs on a dedicated event
+loop thread, and the threaded loaders (`upstream_client.get_sync(...)`) share its
+connection pool. Requests time out, transient failures are retried with exponential
+backoff, and concurrent GETs for the same URL are coalesced into a single in-flight
+upstream request. The request runs with the timeout of the caller that started it;
+callers that join it wait at most their own timeout for its result.
+"""
+import asyncio
+import json
+import random
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Dict, List, Optional, Sequence
+
+import httpx
+
+import metrics
+
+HTTP_TIMEOUT = 10.0
+HTTP_CONNECT_TIMEOUT = 5.0
+HTTP_RETRIES = 2
+HTTP_BACKOFF = 0.5  # seconds before the first retry, doubled for each further one
+HTTP_MAX_CONNECTIONS = 20
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+COALESCED = metrics.registry.counter(
+    "bursa_upstream_coalesced_total", "Callers that joined an identical in-flight upstream request.",
+    ("upstream",))
+
+
+class UpstreamError(Exception):
+    pass
+
+
+class UpstreamResponse:
+    """Fully read response; shared by every caller coalesced onto the same request."""
+
+    __slots__ = ("url", "status_code", "content")
+
+    def __init__(self, url: str, status_code: int, content: bytes):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+
+    def json(self) -> Any:
+        # Parsed per caller so coalesced callers never share mutable objects
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise UpstreamError(f"{self.status_code} from {self.url}")
+
+
+class UpstreamClient:
+    def __init__(self, timeout: float = HTTP_TIMEOUT, connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+                 retries: int = HTTP_RETRIES, backoff: float = HTTP_BACKOFF,
+                 max_connections: int = HTTP_MAX_CONNECTIONS):
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_connections = max_connections
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        # Only touched from the client loop, so no lock is needed
+        self._in_flight: Dict[str, "asyncio.Task[UpstreamResponse]"] = {}
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="upstream-http", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                follow_redirects=True,
+            )
+        return self._client
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule a coroutine on the client loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def get_sync(self, url: str, name: str = "upstream", timeout: Optional[float] = None) -> UpstreamResponse:
+        """Coalesced GET for threaded callers such as the refresh loaders."""
+        return self.submit(self._coalesced_get(url, name, timeout)).result()
+
+    def get_many_sync(self, urls: Sequence[str], name: str = "upstream",
+                      timeout: Optional[float] = None) -> List[UpstreamResponse]:
+        """Fetch several URLs concurrently, preserving order."""
+        async def gather():
+            return await asyncio.gather(*(self._coalesced_get(url, name, timeout) for url in urls))
+        return self.submit(gather()).result()
+
+    async def _coalesced_get(self, url: str, name: str, timeout: Optional[float]) -> UpstreamResponse:
+        task = self._in_flight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(url, name, timeout))
+            self._in_flight[url] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(url, None))
+            # One caller giving up must not cancel the request for the others
+            return await asyncio.shield(task)
+
+        COALESCED.inc(upstream=name)
+        # The request in flight has its starter's timeout and retries, so bound the wait by ours
+        wait = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), wait)
+        except asyncio.TimeoutError:
+            raise UpstreamError(f"{url} did not complete within {wait}s") from None
+
+    async def _fetch(self, url: str, name: str, timeout: Optional[float]) -> UpstreamResponse:
+        kwargs = {} if timeout is None else {"timeout": timeout}
+        error: Optional[Exception] = None
+        result: Optional[UpstreamResponse] = None
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1) * (1 + random.random()))
+            with metrics.upstream(name, attempt=attempt) as span:
+                try:
+                    response = await self._http().get(url, **kwargs)
+                except httpx.TransportError as e:
+                    span.attrs["error"] = type(e).__name__
+                    error, result = e, None
+                    continue
+                span.record_response(response)
+            result = UpstreamResponse(url, response.status_code, response.content)
+            if response.status_code not in RETRY_STATUSES:
+                return result
+
+        if result is not None:
+            return result
+        raise UpstreamError(f"{url} failed after {self.retries + 1} attempts: {error}") from error
+
+    def close(self) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result(timeout=5)
+            self._client = None
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=5)
+        loop.close()
+
+
+upstream_client = UpstreamClient()
@@ -0,0 +1,109 @@
+"""
+Index advisor for the queries in queries.py.
+
+Runs EXPLAIN QUERY PLAN for every query the API issues and reports full table scans
+and temporary sort B-trees. With --apply it first runs the idempotent index migration
+from migrations.py, then reports the plans again.
+
+    cd backend
+    python index_advisor.py            # report only
+    python index_advisor.py --apply    # create missing indexes, then report
+"""
+import argparse
+import os
+import sqlite3
+from typing import Dict, List
+
+import queries
+from db import DB_PATH
+from migrations import apply_migrations
+from share_prices import SCHEMA as SHARE_PRICE_SCHEMA, SHARE_PRICE_DB_PATH
+
+# Queries that read a whole (small) table on purpose; SHARE_PRICE_LAST_DATES and
+# ESTATE_RISK_STORED only run in background refresh jobs, and ESTATE_RISK walks the
+# primary key of a table holding one row per served estate. The PEER_* queries cover
+# every company by design and are cached per data version.
+FULL_SCAN_OK = {
+    "COMPANY_STOCK_CODES_ALL", "SHARE_PRICE_LAST_DATES", "ESTATE_RISK", "ESTATE_RISK_STORED",
+    "PEER_PRODUCTION", "PEER_EXTRACTION_RATE", "PEER_PLANTATION_AREA", "PEER_EARNINGS",
+}
+
+# Explained against the share price file (share_prices.py) instead of the main database
+SHARE_PRICE_QUERIES = {"SHARE_PRICE_HISTORY", "SHARE_PRICE_LAST_DATES"}
+
+
+def explain(conn: sqlite3.Connection, sql: str) -> List[str]:
+    # Parameter values don't affect the plan, only their positions
+    params = ("",) * sql.count("?")
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return [row[-1] for row in rows]
+
+
+def find_problems(plan: List[str]) -> List[str]:
+    problems = []
+    for step in plan:
+        # R*Tree lookups show up as "SCAN <table> VIRTUAL TABLE INDEX <constraints>"
+        if step.startswith("SCAN ") and " USING " not in step and " VIRTUAL TABLE INDEX " not in step:
+            problems.append(f"full table scan: {step}")
+        elif "USE TEMP B-TREE FOR ORDER BY" in step:
+            problems.append(f"sort without index: {step}")
+    return problems
+
+
+def open_share_prices(path: str) -> sqlite3.Connection:
+    """The share price file read-only, or just its schema in memory before the first sync."""
+    if os.path.exists(path):
+        return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn = sqlite3.connect(":memory:")
+    conn.execute(SHARE_PRICE_SCHEMA)
+    return conn
+
+
+def advise(path: str = DB_PATH, prices_path: str = SHARE_PRICE_DB_PATH) -> Dict[str, Dict[str, List[str]]]:
+    """Return {query name: {"plan": [...], "problems": [...]}} for every app query."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    prices_conn = open_share_prices(prices_path)
+    report = {}
+    try:
+        for name, sql in queries.app_queries().items():
+            try:
+                plan = explain(prices_conn if name in SHARE_PRICE_QUERIES else conn, sql)
+            except sqlite3.OperationalError as e:
+                report[name] = {"plan": [], "problems": [f"cannot explain: {e}"]}
+                continue
+            problems = [] if name in FULL_SCAN_OK else find_problems(plan)
+            report[name] = {"plan": plan, "problems": problems}
+    finally:
+        conn.close()
+        prices_conn.close()
+    return report
+
+
+def print_report(report: Dict[str, Dict[str, List[str]]]) -> int:
+    flagged = 0
+    for name, result in report.items():
+        status = "⚠️" if result["problems"] else "✅"
+        print(f"{status} {name}")
+        for step in result["plan"]:
+            print(f"     {step}")
+        for problem in result["problems"]:
+            print(f"   -> {problem}")
+        flagged += bool(result["problems"])
+    print(f"\n{flagged} of {len(report)} queries need attention.")
+    return flagged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--prices-db", default=SHARE_PRICE_DB_PATH)
+    parser.add_argument("--apply", action="store_true", help="create missing indexes before reporting")
+    args = parser.parse_args()
+
+    if args.apply:
+        apply_migrations(args.db)
+    print_report(advise(args.db, args.prices_db))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""
+Quarterly report ingestion: PDFs -> company_earnings_data and company_financials_data.
+
+Reports are named `<company>_<ddmmyyyy>.pdf` (e.g. `klk_30062025.pdf` for the quarter
+ended 30 June 2025), where `<company>` matches a company_short_name or one of
+COMPANY_ALIASES (`ioi` files belong to IOICORP); reports of other prefixes are skipped
+with a warning. Each file is hashed first and files whose content was already
+ingested are skipped, so re-running over a folder of hundreds of filings only parses
+the new ones. New reports are parsed in a process pool, one report per core, and
+their revenue, net profit and income-statement flows (the Sankey rows) replace that
+company's rows for the quarter, one transaction per batch of reports. The per-period
+Sankey graphs of the companies touched are rebuilt afterwards.
+
+    cd backend
+    python ingest_reports.py                       # src/data/company-quarterly-pdf
+    python ingest_reports.py path/to/pdfs --workers 8
+    python ingest_reports.py --force               # re-parse files already ingested
+"""
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from db import DB_PATH, write_connection
+from migrations import create_tables
+from sankey import refresh_sankey
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORTS_DIR = os.path.join(BASE_DIR, "..", "src", "data", "company-quarterly-pdf")
+INGEST_BATCH_SIZE = 50
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Report file name prefixes that differ from the company_short_name they belong to
+COMPANY_ALIASES = {"IOI": "IOICORP"}
+
+REPORT_NAME = re.compile(r"^(?P<company>[A-Za-z0-9]+)_(?P<date>\d{8})\.pdf$", re.IGNORECASE)
+STATEMENT_TITLE = re.compile(r"statement of profit or loss", re.IGNORECASE)
+NOTE_REF = re.compile(r"^[A-Z]\d+,?$")
+NUMBER = re.compile(r"^\(?-?[\d,]*\d(?:\.\d+)?\)?$")
+
+# Income statement line item -> pattern for its (lowercased) label; first match wins
+LINE_ITEMS = {
+    "revenue": re.compile(r"^revenue\b"),
+    "operating_expenses": re.compile(r"^operating expenses\b"),
+    "operating_profit": re.compile(r"^(operating profit|profit from operations)\b"),
+    "finance_costs": re.compile(r"^finance costs?\b"),
+    "profit_before_tax": re.compile(r"^profit before tax(ation)?$"),
+    "tax": re.compile(r"^(tax expense|taxation|income tax expense)\b"),
+    "net_profit": re.compile(r"^(net )?profit for the (financial )?period$"),
+}
+
+ParsedReport = Dict[str, object]
+
+
+def content_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_number(token: str) -> Optional[float]:
+    if not NUMBER.match(token):
+        return None
+    negative = token.startswith("(") or token.startswith("-")
+    value = float(token.strip("()-").replace(",", ""))
+    return -value if negative else value
+
+
+def unit_multiplier(text: str) -> float:
+    if re.search(r"RM\s*'?000", text, re.IGNORECASE):
+        return 1e3
+    if re.search(r"RM\s*million", text, re.IGNORECASE):
+        return 1e6
+    return 1.0
+
+
+def statement_lines(text: str) -> Iterator[Tuple[str, Optional[float]]]:
+    """(label, current quarter value) per line; the label is empty when the PDF lost it."""
+    for line in text.splitlines():
+        label: List[str] = []
+        value = None
+        for token in line.split():
+            if NOTE_REF.match(token):
+                continue
+            value = parse_number(token)
+            if value is not None:
+                break
+            label.append(token)
+        if value is not None:
+            yield " ".join(label).strip(" –-:").lower(), value
+
+
+def extract_line_items(text: str) -> Dict[str, float]:
+    lines = list(statement_lines(text))
+    items: Dict[str, float] = {}
+    tax_at = None
+    for i, (label, value) in enumerate(lines):
+        for item, pattern in LINE_ITEMS.items():
+            if item not in items and pattern.match(label):
+                items[item] = value
+                if item == "tax":
+                    tax_at = i
+                break
+
+    # Some PDFs drop the labels of subtotal rows; profit before tax and profit for the
+    # period are the unlabelled rows either side of the tax line
+    if tax_at is not None:
+        if "profit_before_tax" not in items and tax_at > 0 and not lines[tax_at - 1][0]:
+            items["profit_before_tax"] = lines[tax_at - 1][1]
+        if "net_profit" not in items and tax_at + 1 < len(lines) and not lines[tax_at + 1][0]:
+            items["net_profit"] = lines[tax_at + 1][1]
+    tax = abs(items.get("tax", 0.0))
+    if "net_profit" not in items and "profit_before_tax" in items and "tax" in items:
+        items["net_profit"] = items["profit_before_tax"] - tax
+    if "profit_before_tax" not in items and "net_profit" in items and "tax" in items:
+        items["profit_before_tax"] = items["net_profit"] + tax
+    if "operating_profit" not in items and "operating_expenses" in items and "revenue" in items:
+        items["operating_profit"] = items["revenue"] - abs(items["operating_expenses"])
+    return items
+
+
+def balance(flows: List[Tuple[str, str, float]], node: str, inflow: str, outflow: str) -> None:
+    """Add an `inflow` -> node or node -> `outflow` link for whatever the node's links don't explain."""
+    gap = (sum(v for _, target, v in flows if target == node)
+           - sum(v for source, _, v in flows if source == node))
+    if gap < 0:
+        flows.append((inflow, node, -gap))
+    elif gap > 0:
+        flows.append((node, outflow, gap))
+
+
+def flow_imbalances(flows: List[Tuple[str, str, float]], tolerance: float = 0.5) -> Dict[str, float]:
+    """Inflow minus outflow of every intermediate node that is off by more than `tolerance`."""
+    inflow: Dict[str, float] = {}
+    outflow: Dict[str, float] = {}
+    for source, target, value in flows:
+        outflow[source] = outflow.get(source, 0.0) + value
+        inflow[target] = inflow.get(target, 0.0) + value
+    return {
+        node: inflow[node] - outflow[node]
+        for node in inflow.keys() & outflow.keys()
+        if abs(inflow[node] - outflow[node]) > tolerance
+    }
+
+
+def income_flows(items: Dict[str, float]) -> List[Tuple[str, str, float]]:
+    """
+    (source, target, value) Sankey flows from revenue down to net profit. Lines between
+    the extracted ones (other income, share of associates and joint ventures, finance
+    income, discontinued operations) become balancing nodes, so every intermediate
+    node sends out what it receives. Sankey links can't carry losses, so the graph
+    stops at the first stage that is not a profit.
+    """
+    revenue = items.get("revenue")
+    operating_profit = items.get("operating_profit")
+    profit_before_tax = items.get("profit_before_tax")
+    net_profit = items.get("net_profit")
+    flows: List[Tuple[str, str, float]] = []
+    if revenue is None or operating_profit is None or not 0 < operating_profit <= revenue:
+        return flows
+
+    flows.append(("Revenue", "Operating expenses", revenue - operating_profit))
+    flows.append(("Revenue", "Operating profit", operating_profit))
+    if profit_before_tax is None or profit_before_tax <= 0:
+        return [flow for flow in flows if flow[2] > 0]
+
+    if "finance_costs" in items:
+        flows.append(("Operating profit", "Finance costs", abs(items["finance_costs"])))
+    flows.append(("Operating profit", "Profit before tax", profit_before_tax))
+    balance(flows, "Operating profit", "Other income", "Other expenses")
+    if net_profit is None or net_profit <= 0:
+        return [flow for flow in flows if flow[2] > 0]
+
+    if "tax" in items:
+        flows.append(("Profit before tax", "Tax", abs(items["tax"])))
+    flows.append(("Profit before tax", "Net profit", net_profit))
+    balance(flows, "Profit before tax", "Other items", "Other items")
+    return [flow for flow in flows if flow[2] > 0]
+
+
+def parse_report(path: str) -> ParsedReport:
+    """Parse one report; runs in a worker process."""
+    from pypdf import PdfReader
+
+    match = REPORT_NAME.match(os.path.basename(path))
+    if match is None:
+        raise ValueError("file name is not <company>_<ddmmyyyy>.pdf")
+    quarter_end = datetime.strptime(match["date"], "%d%m%Y").date().isoformat()
+
+    reader = PdfReader(path)
+    for page in reader.pages:
+        text = page.extract_text() or ""
+        if STATEMENT_TITLE.search(text) and re.search(r"^\s*revenue\b", text, re.IGNORECASE | re.MULTILINE):
+            break
+    else:
+        raise ValueError("no statement of profit or loss found")
+
+    multiplier = unit_multiplier(text)
+    items = {name: value * multiplier for name, value in extract_line_items(text).items()}
+    if "revenue" not in items or "net_profit" not in items:
+        raise ValueError(f"revenue or net profit missing (found {', '.join(items) or 'nothing'})")
+
+    flows = income_flows(items)
+    imbalances = flow_imbalances(flows, tolerance=multiplier)
+    if imbalances:
+        raise ValueError("unbalanced income flows: " + ", ".join(f"{n} off by {v:,.0f}" for n, v in imbalances.items()))
+
+    return {
+        "company": match["company"],
+        "date": quarter_end,
+        "revenue": items["revenue"],
+        "net_profit": items["net_profit"],
+        "net_profit_margin": round(items["net_profit"] / items["revenue"] * 100, 2) if items["revenue"] else None,
+        "flows": flows,
+    }
+
+
+def report_prefix(file_path: str) -> Optional[str]:
+    match = REPORT_NAME.match(os.path.basename(file_path))
+    return match["company"] if match else None
+
+
+def resolve_company(conn: sqlite3.Connection, prefixes: List[str]) -> Dict[str, str]:
+    """
+    Map file name prefixes to a company_short_name in company_master_table,
+    case-insensitively and through COMPANY_ALIASES. Prefixes matching no company are
+    left out, so their reports are skipped instead of filed under a made-up name.
+    """
+    try:
+        known = [name for (name,) in conn.execute("SELECT company_short_name FROM company_master_table")]
+    except sqlite3.OperationalError:
+        known = []
+    by_upper = {str(name).upper(): name for name in known if name}
+
+    companies = {}
+    for prefix in prefixes:
+        name = COMPANY_ALIASES.get(prefix.upper(), prefix.upper())
+        if name in by_upper:
+            companies[prefix] = by_upper[name]
+        else:
+            print(f"⚠️ No company '{name}' in company_master_table for {prefix}_*.pdf; skipping those reports.")
+    return companies
+
+
+def save_batch(path: str, batch: List[Tuple[str, str, ParsedReport]], companies: Dict[str, str]) -> None:
+    """Replace each report's quarter for its company and record the hashes, in one transaction."""
+    with write_connection(path) as conn:
+        create_tables(conn)
+        for file_path, digest, report in batch:
+            company, quarter = companies[str(report["company"])], report["date"]
+            conn.execute("DELETE FROM company_earnings_data WHERE company_short_name = ? AND date = ?",
+                         (company, quarter))
+            conn.execute("DELETE FROM company_financials_data WHERE company_short_name = ? AND date = ?",
+                         (company, quarter))
+            conn.execute("INSERT INTO company_earnings_data "
+                         "(company_short_name, date, revenue, net_profit, net_profit_margin) VALUES (?, ?, ?, ?, ?)",
+                         (company, quarter, report["revenue"], report["net_profit"], report["net_profit_margin"]))
+            conn.executemany("INSERT INTO company_financials_data "
+                             "(company_short_name, date, source, target, value) VALUES (?, ?, ?, ?, ?)",
+                             [(company, quarter, *flow) for flow in report["flows"]])  # type: ignore[union-attr]
+            conn.execute(
+                "INSERT INTO report_ingestions (content_hash, file_name, company_short_name, date) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT (content_hash) DO UPDATE SET "
+                "file_name = excluded.file_name, company_short_name = excluded.company_short_name, "
+                "date = excluded.date, ingested_at = CURRENT_TIMESTAMP",
+                (digest, os.path.basename(file_path), company, quarter),
+            )
+
+
+def ingest_reports(folder: str = REPORTS_DIR, path: str = DB_PATH, workers: Optional[int] = None,
+                   batch_size: int = INGEST_BATCH_SIZE, force: bool = False) -> Dict[str, int]:
+    """Parse and store every report in `folder` not ingested yet. Returns counts for logging."""
+    files = sorted(
+        os.path.join(folder, name) for name in os.listdir(folder) if name.lower().endswith(".pdf")
+    )
+    with write_connection(path) as conn:
+        create_tables(conn)
+        seen = {digest for (digest,) in conn.execute("SELECT content_hash FROM report_ingestions")}
+        companies = resolve_company(conn, sorted({p for p in map(report_prefix, files) if p is not None}))
+
+    hashes = {file_path: content_hash(file_path) for file_path in files}
+    pending = [f for f in files if force or hashes[f] not in seen]
+    # The same filing saved twice only needs parsing once
+    pending = list({hashes[f]: f for f in reversed(pending)}.values())[::-1]
+    # Not recorded as ingested, so they are picked up once the company is known
+    unknown = [f for f in pending if report_prefix(f) is not None and report_prefix(f) not in companies]
+    pending = [f for f in pending if f not in unknown]
+
+    ingested = failed = 0
+    batch: List[Tuple[str, str, ParsedReport]] = []
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            futures = {pool.submit(parse_report, f): f for f in pending}
+            for future in as_completed(futures):
+                file_path = futures[future]
+                try:
+                    batch.append((file_path, hashes[file_path], future.result()))
+                except Exception as e:
+                    failed += 1
+                    print(f"⚠️ Could not parse {os.path.basename(file_path)}:", e)
+                    continue
+                if len(batch) >= batch_size:
+                    save_batch(path, batch, companies)
+                    ingested += len(batch)
+                    batch = []
+        if batch:
+            save_batch(path, batch, companies)
+            ingested += len(batch)
+
+    skipped = len(files) - len(pending) - len(unknown)
+    print(f"✅ Reports ingested: {ingested} new, {skipped} already ingested, {len(unknown)} unknown company, "
+          f"{failed} failed.")
+    if ingested:
+        refresh_sankey(path)
+    return {"files": len(files), "ingested": ingested, "skipped": skipped, "unknown_company": len(unknown),
+            "failed": failed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", nargs="?", default=REPORTS_DIR)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--workers", type=int, help="parser processes (default: one per core)")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="reports per transaction")
+    parser.add_argument("--force", action="store_true", help="re-parse files already ingested")
+    args = parser.parse_args()
+    ingest_reports(args.folder, args.db, args.workers, args.batch_size, args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,104 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from functools import lru_cache
-from datetime import datetime, timedelta, date
-from bs4 import BeautifulSoup
-from typing import Dict, Any, List
-from geopy.distance import geodesic
-from rasterio import open as rio_open
-from rasterio.warp import transform
-from fastapi.responses import JSONResponse
-import yfinance as yf
-import json
-import sqlite3
 import os
-import pandas as pd
-import psutil, os, time
-import re
-import requests
-import time
-import geopandas as gpd
-import numpy as np
-
-app = FastAPI()
+from contextlib import asynccontextmanager
+from datetime import date
 
+import psutil
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
+
+from company_data import bundle_cache, sankey_cache
+from peers import peers_cache
+from db import data_version
+from share_prices import SHARE_PRICE_DB_PATH
+from http_cache import ETagMiddleware
+from http_client import upstream_client
+import metrics
+from metrics import MetricsMiddleware
+from migrations import apply_migrations
+from refresh import refresher
+from routers import company, geo, market, news
+from trade import network_cache
+
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "1") == "1"
+# Subsystems to load before serving, e.g. APP_WARMUP=geo,news,market
+APP_WARMUP = [name.strip() for name in os.getenv("APP_WARMUP", "").split(",") if name.strip()]
+
+ROUTERS = {"company": company, "market": market, "news": news, "geo": geo}
+
+def warm_up(subsystems):
+    """Import the heavy libraries and prime the loaders of the named routers."""
+    for name in subsystems:
+        if name not in ROUTERS:
+            print(f"⚠️ Unknown warm-up subsystem '{name}'")
+            continue
+        try:
+            ROUTERS[name].warm_up()
+            print(f"✅ Warmed up {name}")
+        except Exception as e:
+            print(f"❌ Warm-up of {name} failed:", e)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Make sure the hot query tables are indexed before serving
+    if DB_AUTO_MIGRATE:
+        try:
+            apply_migrations()
+        except Exception as e:
+            print("❌ Database migration failed:", e)
+
+    warm_up(APP_WARMUP)
+
+    # Keep the upstream loaders fresh in the background; lazy loaders start on first use
+    refresher.start()
+    yield
+    refresher.stop()
+    upstream_client.close()
+
+app = FastAPI(lifespan=lifespan)
+
+# Data sources each cacheable route depends on; see http_cache.ETagMiddleware
+VERSIONED_ROUTES = {
+    "/api/company/{company_short_name}": ("db",),
+    "/api/company/{company_short_name}/dashboard": ("db",),
+    "/api/production/{company_short_name}": ("db",),
+    "/api/extraction/{company_short_name}": ("db",),
+    "/api/plantation-area/{company_short_name}": ("db",),
+    "/api/earnings/{company_short_name}": ("db",),
+    "/api/company/sankey/{company_short_name}": ("db",),
+    "/api/peers": ("db",),
+    "/api/shareprice/{company_short_name}": ("db", "share_prices", "day"),
+    "/api/shareprices": ("db", "share_prices", "day"),
+    "/api/mpob-statistics": ("db", "day"),
+    "/api/raw-material-prices": ("db", "day"),
+    "/api/container-freight-index": ("db", "day"),
+    "/api/trade-data": ("db",),
+    "/api/trade-data/network": ("db",),
+    "/api/news": ("news",),
+    "/api/diesel-prices": ("diesel",),
+    "/api/mspo-certified-entities": ("db", "weather_forecast", "earthquake"),
+    "/api/mspo-entities": ("db",),
+}
+DATA_VERSION_SOURCES = {
+    "db": data_version,
+    # Kept in its own file, so the intraday price sync doesn't invalidate "db"
+    "share_prices": lambda: data_version(SHARE_PRICE_DB_PATH),
+    # Rolling date windows move even when the data doesn't
+    "day": lambda: date.today().isoformat(),
+    "news": lambda: refresher.generation("news"),
+    "diesel": lambda: refresher.generation("diesel"),
+    "weather_forecast": lambda: refresher.generation("weather_forecast"),
+    "earthquake": lambda: refresher.generation("earthquake"),
+}
+
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+app.add_middleware(
+    ETagMiddleware,
+    router=app.router,
+    route_sources=VERSIONED_ROUTES,
+    version_sources=DATA_VERSION_SOURCES,
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -29,16 +106,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "..", "src", "data", "bursa_palmai_database.db")
-DATA_PATH = os.path.join(BASE_DIR, "..", "src", "data", "weather_station_base.csv")
-WIND_PATH = os.path.join(BASE_DIR, "..", "src", "data", "MYS_wind-speed_10m.tif")
-WEATHER_FORECAST_API_URL = "https://api.data.gov.my/weather/forecast"
-EARTHQUAKE_API_URL = "https://api.data.gov.my/weather/warning/earthquake/"
-DIESEL_API_URL = "https://api.data.gov.my/data-catalogue?id=fuelprice&limit=30"
-
-pd.set_option('future.no_silent_downcasting', True)
+# Outermost, so 304s and compressed sizes are what gets measured
+app.add_middleware(MetricsMiddleware, router=app.router)
 
 @app.get("/api/memory")
 def get_memory_usage():
@@ -49,555 +118,30 @@ def get_memory_usage():
         "virtual_memory_mb": round(mem_info.vms / (1024 * 1024), 2)
     }
 
-@app.get("/api/news")
-def get_news():
-    def format_description(text: str) -> str:
-        # Replace "palmoil" with "palm oil"
-        text = re.sub(r'(?i)\bpalmoil\b', 'palm oil', text)
-
-        # Insert a space if words are glued: e.g. "palmOil" -> "palm Oil"
-        text = re.sub(r'(?i)(palm)([A-Z])', r' palm \2', text)
-        text = re.sub(r'(?i)(oil)([A-Z])', r' oil \2', text)
-
-        # Fix missing spaces like "...palmoilexports" -> "...palm oil exports"
-        text = re.sub(r'(?i)(palm)\s?(oil)', r' palm oil', text)
-
-        # Capitalize if "palm" starts a sentence
-        text = re.sub(r'(^|\.\s+)(palm)', lambda m: m.group(1) + "Palm", text, flags=re.IGNORECASE)
-
-        return text
-
-    def contains_relevant_keyword(text):
-        keywords = [
-            "palm oil", "oil palm", "fcpo", "plantation", 
-            "crude palm oil", "cpo", "kernel", "fresh fruit bunch",
-            "palm", "oilpalm", "palmoil"
-        ]
-        text_lower = text.lower()
-        return any(keyword in text_lower for keyword in keywords)
-
-    today_str = date.today().strftime("%Y-%m-%d")
-    offsets = [0, 10, 20, 30]  # Extend as needed
-    data = []
-
-    for offset in offsets:
-        url = f"https://theedgemalaysia.com/news-search-results?keywords=palm%20oil&to={today_str}&from=1999-01-01&language=english&offset={offset}"
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        news_items = soup.find_all('div', class_='NewsList_newsListText__hstO7')
-
-        for item in news_items:
-            a_tag = item.find('a', href=True)
-            headline_tag = item.find('span', class_='NewsList_newsListItemHead__dg7eK')
-            description_tag = item.find('span', class_='NewsList_newsList__2fXyv')
-
-            parent = item.parent
-            date_tag = parent.find('div', class_='NewsList_infoNewsListSubMobile__SPmAG') # type: ignore
-            publish_date = None
-            if date_tag is not None:
-                span = date_tag.find('span')
-                if span is not None:
-                    publish_date = span.get_text(strip=True)
-
-            img_tag = item.find_previous_sibling('div')
-            img_tag = img_tag.find('img', class_='NewsList_newsImage__j_h0a') if img_tag else None
-
-            if a_tag and headline_tag and description_tag:
-                headline = headline_tag.get_text(strip=True)
-
-                if not contains_relevant_keyword(headline):
-                    continue
-
-                link = str(a_tag['href'])
-                if link.startswith('/'):
-                    link = f"https://theedgemalaysia.com{link}"
-
-                description = format_description(description_tag.get_text(strip=True))
-                image_url = img_tag['src'] if img_tag else None
-
-                #sentiment, score = analyze_sentiment(headline)
-
-                data.append({
-                    'headline': headline,
-                    'link': link,
-                    'description': description,
-                    'image_url': image_url,
-                    'published': publish_date,
-                    'sentiment': "Positive"
-                    #'score': round(score, 4)
-                })
-
-    return {"news": data}
-
-@app.get("/api/company/{company_short_name}")
-def get_company(company_short_name: str):
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM company_master_table WHERE company_short_name = ?", (company_short_name.upper(),))
-    row = cur.fetchone()
-    conn.close()
-
-    if row:
-        return {
-            "company_long_name": row[1],
-            "company_stock_code": row[2],
-            "company_board": row[3],
-            "company_description": row[4],
-            "company_website": row[5],
-            "company_rolename": row[6]
-        }
-    return {"error": "Company not found"}
-
-@app.get("/api/shareprice/{company_short_name}")
-def get_company_price_data(company_short_name: str):
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    cur.execute("SELECT company_stock_code FROM company_master_table WHERE company_short_name = ?", (company_short_name.upper(),))
-    row = cur.fetchone()
-    conn.close()
-
-    if not row:
-        return {"error": f"Company '{company_short_name}' not found in database."}
-
-    stock_code = f"{row['company_stock_code']}.KL"
-
-    end = datetime.today()
-    start = end - timedelta(days=30)
-    data = yf.download(stock_code, start=start, end=end)
-
-    if data.empty: #type: ignore
-        return {"error": f"No data found for stock code {stock_code}"}
-
-    if isinstance(data.columns, pd.MultiIndex): #type: ignore
-        data.columns = data.columns.droplevel(1) #type: ignore
-
-    dates = list(data.index.strftime('%Y-%m-%d')) #type: ignore
-    prices = [round(p, 2) for p in data['Close'].tolist()]  # type: ignore
-    return {"dates": dates, "prices": prices}
-
-@app.get("/api/production/{company_short_name}")
-def get_company_production(company_short_name: str):
-    conn = sqlite3.connect(DB_PATH)
-    query = f"""
-        SELECT date, raw_material, volume
-        FROM company_monthly_production
-        WHERE company_short_name = ?
-        AND date >= '2025-01-01'
-        ORDER BY date ASC
-    """
-    df = pd.read_sql_query(query, conn, params=[company_short_name])
-    conn.close()
-    return df.to_dict(orient="records")
-
-@app.get("/api/extraction/{company_short_name}")
-def get_company_extraction_rate(company_short_name: str):
-    conn = sqlite3.connect(DB_PATH)
-    query = """
-        SELECT date, company_short_name, value, category
-        FROM company_extraction_rate
-        WHERE company_short_name = ?
-        ORDER BY date ASC
-    """
-    df = pd.read_sql_query(query, conn, params=[company_short_name])
-    conn.close()
-    return df.to_dict(orient="records")
-
-@app.get("/api/plantation-area/{company_short_name}")
-def get_company_plantation_area(company_short_name: str):
-    conn = sqlite3.connect(DB_PATH)
-    query = """
-        SELECT date, company_short_name, value, category
-        FROM company_plantation_area
-        WHERE company_short_name = ?
-        AND date = "2024"
-    """
-    df = pd.read_sql_query(query, conn, params=[company_short_name])
-    conn.close()
-    return df.to_dict(orient="records")
-
-@app.get("/api/earnings/{company_short_name}")
-def get_company_financials(company_short_name: str):
-    conn = sqlite3.connect(DB_PATH)
-    query = """
-        SELECT company_short_name, date, revenue, net_profit, net_profit_margin
-        FROM company_earnings_data
-        WHERE company_short_name = ?
-        AND date >= "2024-01-01"
-        ORDER BY date ASC
-    """
-    df = pd.read_sql_query(query, conn, params=[company_short_name])
-    conn.close()
-    return df.to_dict(orient="records")
-
-@app.get("/api/company/sankey/{company_short_name}")
-def get_company_sankey(company_short_name: str) -> Dict[str, Any]:
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT date, source, target, value
-        FROM company_financials_data
-        WHERE company_short_name = ?
-        ORDER BY date DESC
-        LIMIT 100
-    """, (company_short_name.upper(),))
-    rows = cur.fetchall()
-    conn.close()
-
-    if not rows:
-        return {"nodes": [], "links": []}
-
-    # Collect unique node names
-    node_names = set()
-    for r in rows:
-        node_names.add(r["source"])
-        node_names.add(r["target"])
-
-    # Create node list
-    node_list = sorted(list(node_names))  # sorted for consistent order
-    node_index = {name: i for i, name in enumerate(node_list)}
-
-    # Build links array
-    links = []
-    for r in rows:
-        source_idx = node_index[r["source"]]
-        target_idx = node_index[r["target"]]
-        links.append({
-            "source": source_idx,
-            "target": target_idx,
-            "value": float(r["value"])  # ensure numeric
-        })
+def process_memory_bytes():
+    mem_info = psutil.Process(os.getpid()).memory_info()
+    return {("rss",): mem_info.rss, ("vms",): mem_info.vms}
 
+def loader_ages():
     return {
-        "nodes": [{"name": name} for name in node_list],
-        "links": links
+        (name,): status["age_seconds"]
+        for name, status in refresher.status().items()
+        if status["age_seconds"] is not None
     }
 
-@app.get("/api/mpob-statistics")
-def get_mpob_statistics():
-    six_months_ago = (datetime.now() - timedelta(days=180)).strftime("%Y-%m-%d")
-    
-    conn = sqlite3.connect(DB_PATH)
-    query = """
-        SELECT date, category, value
-        FROM mpob_stats
-        WHERE date >= ?
-        ORDER BY date ASC
-    """
-    df = pd.read_sql_query(query, conn, params=(six_months_ago,))
-    conn.close()
-    return df.to_dict(orient="records")
-
-@app.get("/api/raw-material-prices")
-def get_raw_material_prices():
-    six_months_ago = (datetime.now() - timedelta(days=720)).strftime("%Y-%m-%d")
-    
-    conn = sqlite3.connect(DB_PATH)
-    query = """
-        SELECT date, category, value
-        FROM commodities_data
-        WHERE date >= ?
-        ORDER BY date ASC
-    """
-    df = pd.read_sql_query(query, conn, params=(six_months_ago,))
-    conn.close()
-    return df.to_dict(orient="records")
-
-@lru_cache(maxsize=1)
-def load_weather_data():
-    print("♻️ Loading and processing weather forecast data...")
-
-    # 1️⃣ Fetch API
-    response = requests.get(WEATHER_FORECAST_API_URL)
-    wfcast_json = response.json()
-    wfcast_df = pd.json_normalize(wfcast_json)
-
-    wfcast_df = wfcast_df[['date', 'summary_forecast', 'min_temp', 'max_temp', 'location.location_name']]
-    wfcast_df.rename(columns={'location.location_name': 'location_name'}, inplace=True)
-    wfcast_df['date'] = pd.to_datetime(wfcast_df['date'])
-    
-
-    def assign_color(summary):
-        text = str(summary).lower().strip()
-
-        if any(word in text for word in ["tiada hujan", "no rain", "cerah", "clear"]):
-            return "green"
-        elif any(word in text for word in ["ribut petir", "thunderstorm"]):
-            return "red"
-        elif any(word in text for word in ["hujan", "rain"]):
-            return "orange"
-        elif any(word in text for word in ["berangin", "windy"]):
-            return "yellow"
-        elif any(word in text for word in ["berjerebu", "hazy", "jerebu"]):
-            return "grey"
-        else:
-            return "grey"
-
-    wfcast_df["color"] = wfcast_df["summary_forecast"].apply(assign_color)
-
-    # 2️⃣ Load station base (local CSV)
-    points_df = pd.read_csv(DATA_PATH)
-
-    # 3️⃣ Merge weather + coordinates
-    weather_df = wfcast_df.merge(points_df, on='location_name', how='left')
-    weather_gdf = gpd.GeoDataFrame(
-        weather_df,
-        geometry=gpd.points_from_xy(weather_df.base_longitude, weather_df.base_latitude),
-        crs="EPSG:4326"
-    )
-
-    # 4️⃣ Prepare distinct station geometry
-    station_points = weather_gdf[['location_name', 'base_longitude', 'base_latitude']].drop_duplicates()
-    station_points['geometry'] = gpd.points_from_xy(
-        station_points['base_longitude'],
-        station_points['base_latitude']
-    )
-    station_gdf = gpd.GeoDataFrame(station_points, geometry='geometry', crs='EPSG:4326')
-
-    print("✅ Weather forecast cached successfully.")
-    return weather_gdf, station_gdf
-
-@lru_cache(maxsize=1)
-def load_wind_data():
-    print("🌬️ Loading Malaysia wind speed raster (10m height)...")
-
-    try:
-        dataset = rio_open(WIND_PATH)
-        print("✅ Wind speed raster loaded.")
-        return dataset
-    except Exception as e:
-        print("❌ Failed to load wind raster:", e)
-        return None
-    
-@lru_cache(maxsize=1)
-def fetch_earthquake_data():
-    """
-    Fetch and cache Malaysia earthquake data for reuse across endpoints.
-    Cached for 1 hour or until server restarts.
-    """
-    print("🌍 Fetching Malaysia earthquake data...")
-    try:
-        resp = requests.get(EARTHQUAKE_API_URL, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-
-        if not data:
-            print("⚠️ No earthquake data returned.")
-            return pd.DataFrame(columns=["lat", "lon", "location", "magdefault"])
-
-        # Sort by 'utcdatetime' to ensure latest comes first
-        df = pd.json_normalize(data)
-        df["utcdatetime"] = pd.to_datetime(df["utcdatetime"], errors="coerce")
-        df = df.sort_values("utcdatetime", ascending=False).head(1)
-
-        df = df[["lat", "lon", "location", "magdefault"]].dropna()
-        print(f"✅ Latest earthquake: {df.iloc[0]['location']} (M{df.iloc[0]['magdefault']})")
-        return df.reset_index(drop=True)
-
-    except Exception as e:
-        print("❌ Failed to fetch earthquake data:", e)
-        return pd.DataFrame(columns=["lat", "lon", "location", "magdefault"])
-    
-def get_wind_speed(lat, lon, dataset):
-    try:
-        if dataset is None:
-            return np.nan
-        # Transform lat/lon to dataset CRS
-        coords = [(lon, lat)]
-        transformed_coords = transform('EPSG:4326', dataset.crs, [lon], [lat])
-        # Read raster value at this location
-        for val in dataset.sample(zip(*transformed_coords)):
-            return float(val[0]) if val[0] != dataset.nodata else np.nan
-    except Exception:
-        return np.nan
-
-@app.get("/api/mspo-certified-entities")
-def get_mspo_certified_entities():
-    print("🔍 Fetching MSPO certified entities...")
-
-    # 1️⃣ Load weather data (cached)
-    weather_gdf, station_gdf = load_weather_data()
-
-    # 2️⃣ Load MSPO entities
-    conn = sqlite3.connect(DB_PATH)
-    mspo_df = pd.read_sql_query("""
-        SELECT
-            "company" AS company_name,
-            "parent_company" AS parent_company,
-            "entity" AS entity,
-            "mpobl_license_number" AS mpobl_license_number,
-            "audit_scope" AS audit_scope,
-            "category" AS category,
-            "latitude" AS latitude,
-            "longitude" AS longitude,
-            "certified_area_ha" AS certified_area,
-            "planted_area_ha" AS planted_area
-        FROM mspo_certified_entities
-        WHERE status = 'ACTIVE'
-            AND category = 'ESTATE'
-            AND (state = "Pahang"
-                 OR state = "Kedah"
-                 OR state = "Perak")
-            AND "latitude" IS NOT NULL
-            AND "longitude" IS NOT NULL
-    """, conn)
-    conn.close()
-
-    # 3️⃣ Clean numeric columns
-    for col in ['certified_area', 'planted_area']:
-        mspo_df[col] = pd.to_numeric(
-            mspo_df[col].replace(['', ' ', '-', None, 'NA', 'N/A'], np.nan), #type: ignore
-            errors='coerce'
-        )
-
-    # 4️⃣ Add percentage safely
-    mspo_df['certified_area_pct'] = (
-        mspo_df['certified_area'] /
-        mspo_df['planted_area'].replace(0, np.nan)
-    ) * 100
-    mspo_df = mspo_df.dropna(subset=['certified_area_pct'])
-    mspo_df['certified_area_pct'] = mspo_df['certified_area_pct'].round(2)
-
-    # 5️⃣ Convert to GeoDataFrame
-    mspo_gdf = gpd.GeoDataFrame(
-        mspo_df,
-        geometry=gpd.points_from_xy(mspo_df.longitude, mspo_df.latitude),
-        crs="EPSG:4326"
-    )
-
-    # 5.1️⃣ Load wind dataset
-    wind_dataset = load_wind_data()
-
-    # 5.2️⃣ Extract wind speed for each plantation
-    mspo_gdf["mean_wind_speed_10m"] = mspo_gdf.apply(
-        lambda row: get_wind_speed(row.latitude, row.longitude, wind_dataset), axis=1
-    )
-
-        # 5.3️⃣ Fetch latest earthquake data
-    eq_df = fetch_earthquake_data()
-
-    # 5.4️⃣ Compute nearest earthquake for each plantation
-    def nearest_earthquake(row):
-        if eq_df.empty:
-            return pd.Series({
-                "earthquake_availability": "no",
-                "earthquake_origin": None,
-                "earthquake_magnitude": None,
-                "earthquake_origin_distance_km": None
-            })
-
-        distances = eq_df.apply(
-            lambda eq: geodesic((row.latitude, row.longitude), (eq.lat, eq.lon)).km,
-            axis=1
-        )
-
-        idx = distances.idxmin()
-        nearest_eq = eq_df.loc[idx]
-        min_dist = distances[idx]
-
-        availability = "Earthquake within 300km radius" if min_dist <= 300 else "No earthquake within 300km radius"
-
-        return pd.Series({
-            "earthquake_availability": availability,
-            "earthquake_origin": nearest_eq["location"],
-            "earthquake_magnitude": nearest_eq["magdefault"],
-            "earthquake_origin_distance_km": round(min_dist, 2)
-        })
-
-    # Apply to all MSPO points
-    mspo_gdf = pd.concat([mspo_gdf, mspo_gdf.apply(nearest_earthquake, axis=1)], axis=1)
-
-    def classify_wind_risk(speed):
-        if pd.isna(speed):
-            return "unknown"
-        elif speed < 5:
-            return "low"
-        elif 5 <= speed < 10:
-            return "medium"
-        else:
-            return "high"
-
-    mspo_gdf["wind_risk"] = mspo_gdf["mean_wind_speed_10m"].apply(classify_wind_risk)
-
-    # 6️⃣ Find nearest station
-    def get_nearest_station(row):
-        plantation_point = (row['latitude'], row['longitude'])
-        distances = station_gdf.apply(
-            lambda x: geodesic(plantation_point, (x.base_latitude, x.base_longitude)).km,
-            axis=1
-        )
-        idx = distances.idxmin()
-        nearest = station_gdf.loc[idx]
-        return pd.Series({
-            'nearest_station': nearest.location_name,
-            'distance_km': round(distances[idx], 2)
-        })
-
-    mspo_gdf[['nearest_station', 'distance_km']] = mspo_gdf.apply(get_nearest_station, axis=1)
-
-    # 7️⃣ Merge weather forecast
-    mspo_forecast = pd.merge(
-        mspo_gdf,
-        weather_gdf,
-        left_on='nearest_station',
-        right_on='location_name',
-        how='left'
-    )
-
-    # 8️⃣ Final cleanup
-    mspo_forecast = mspo_forecast[
-        ['company_name', 'parent_company', 'entity', 'mpobl_license_number', 'category', 'latitude', 'longitude',
-         'certified_area', 'planted_area', 'certified_area_pct',
-         'nearest_station', 'distance_km', 'summary_forecast', 'color',
-         'min_temp', 'max_temp', 'mean_wind_speed_10m', 'wind_risk', 
-         'earthquake_availability', 'earthquake_origin', 'earthquake_magnitude', 'earthquake_origin_distance_km', 'date']
-    ].drop_duplicates()
-
-    # 9️⃣ Return JSON
-    result = mspo_forecast.to_dict(orient="records")
-    print(f"✅ Returned {len(result)} plantation records.")
-    return {"data": result}
-
-@app.get("/api/container-freight-index")
-def get_container_freight_index():
-    six_months_ago = (datetime.now() - timedelta(days=180)).strftime("%Y-%m-%d")
-    
-    conn = sqlite3.connect(DB_PATH)
-    query = """
-        SELECT date, category, value
-        FROM containerized_freight_index
-        WHERE date >= ?
-        ORDER BY date ASC
-    """
-    df = pd.read_sql_query(query, conn, params=(six_months_ago,))
-    conn.close()
-    return df.to_dict(orient="records")
-
-@app.get("/api/diesel-prices")
-def get_diesel_prices():
-    response = requests.get(DIESEL_API_URL)
-    data = response.json()
-    
-    data.sort(key=lambda x: x["date"])
-
-    return data
-
-@app.get("/api/trade-data")
-async def get_trade_data():
-    conn = sqlite3.connect(DB_PATH)
-    query = """
-            SELECT reporterISO, partnerISO, reporterDesc, refMonth, cmdCode, fobvalue
-            FROM trade_data
-            WHERE refMonth = '2024'
-            AND fobvalue >= 10000000
-            AND reporterISO not like 'WORLD'
-            AND partnerISO not like 'WORLD'
-            """
-    dff = pd.read_sql(query, conn)
-    data = dff.to_dict(orient="records")
-    conn.close()
-    
-    return JSONResponse(content=data)
\ No newline at end of file
+metrics.registry.gauge("bursa_process_memory_bytes", "Resident and virtual memory of this worker.",
+                       process_memory_bytes, ("type",))
+metrics.registry.gauge("bursa_loader_age_seconds", "Age of the value in service per refreshed loader.",
+                       loader_ages, ("loader",))
+metrics.registry.gauge("bursa_cache_entries", "Entries held per in-memory cache.",
+                       lambda: {(cache.name,): len(cache) for cache in (
+                           market.quote_cache, bundle_cache, sankey_cache, network_cache, peers_cache)},
+                       ("cache",))
+
+@app.get("/api/metrics")
+def get_metrics():
+    """Prometheus text exposition of route, span, upstream and cache metrics."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+for module in ROUTERS.values():
+    app.include_router(module.router)
@@ -0,0 +1,276 @@
+"""
+In-process metrics exposed in Prometheus text format at /api/metrics.
+
+`MetricsMiddleware` records a latency histogram, status counts and response sizes per
+route template. Inside a request, `span()` times a unit of work (a DB connection, an
+upstream call, a compute step) into a histogram and attaches it to the request trace;
+requests slower than `SLOW_REQUEST_MS` print their span breakdown. Cache hits, misses
+and refreshes are counted by `cache.TTLCache` and `refresh.RefreshScheduler`.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.routing import Match, Router
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))  # 0 disables the slow-request log
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = tuple(float(1024 * 4 ** i) for i in range(9))  # 1 KB .. 64 MB
+
+LabelKey = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._values: Dict[LabelKey, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Metrics plus gauge callbacks that are evaluated at scrape time."""
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+        self._gauges: List[Tuple[str, str, Callable[[], Dict[LabelKey, float]], Tuple[str, ...]]] = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help: str, collect: Callable[[], Dict[LabelKey, float]],
+              labelnames: Sequence[str] = ()) -> None:
+        """Register a gauge whose samples ({label values: value}) are read on every scrape."""
+        self._gauges.append((name, help, collect, tuple(labelnames)))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines += metric.render()
+        for name, help, collect, labelnames in self._gauges:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+            try:
+                samples = collect()
+            except Exception as e:
+                print(f"⚠️ Metrics gauge {name} failed:", e)
+                continue
+            for key, value in sorted(samples.items()):
+                lines.append(f"{name}{_format_labels(labelnames, key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram(
+    "bursa_http_request_duration_seconds", "Request latency by route template.", ("method", "route"))
+REQUESTS = registry.counter(
+    "bursa_http_requests_total", "Requests by route template and status code.", ("method", "route", "status"))
+RESPONSE_BYTES = registry.histogram(
+    "bursa_http_response_size_bytes", "Response body size on the wire by route template.",
+    ("route",), buckets=SIZE_BUCKETS)
+SPAN_SECONDS = registry.histogram(
+    "bursa_span_duration_seconds", "Time spent in timed spans (db, upstream, loader, compute).", ("kind", "name"))
+UPSTREAM_REQUESTS = registry.counter(
+    "bursa_upstream_requests_total", "Outbound upstream calls by outcome.", ("upstream", "status"))
+UPSTREAM_BYTES = registry.counter(
+    "bursa_upstream_response_bytes_total", "Bytes received from upstreams.", ("upstream",))
+CACHE_EVENTS = registry.counter(
+    "bursa_cache_events_total", "Cache hits, misses and refreshes per cache.", ("cache", "event"))
+
+
+class Span:
+    __slots__ = ("kind", "name", "offset", "duration", "attrs")
+
+    def __init__(self, kind: str, name: str, offset: float, attrs: Dict[str, Any]):
+        self.kind = kind
+        self.name = name
+        self.offset = offset
+        self.duration = 0.0
+        self.attrs = attrs
+
+    def record_response(self, response) -> None:
+        """Attach the status and body size of a `requests` response."""
+        self.attrs["status"] = response.status_code
+        self.attrs["bytes"] = len(response.content)
+
+
+class Trace:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans: List[Span] = []
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def span(kind: str, name: str, **attrs: Any) -> Iterator[Span]:
+    """Time the enclosed block and attach it to the current request trace, if any."""
+    trace = _current_trace.get()
+    start = time.perf_counter()
+    current = Span(kind, name, start - trace.start if trace else 0.0, attrs)
+    try:
+        yield current
+    except BaseException as e:
+        current.attrs.setdefault("error", type(e).__name__)
+        raise
+    finally:
+        current.duration = time.perf_counter() - start
+        SPAN_SECONDS.observe(current.duration, kind=kind, name=name)
+        if trace is not None:
+            trace.spans.append(current)
+
+
+@contextmanager
+def upstream(name: str, **attrs: Any) -> Iterator[Span]:
+    """`span` for an outbound call that also counts it by status and received bytes."""
+    with span("upstream", name, **attrs) as current:
+        try:
+            yield current
+        except BaseException as e:
+            current.attrs.setdefault("error", type(e).__name__)
+            raise
+        finally:
+            status = current.attrs.get("status", "error" if "error" in current.attrs else "ok")
+            UPSTREAM_REQUESTS.inc(upstream=name, status=status)
+            if "bytes" in current.attrs:
+                UPSTREAM_BYTES.inc(current.attrs["bytes"], upstream=name)
+
+
+def count_cache(cache: str, event: str) -> None:
+    CACHE_EVENTS.inc(cache=cache, event=event)
+
+
+def log_slow_request(method: str, path: str, status: int, elapsed: float, trace: Trace) -> None:
+    print(f"🐢 Slow request {method} {path} -> {status} in {elapsed * 1000:.1f} ms")
+    for s in sorted(trace.spans, key=lambda s: s.offset):
+        details = " ".join(f"{k}={v}" for k, v in s.attrs.items())
+        print(f"   +{s.offset * 1000:8.1f} ms {s.duration * 1000:8.1f} ms  {s.kind}:{s.name} {details}".rstrip())
+
+
+class MetricsMiddleware:
+    """Per-route latency, status and response size, keyed on the route template."""
+
+    def __init__(self, app: ASGIApp, router: Router, slow_request_ms: float = SLOW_REQUEST_MS):
+        self.app = app
+        self.router = router
+        self.slow_request_ms = slow_request_ms
+
+    def route_template(self, scope: Scope) -> str:
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", "unmatched")
+        # Don't let arbitrary 404 paths create new label values
+        return "unmatched"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace()
+        token = _current_trace.set(trace)
+        status = 500
+        size = 0
+
+        async def send_with_metrics(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            _current_trace.reset(token)
+            elapsed = time.perf_counter() - trace.start
+            route = self.route_template(scope)
+            method = scope["method"]
+            REQUEST_SECONDS.observe(elapsed, method=method, route=route)
+            REQUESTS.inc(method=method, route=route, status=status)
+            RESPONSE_BYTES.observe(size, route=route)
+            if self.slow_request_ms and elapsed * 1000 >= self.slow_request_ms:
+                log_slow_request(method, scope["path"], status, elapsed, trace)
@@ -0,0 +1,241 @@
+"""
+Idempotent schema migrations for bursa_palmai_database.db.
+
+Every step checks what already exists, so `apply_migrations()` is safe to run on
+every startup and from the command line.
+"""
+import sqlite3
+from typing import List
+
+from db import DB_PATH, write_connection
+
+# (table name, DDL) for tables the app writes itself
+TABLES = [
+    ("estate_risk", """
+        CREATE TABLE IF NOT EXISTS estate_risk (
+            estate_key TEXT PRIMARY KEY,
+            company_name TEXT,
+            parent_company TEXT,
+            entity TEXT,
+            mpobl_license_number TEXT,
+            category TEXT,
+            certified_area REAL,
+            planted_area REAL,
+            certified_area_pct REAL,
+            latitude REAL NOT NULL,
+            longitude REAL NOT NULL,
+            wind_speed_nearest REAL,
+            wind_risk_nearest TEXT,
+            wind_speed_bilinear REAL,
+            wind_risk_bilinear TEXT,
+            cfr_label TEXT,
+            cfr_pct_overlap REAL,
+            rfr_label TEXT,
+            rfr_pct_overlap REAL,
+            drr_label TEXT,
+            drr_pct_overlap REAL,
+            inputs_hash TEXT NOT NULL
+        ) WITHOUT ROWID
+    """),
+    ("series_rollups", """
+        CREATE TABLE IF NOT EXISTS series_rollups (
+            source TEXT NOT NULL,
+            resolution TEXT NOT NULL,
+            period TEXT NOT NULL,
+            category TEXT NOT NULL,
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL,
+            mean REAL,
+            points INTEGER NOT NULL,
+            PRIMARY KEY (source, resolution, period, category)
+        ) WITHOUT ROWID
+    """),
+    ("series_rollup_sources", """
+        CREATE TABLE IF NOT EXISTS series_rollup_sources (
+            source TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL
+        ) WITHOUT ROWID
+    """),
+    ("report_ingestions", """
+        CREATE TABLE IF NOT EXISTS report_ingestions (
+            content_hash TEXT PRIMARY KEY,
+            file_name TEXT NOT NULL,
+            company_short_name TEXT NOT NULL,
+            date TEXT NOT NULL,
+            ingested_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+    """),
+    ("company_sankey", """
+        CREATE TABLE IF NOT EXISTS company_sankey (
+            company_short_name TEXT NOT NULL,
+            period TEXT NOT NULL,
+            graph BLOB NOT NULL,
+            PRIMARY KEY (company_short_name, period)
+        ) WITHOUT ROWID
+    """),
+    ("company_sankey_sources", """
+        CREATE TABLE IF NOT EXISTS company_sankey_sources (
+            company_short_name TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL
+        ) WITHOUT ROWID
+    """),
+]
+
+# (index name, table, columns) - composite keys match the WHERE / ORDER BY of the
+# queries in queries.py, with the selected columns appended so the index covers them
+INDEXES = [
+    ("idx_company_master_short_name", "company_master_table", ("company_short_name",)),
+    ("idx_monthly_production_company_date", "company_monthly_production",
+     ("company_short_name", "date", "raw_material", "volume")),
+    ("idx_extraction_rate_company_date", "company_extraction_rate",
+     ("company_short_name", "date", "category", "value")),
+    ("idx_plantation_area_company_date", "company_plantation_area",
+     ("company_short_name", "date", "category", "value")),
+    ("idx_earnings_company_date", "company_earnings_data", ("company_short_name", "date")),
+    ("idx_financials_company_date", "company_financials_data", ("company_short_name", "date")),
+    ("idx_mpob_stats_date_category", "mpob_stats", ("date", "category", "value")),
+    ("idx_commodities_date_category", "commodities_data", ("date", "category", "value")),
+    ("idx_freight_index_date_category", "containerized_freight_index", ("date", "category", "value")),
+    ("idx_trade_data_month_value", "trade_data", ("refMonth", "fobvalue")),
+    ("idx_mspo_status_category_state", "mspo_certified_entities", ("status", "category", "state")),
+]
+
+
+# R*Tree over the coordinates of an externally loaded table, kept in sync by triggers:
+# (rtree name, source table, latitude column, longitude column)
+SPATIAL_INDEXES = [
+    ("mspo_rtree", "mspo_certified_entities", "latitude", "longitude"),
+]
+
+
+def existing_tables(conn: sqlite3.Connection) -> set:
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')").fetchall()
+    return {name for (name,) in rows}
+
+
+def existing_indexes(conn: sqlite3.Connection) -> set:
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()
+    return {name for (name,) in rows}
+
+
+def create_tables(conn: sqlite3.Connection) -> List[str]:
+    """Create any missing tables from TABLES and return the names created."""
+    tables = existing_tables(conn)
+    created = []
+    for name, ddl in TABLES:
+        if name not in tables:
+            conn.execute(ddl)
+            created.append(name)
+    return created
+
+
+def create_indexes(conn: sqlite3.Connection) -> List[str]:
+    """Create any missing indexes from INDEXES and return the names created."""
+    tables = existing_tables(conn)
+    indexes = existing_indexes(conn)
+    created = []
+
+    for name, table, columns in INDEXES:
+        if name in indexes or table not in tables:
+            continue
+        column_list = ", ".join(f'"{c}"' for c in columns)
+        try:
+            conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" ({column_list})')
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ Skipped index {name}: {e}")
+            continue
+        created.append(name)
+
+    if created:
+        # Refresh planner statistics so the new indexes are picked up
+        conn.execute("ANALYZE")
+    return created
+
+
+def spatial_index_stale(conn: sqlite3.Connection, name: str, table: str, lat: str, lon: str,
+                        triggers_present: set) -> bool:
+    if not {f"{name}_insert", f"{name}_update", f"{name}_delete"} <= triggers_present:
+        return True
+    located = f'FROM "{table}" WHERE "{lat}" IS NOT NULL AND "{lon}" IS NOT NULL'
+    (expected,) = conn.execute(f"SELECT COUNT(*) {located}").fetchone()
+    (actual,) = conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()
+    if expected != actual:
+        return True
+    # R*Tree boxes are float32 rounded outwards, so a current point always lies inside its box
+    mismatch = conn.execute(
+        f"""
+        SELECT 1 FROM "{table}" AS t LEFT JOIN {name} AS r ON r.id = t.rowid
+        WHERE t."{lat}" IS NOT NULL AND t."{lon}" IS NOT NULL
+        AND (r.id IS NULL
+             OR CAST(t."{lat}" AS REAL) NOT BETWEEN r.min_lat AND r.max_lat
+             OR CAST(t."{lon}" AS REAL) NOT BETWEEN r.min_lon AND r.max_lon)
+        LIMIT 1
+        """
+    ).fetchone()
+    return mismatch is not None
+
+
+def create_spatial_indexes(conn: sqlite3.Connection) -> List[str]:
+    """
+    Create or rebuild the SPATIAL_INDEXES R*Trees and return the names touched.
+
+    The source tables are loaded outside the app, possibly by dropping and recreating
+    them (which drops the triggers too), so the index is rebuilt from scratch when a
+    trigger is missing or when any located row is absent from the index or outside
+    its box there.
+    """
+    tables = existing_tables(conn)
+    triggers_present = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    touched = []
+
+    for name, table, lat, lon in SPATIAL_INDEXES:
+        if table not in tables:
+            continue
+        located = f'FROM "{table}" WHERE "{lat}" IS NOT NULL AND "{lon}" IS NOT NULL'
+        try:
+            conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING rtree(id, min_lat, max_lat, min_lon, max_lon)")
+        except sqlite3.OperationalError as e:
+            # SQLite built without the R*Tree module
+            print(f"⚠️ Skipped spatial index {name}: {e}")
+            continue
+
+        if spatial_index_stale(conn, name, table, lat, lon, triggers_present):
+            conn.execute(f"DELETE FROM {name}")
+            conn.execute(
+                f'INSERT INTO {name} SELECT rowid, "{lat}", "{lat}", "{lon}", "{lon}" {located}'
+            )
+            touched.append(name)
+
+        point = f'NEW.rowid, NEW."{lat}", NEW."{lat}", NEW."{lon}", NEW."{lon}"'
+        has_point = f'NEW."{lat}" IS NOT NULL AND NEW."{lon}" IS NOT NULL'
+        triggers = [
+            f'''CREATE TRIGGER IF NOT EXISTS {name}_insert AFTER INSERT ON "{table}" WHEN {has_point}
+                BEGIN INSERT OR REPLACE INTO {name} VALUES ({point}); END''',
+            f'''CREATE TRIGGER IF NOT EXISTS {name}_update AFTER UPDATE OF "{lat}", "{lon}" ON "{table}"
+                BEGIN
+                    DELETE FROM {name} WHERE id = OLD.rowid;
+                    INSERT INTO {name} SELECT {point} WHERE {has_point};
+                END''',
+            f'''CREATE TRIGGER IF NOT EXISTS {name}_delete AFTER DELETE ON "{table}"
+                BEGIN DELETE FROM {name} WHERE id = OLD.rowid; END''',
+        ]
+        for trigger in triggers:
+            conn.execute(trigger)
+    return touched
+
+
+def apply_migrations(path: str = DB_PATH) -> List[str]:
+    """Run every migration step against the database at `path`."""
+    with write_connection(path) as conn:
+        tables = create_tables(conn)
+        created = create_indexes(conn)
+        spatial = create_spatial_indexes(conn)
+    if tables:
+        print(f"✅ Created tables: {', '.join(tables)}")
+    if created:
+        print(f"✅ Created indexes: {', '.join(created)}")
+    if spatial:
+        print(f"✅ Rebuilt spatial indexes: {', '.join(spatial)}")
+    return tables + created + spatial
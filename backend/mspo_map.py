@@ -0,0 +1,97 @@
+"""
+Viewport queries over MSPO certified entities for the map.
+
+Estates are looked up through the `mspo_rtree` R*Tree (see migrations.py), so a
+request only touches the rows inside the visible bounding box. Below
+CLUSTER_MAX_ZOOM estates are grouped in SQL on a grid whose cells are roughly
+CLUSTER_CELL_PX screen pixels wide, and each non-empty cell comes back as one
+cluster with its estate count and area sums.
+"""
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import queries
+from db import pool
+
+CLUSTER_MAX_ZOOM = 11  # from this zoom on, individual estates are returned
+CLUSTER_CELL_PX = 64
+TILE_PX = 256
+MAX_VIEWPORT_ESTATES = 5000
+MALAYSIA_BBOX = (99.5, 0.8, 119.5, 7.5)  # min_lon, min_lat, max_lon, max_lat
+
+BBox = Tuple[float, float, float, float]
+
+
+def parse_bbox(bbox: Optional[str]) -> Optional[BBox]:
+    """"min_lon,min_lat,max_lon,max_lat" -> tuple, or None if malformed or not finite."""
+    if not bbox:
+        return MALAYSIA_BBOX
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        return None
+    # nan compares false both ways, so it would slip through the ordering check
+    if not all(math.isfinite(v) for v in (min_lon, min_lat, max_lon, max_lat)):
+        return None
+    if min_lon > max_lon or min_lat > max_lat:
+        return None
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def cell_degrees(zoom: int) -> float:
+    """Grid cell size in degrees of longitude at a web-mercator zoom level."""
+    return 360.0 / (TILE_PX * 2 ** zoom) * CLUSTER_CELL_PX
+
+
+def viewport_params(bbox: BBox, state: Optional[str], category: Optional[str], status: Optional[str]):
+    """Positional parameters for queries._MSPO_VIEWPORT."""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    return (max_lat, min_lat, max_lon, min_lon, state, state, category, category, status, status)
+
+
+def to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch_clusters(params, zoom: int) -> List[Dict[str, Any]]:
+    cell = cell_degrees(zoom)
+    with pool.connection() as conn:
+        rows = conn.execute(queries.MSPO_VIEWPORT_CLUSTERS, (*params, cell, cell)).fetchall()
+    return [
+        {
+            "count": count,
+            "latitude": latitude,
+            "longitude": longitude,
+            "certified_area": round(certified or 0.0, 2),
+            "planted_area": round(planted or 0.0, 2),
+        }
+        for count, latitude, longitude, certified, planted in rows
+    ]
+
+
+def fetch_estates(params, limit: int = MAX_VIEWPORT_ESTATES) -> Tuple[List[Dict[str, Any]], bool]:
+    """Estates in the viewport and whether `limit` cut the list short."""
+    with pool.connection() as conn:
+        cur = conn.execute(queries.MSPO_VIEWPORT_ESTATES, (*params, limit + 1))
+        columns = [d[0] for d in cur.description]
+        rows = cur.fetchall()
+
+    estates = []
+    for row in rows[:limit]:
+        estate = dict(zip(columns, row))
+        estate["certified_area"] = to_float(estate["certified_area"])
+        estate["planted_area"] = to_float(estate["planted_area"])
+        estates.append(estate)
+    return estates, len(rows) > limit
+
+
+def get_viewport(bbox: BBox, zoom: int, state: Optional[str] = None, category: Optional[str] = None,
+                 status: Optional[str] = None) -> Dict[str, Any]:
+    params = viewport_params(bbox, state, category, status)
+    if zoom < CLUSTER_MAX_ZOOM:
+        return {"bbox": bbox, "zoom": zoom, "clustered": True, "clusters": fetch_clusters(params, zoom)}
+    estates, truncated = fetch_estates(params)
+    return {"bbox": bbox, "zoom": zoom, "clustered": False, "estates": estates, "truncated": truncated}
@@ -0,0 +1,115 @@
+"""
+Cross-company peer analytics for /api/peers.
+
+Four set-based queries aggregate production, extraction rates, plantation area and
+earnings for every company at once; pandas joins them and derives yield, growth and
+rank columns column-wise, so the whole table costs four queries instead of four per
+company. Results are cached per data version. pandas is imported on first use.
+"""
+from typing import TYPE_CHECKING, Any, Dict, List
+
+import metrics
+import queries
+from cache import TTLCache
+from db import data_version, pool
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+PEERS_TTL = 60 * 60
+GROWTH_LAG = 4  # quarters; growth is year on year
+
+# Metric -> True when a higher value ranks better
+RANKED_METRICS = {
+    "ffb_ttm": True,
+    "ffb_yield": True,
+    "oer_avg": True,
+    "revenue_ttm": True,
+    "revenue_growth_yoy": True,
+    "net_profit_margin_ttm": True,
+    "margin_change_yoy": True,
+}
+EARNINGS_COLUMNS = [
+    "company_short_name", "earnings_as_of", "revenue_latest", "revenue_ttm", "net_profit_ttm",
+    "net_profit_margin_ttm", "revenue_growth_yoy", "margin_change_yoy",
+]
+
+peers_cache = TTLCache(ttl=PEERS_TTL, maxsize=4, name="peers")
+
+
+def read_frame(conn, query: str) -> "pd.DataFrame":
+    import pandas as pd
+
+    cur = conn.execute(query)
+    return pd.DataFrame.from_records(cur.fetchall(), columns=[d[0] for d in cur.description])
+
+
+def earnings_metrics(earnings: "pd.DataFrame") -> "pd.DataFrame":
+    """TTM revenue, profit and margin plus year-on-year changes, one row per company."""
+    import pandas as pd
+
+    if earnings.empty:
+        # Same columns, no companies, so the ranking below still finds every metric
+        return pd.DataFrame({column: pd.Series(dtype="object" if column in ("company_short_name", "earnings_as_of")
+                                               else "float64") for column in EARNINGS_COLUMNS})
+
+    wide = earnings.pivot_table(index="company_short_name", columns="recent",
+                                values=["revenue", "net_profit", "net_profit_margin"], aggfunc="first")
+    revenue, profit, margin = wide["revenue"], wide["net_profit"], wide["net_profit_margin"]
+    latest_quarters = [q for q in range(1, GROWTH_LAG + 1) if q in revenue.columns]
+    lagged = GROWTH_LAG + 1
+
+    out = pd.DataFrame(index=wide.index)
+    out["earnings_as_of"] = earnings[earnings["recent"] == 1].set_index("company_short_name")["date"]
+    out["revenue_latest"] = revenue.get(1)
+    out["revenue_ttm"] = revenue[latest_quarters].sum(axis=1, min_count=len(latest_quarters))
+    out["net_profit_ttm"] = profit[latest_quarters].sum(axis=1, min_count=len(latest_quarters))
+    out["net_profit_margin_ttm"] = (out["net_profit_ttm"] / out["revenue_ttm"] * 100).round(2)
+    if lagged in revenue.columns:
+        out["revenue_growth_yoy"] = ((revenue[1] / revenue[lagged] - 1) * 100).round(2)
+        out["margin_change_yoy"] = (margin[1] - margin[lagged]).round(2)
+    else:
+        out["revenue_growth_yoy"] = float("nan")
+        out["margin_change_yoy"] = float("nan")
+    return out.reset_index()
+
+
+def build_peers(production, extraction, area, earnings) -> Dict[str, Any]:
+    import numpy as np
+    import pandas as pd
+
+    area = area.assign(planted_area=area["planted_area"].fillna(
+        area[["mature_area", "immature_area"]].sum(axis=1, min_count=1)))
+
+    frames = [production, extraction, area, earnings_metrics(earnings)]
+    peers = frames[0]
+    for frame in frames[1:]:
+        peers = peers.merge(frame, on="company_short_name", how="outer")
+
+    # Trailing-twelve-month FFB per unit of planted area (as reported, tonnes per hectare)
+    peers["production_months"] = peers["production_months"].astype("Int64")
+    peers["ffb_yield"] = (peers["ffb_ttm"] / peers["planted_area"].replace(0, np.nan)).round(2)
+
+    for metric, higher_is_better in RANKED_METRICS.items():
+        values = pd.to_numeric(peers[metric], errors="coerce")
+        peers[f"{metric}_rank"] = values.rank(ascending=not higher_is_better, method="min").astype("Int64")
+        peers[f"{metric}_percentile"] = (values.rank(pct=True, ascending=higher_is_better) * 100).round(1)
+
+    peers = peers.sort_values("company_short_name")
+    records: List[Dict[str, Any]] = peers.astype(object).where(peers.notna(), None).to_dict(orient="records")
+    return {"metrics": list(RANKED_METRICS), "companies": records}
+
+
+def get_peers() -> Dict[str, Any]:
+    key = data_version()
+    peers = peers_cache.get(key)
+    if peers is None:
+        with pool.connection() as conn:
+            frames = [read_frame(conn, query) for query in (
+                queries.PEER_PRODUCTION, queries.PEER_EXTRACTION_RATE,
+                queries.PEER_PLANTATION_AREA, queries.PEER_EARNINGS,
+            )]
+        with metrics.span("compute", "peers"):
+            peers = build_peers(*frames)
+        peers_cache.set(key, peers)
+    return peers
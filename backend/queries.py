@@ -0,0 +1,284 @@
+"""
+SQL issued by the API routes.
+
+Kept in one module so `index_advisor.py` can run EXPLAIN QUERY PLAN over every query
+the app sends to bursa_palmai_database.db (and to the share price file). Queries take positional `?` parameters;
+`{placeholders}` is expanded to one `?` per value at call time.
+"""
+
+COMPANY_PROFILE = "SELECT * FROM company_master_table WHERE company_short_name = ?"
+
+COMPANY_STOCK_CODE = "SELECT company_stock_code FROM company_master_table WHERE company_short_name = ?"
+
+COMPANY_STOCK_CODES_ALL = "SELECT company_short_name, company_stock_code FROM company_master_table"
+
+COMPANY_STOCK_CODES_IN = """
+    SELECT company_short_name, company_stock_code
+    FROM company_master_table
+    WHERE company_short_name IN ({placeholders})
+"""
+
+# Run against the share price file (share_prices.SHARE_PRICE_DB_PATH), not the main database
+SHARE_PRICE_HISTORY = """
+    SELECT stock_code, date, close
+    FROM share_prices
+    WHERE stock_code IN ({placeholders})
+    AND date >= ?
+    ORDER BY stock_code, date ASC
+"""
+
+SHARE_PRICE_LAST_DATES = "SELECT stock_code, MAX(date) FROM share_prices GROUP BY stock_code"
+
+COMPANY_PRODUCTION = """
+    SELECT date, raw_material, volume
+    FROM company_monthly_production
+    WHERE company_short_name = ?
+    AND date >= '2025-01-01'
+    ORDER BY date ASC
+"""
+
+COMPANY_EXTRACTION_RATE = """
+    SELECT date, company_short_name, value, category
+    FROM company_extraction_rate
+    WHERE company_short_name = ?
+    ORDER BY date ASC
+"""
+
+COMPANY_PLANTATION_AREA = """
+    SELECT date, company_short_name, value, category
+    FROM company_plantation_area
+    WHERE company_short_name = ?
+    AND date = "2024"
+"""
+
+COMPANY_EARNINGS = """
+    SELECT company_short_name, date, revenue, net_profit, net_profit_margin
+    FROM company_earnings_data
+    WHERE company_short_name = ?
+    AND date >= "2024-01-01"
+    ORDER BY date ASC
+"""
+
+# Precomputed per period by sankey.refresh_sankey
+COMPANY_SANKEY = """
+    SELECT period, graph
+    FROM company_sankey
+    WHERE company_short_name = ?
+    ORDER BY period ASC
+"""
+
+# Peer analytics: one row per company over every company at once. Trailing windows
+# end at each company's own latest month so late reporters aren't penalised.
+PEER_PRODUCTION = """
+    SELECT
+        p.company_short_name,
+        MAX(p.date) AS production_as_of,
+        COUNT(DISTINCT p.date) AS production_months,
+        SUM(CASE WHEN p.raw_material = 'FFB' THEN p.volume END) AS ffb_ttm,
+        SUM(CASE WHEN p.raw_material = 'CPO' THEN p.volume END) AS cpo_ttm,
+        SUM(CASE WHEN p.raw_material = 'PK' THEN p.volume END) AS pk_ttm
+    FROM company_monthly_production AS p
+    JOIN (
+        SELECT company_short_name, MAX(date) AS last_date
+        FROM company_monthly_production
+        GROUP BY company_short_name
+    ) AS latest ON latest.company_short_name = p.company_short_name
+    WHERE p.date > date(latest.last_date, '-12 months')
+    GROUP BY p.company_short_name
+"""
+
+PEER_EXTRACTION_RATE = """
+    SELECT
+        e.company_short_name,
+        AVG(CASE WHEN e.category = 'OER' THEN e.value END) AS oer_avg,
+        AVG(CASE WHEN e.category = 'KER' THEN e.value END) AS ker_avg
+    FROM company_extraction_rate AS e
+    JOIN (
+        SELECT company_short_name, MAX(date) AS last_date
+        FROM company_extraction_rate
+        GROUP BY company_short_name
+    ) AS latest ON latest.company_short_name = e.company_short_name
+    WHERE e.date > date(latest.last_date, '-12 months')
+    GROUP BY e.company_short_name
+"""
+
+PEER_PLANTATION_AREA = """
+    SELECT
+        a.company_short_name,
+        a.date AS area_as_of,
+        SUM(CASE WHEN a.category = 'Mature' THEN a.value END) AS mature_area,
+        SUM(CASE WHEN a.category = 'Immature' THEN a.value END) AS immature_area,
+        SUM(CASE WHEN a.category = 'Planted' THEN a.value END) AS planted_area
+    FROM company_plantation_area AS a
+    JOIN (
+        SELECT company_short_name, MAX(date) AS last_date
+        FROM company_plantation_area
+        GROUP BY company_short_name
+    ) AS latest ON latest.company_short_name = a.company_short_name AND latest.last_date = a.date
+    GROUP BY a.company_short_name, a.date
+"""
+
+# Last eight quarters per company; `recent` is 1 for the latest quarter
+PEER_EARNINGS = """
+    SELECT company_short_name, recent, date, revenue, net_profit, net_profit_margin
+    FROM (
+        SELECT
+            company_short_name, date, revenue, net_profit, net_profit_margin,
+            ROW_NUMBER() OVER (PARTITION BY company_short_name ORDER BY date DESC) AS recent
+        FROM company_earnings_data
+    )
+    WHERE recent <= 8
+"""
+
+MPOB_STATISTICS = """
+    SELECT date, category, value
+    FROM mpob_stats
+    WHERE date >= ?
+    ORDER BY date ASC
+"""
+
+RAW_MATERIAL_PRICES = """
+    SELECT date, category, value
+    FROM commodities_data
+    WHERE date >= ?
+    ORDER BY date ASC
+"""
+
+CONTAINER_FREIGHT_INDEX = """
+    SELECT date, category, value
+    FROM containerized_freight_index
+    WHERE date >= ?
+    ORDER BY date ASC
+"""
+
+# Weekly / monthly rollups built by series.py; `value` is the period close so rollups
+# are drop-in replacements for the raw series
+SERIES_ROLLUP = """
+    SELECT period AS date, category, close AS value, open, high, low, mean, points
+    FROM series_rollups
+    WHERE source = ? AND resolution = ? AND period >= ?
+    ORDER BY period ASC
+"""
+
+MSPO_CERTIFIED_ENTITIES = """
+    SELECT
+        "company" AS company_name,
+        "parent_company" AS parent_company,
+        "entity" AS entity,
+        "mpobl_license_number" AS mpobl_license_number,
+        "audit_scope" AS audit_scope,
+        "category" AS category,
+        "latitude" AS latitude,
+        "longitude" AS longitude,
+        "certified_area_ha" AS certified_area,
+        "planted_area_ha" AS planted_area
+    FROM mspo_certified_entities
+    WHERE status = 'ACTIVE'
+        AND category = 'ESTATE'
+        AND (state = "Pahang"
+             OR state = "Kedah"
+             OR state = "Perak")
+        AND "latitude" IS NOT NULL
+        AND "longitude" IS NOT NULL
+"""
+
+# Viewport over the mspo_rtree R*Tree; optional filters are NULL to disable them.
+# Parameter order: max_lat, min_lat, max_lon, min_lon, state x2, category x2, status x2
+_MSPO_VIEWPORT = """
+    FROM mspo_rtree AS r
+    JOIN mspo_certified_entities AS m ON m.rowid = r.id
+    WHERE r.min_lat <= ? AND r.max_lat >= ?
+    AND r.min_lon <= ? AND r.max_lon >= ?
+    AND (? IS NULL OR m.state = ?)
+    AND (? IS NULL OR m.category = ?)
+    AND (? IS NULL OR m.status = ?)
+"""
+
+MSPO_VIEWPORT_ESTATES = """
+    SELECT
+        m.company AS company_name,
+        m.parent_company,
+        m.entity,
+        m.mpobl_license_number,
+        m.category,
+        m.state,
+        m.status,
+        m.latitude,
+        m.longitude,
+        m.certified_area_ha AS certified_area,
+        m.planted_area_ha AS planted_area
+""" + _MSPO_VIEWPORT + """
+    LIMIT ?
+"""
+
+# Grid clusters; two more parameters after the filters: cell size in degrees x2
+MSPO_VIEWPORT_CLUSTERS = """
+    SELECT
+        COUNT(*) AS count,
+        AVG(m.latitude) AS latitude,
+        AVG(m.longitude) AS longitude,
+        SUM(CAST(NULLIF(TRIM(m.certified_area_ha), '') AS REAL)) AS certified_area,
+        SUM(CAST(NULLIF(TRIM(m.planted_area_ha), '') AS REAL)) AS planted_area
+""" + _MSPO_VIEWPORT + """
+    GROUP BY CAST((r.min_lat + 90) / ? AS INTEGER), CAST((r.min_lon + 180) / ? AS INTEGER)
+"""
+
+ESTATE_RISK = """
+    SELECT
+        company_name, parent_company, entity, mpobl_license_number, category, latitude, longitude,
+        certified_area, planted_area, certified_area_pct,
+        wind_speed_nearest, wind_risk_nearest, wind_speed_bilinear, wind_risk_bilinear,
+        cfr_label, cfr_pct_overlap, rfr_label, rfr_pct_overlap, drr_label, drr_pct_overlap
+    FROM estate_risk
+    ORDER BY estate_key
+"""
+
+ESTATE_RISK_STORED = """
+    SELECT estate_key, latitude, longitude, inputs_hash,
+        company_name, parent_company, entity, mpobl_license_number, category,
+        certified_area, planted_area, certified_area_pct
+    FROM estate_risk
+"""
+
+# Optional filters are passed as NULL to disable them, so the statement text stays
+# constant and cacheable. Parameter order: year, min_value, cmd_code x2, reporter x2, partner x2
+_TRADE_FILTERS = """
+    WHERE refMonth = ?
+    AND fobvalue >= ?
+    AND reporterISO not like 'WORLD'
+    AND partnerISO not like 'WORLD'
+    AND (? IS NULL OR cmdCode LIKE '%' || ? || '%')
+    AND (? IS NULL OR reporterISO = ?)
+    AND (? IS NULL OR partnerISO = ?)
+"""
+
+TRADE_DATA = """
+    SELECT reporterISO, partnerISO, reporterDesc, refMonth, cmdCode, fobvalue
+    FROM trade_data
+""" + _TRADE_FILTERS
+
+# Directed flows: for imports ("M") the partner is the exporter
+TRADE_FLOWS = """
+    SELECT
+        CASE WHEN reporterDesc = 'M' THEN partnerISO ELSE reporterISO END AS source,
+        CASE WHEN reporterDesc = 'M' THEN reporterISO ELSE partnerISO END AS target,
+        SUM(fobvalue) AS value,
+        COUNT(*) AS records
+    FROM trade_data
+""" + _TRADE_FILTERS + """
+    GROUP BY source, target
+"""
+
+
+def expand(query: str, n_values: int) -> str:
+    """Fill `{placeholders}` with `n_values` positional parameters."""
+    return query.format(placeholders=",".join("?" * n_values))
+
+
+def app_queries():
+    """Every registered query by name, with `{placeholders}` expanded to a single value."""
+    return {
+        name: expand(value, 1) if "{placeholders}" in value else value
+        for name, value in globals().items()
+        if name.isupper() and not name.startswith("_") and isinstance(value, str)
+    }
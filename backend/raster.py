@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+from rasterio import open as rio_open
+from rasterio.warp import transform
+
+
+class RasterGrid:
+    """
+    A single raster band held as a NumPy array plus its georeferencing.
+
+    The band is cached next to the GeoTIFF as a `.npy` sidecar and opened memory-mapped,
+    so every uvicorn worker shares the same OS pages instead of holding its own copy.
+    """
+
+    def __init__(self, values: np.ndarray, affine, crs, nodata):
+        self.values = values
+        self.affine = affine
+        self.crs = crs
+        self.nodata = nodata
+
+    @classmethod
+    def from_geotiff(cls, path: str, band: int = 1) -> "RasterGrid":
+        sidecar = os.path.splitext(path)[0] + ".npy"
+
+        with rio_open(path) as dataset:
+            affine, crs, nodata = dataset.transform, dataset.crs, dataset.nodata
+            stale = (
+                not os.path.exists(sidecar)
+                or os.path.getmtime(sidecar) < os.path.getmtime(path)
+            )
+            if stale:
+                # Write under a per-process name and swap in, so concurrent workers never read a partial file
+                tmp_path = f"{sidecar}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    np.save(f, dataset.read(band))
+                os.replace(tmp_path, sidecar)
+
+        return cls(np.load(sidecar, mmap_mode="r"), affine, crs, nodata)
+
+    def sample(self, latitudes, longitudes, method: str = "nearest") -> np.ndarray:
+        """
+        Sample the band at many WGS84 points in one pass.
+        nodata and out-of-bounds points come back as NaN. `method` is "nearest"
+        (same cell `dataset.sample` reads) or "bilinear".
+        """
+        lat = np.asarray(latitudes, dtype=float)
+        lon = np.asarray(longitudes, dtype=float)
+        if lat.size == 0:
+            return np.empty(0)
+
+        if self.crs is not None and self.crs.to_string() != "EPSG:4326":
+            xs, ys = transform("EPSG:4326", self.crs, lon.tolist(), lat.tolist())
+        else:
+            xs, ys = lon, lat
+        cols, rows = ~self.affine * (np.asarray(xs, dtype=float), np.asarray(ys, dtype=float))
+
+        nearest = self._read_cells(np.floor(rows), np.floor(cols))
+        if method == "nearest":
+            return nearest
+        if method != "bilinear":
+            raise ValueError(f"Unknown sampling method: {method}")
+
+        # Interpolate between the four surrounding pixel centres
+        row_f, col_f = rows - 0.5, cols - 0.5
+        r0, c0 = np.floor(row_f), np.floor(col_f)
+        dr, dc = row_f - r0, col_f - c0
+        top = self._read_cells(r0, c0) * (1 - dc) + self._read_cells(r0, c0 + 1) * dc
+        bottom = self._read_cells(r0 + 1, c0) * (1 - dc) + self._read_cells(r0 + 1, c0 + 1) * dc
+        interpolated = top * (1 - dr) + bottom * dr
+
+        # Fall back to the containing cell next to nodata or the raster edge
+        return np.where(np.isnan(interpolated), nearest, interpolated)
+
+    def _read_cells(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        height, width = self.values.shape
+        valid = (
+            ~np.isnan(rows) & ~np.isnan(cols)
+            & (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+        )
+        out = np.full(rows.shape, np.nan)
+        r = rows[valid].astype(np.intp)
+        c = cols[valid].astype(np.intp)
+        cells = np.asarray(self.values[r, c], dtype=float)
+        if self.nodata is not None:
+            cells[cells == self.nodata] = np.nan
+        out[valid] = cells
+        return out
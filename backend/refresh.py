@@ -0,0 +1,284 @@
+import pickle
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from metrics import count_cache, span
+from snapshots import SnapshotStore, snapshot_store
+
+_MISSING = object()
+
+
+class CachedLoader:
+    """State for one registered loader: the value in service plus its refresh bookkeeping."""
+
+    def __init__(self, name: str, loader: Callable[[], Any], ttl: float,
+                 refresh_ahead: float, retry_after: float, fallback: Any, active: bool,
+                 snapshot_version: Optional[int]):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.retry_after = retry_after
+        self.fallback = fallback
+        self.value: Any = _MISSING
+        self.generation = 0
+        self.loaded_at = 0.0
+        self.next_refresh = 0.0
+        self.refreshing = False
+        self.active = active
+        self.last_error: Optional[str] = None
+        self.snapshot_version = snapshot_version
+        self.fetched_at: Optional[float] = None  # wall clock, comparable across workers
+        self.lock = threading.Lock()
+
+
+class RefreshScheduler:
+    """
+    Stale-while-revalidate cache for upstream loaders.
+
+    Each loader is registered with a TTL. A background thread rebuilds the value
+    `refresh_ahead` seconds before it expires and swaps it in atomically, so requests
+    always read the value in service without waiting. If a rebuild fails the last good
+    value stays in service and the rebuild is retried after `retry_after` seconds.
+    Loaders registered with `lazy=True` are not refreshed until first used (or
+    `activate`d), so a worker only loads the subsystems it actually serves.
+
+    Loaders registered with `snapshot_version` also keep their last good value in the
+    shared snapshot store (see snapshots.py). A worker restores it on start or first
+    use and serves it at once, refreshing in the background if it is past its TTL;
+    before fetching it adopts a fresh snapshot written by another worker, and it only
+    fetches while holding the loader's lease, so workers share one upstream call.
+    """
+
+    def __init__(self, tick: float = 1.0, max_workers: int = 4, store: Optional[SnapshotStore] = None):
+        self.tick = tick
+        self.max_workers = max_workers
+        self.store = store
+        self._entries: Dict[str, CachedLoader] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def register(self, name: str, loader: Callable[[], Any], ttl: float,
+                 refresh_ahead: Optional[float] = None, retry_after: float = 60.0,
+                 fallback: Any = _MISSING, lazy: bool = False,
+                 snapshot_version: Optional[int] = None) -> CachedLoader:
+        if refresh_ahead is None:
+            refresh_ahead = min(ttl * 0.1, 300.0)
+        entry = CachedLoader(name, loader, ttl, refresh_ahead, retry_after, fallback, active=not lazy,
+                             snapshot_version=snapshot_version)
+        self._entries[name] = entry
+        return entry
+
+    def cached(self, name: str, ttl: float, **options) -> Callable:
+        """
+        Decorator form of `register`: the decorated function becomes the loader and
+        calling it returns the value currently in service.
+        """
+        def decorator(loader: Callable[[], Any]) -> Callable[[], Any]:
+            self.register(name, loader, ttl, **options)
+
+            def accessor():
+                return self.get(name)
+
+            accessor.__name__ = loader.__name__
+            accessor.__doc__ = loader.__doc__
+            accessor.refresh = lambda: self.refresh(name)  # type: ignore[attr-defined]
+            return accessor
+        return decorator
+
+    def get(self, name: str) -> Any:
+        entry = self._entries[name]
+        entry.active = True
+        value = entry.value
+        if value is not _MISSING:
+            count_cache(name, "hit")
+            return value
+
+        # Nothing in service yet (cold start before the background load finished)
+        count_cache(name, "miss")
+        with entry.lock:
+            if entry.value is _MISSING:
+                self._restore(entry)
+            if entry.value is _MISSING:
+                self._refresh(entry, raise_errors=entry.fallback is _MISSING)
+        return entry.value
+
+    def activate(self, name: str) -> None:
+        """Start background refreshes of a lazy loader without waiting for a value."""
+        self._entries[name].active = True
+
+    def peek(self, name: str, default: Any = None) -> Any:
+        """Return the value in service without triggering a load."""
+        value = self._entries[name].value
+        return default if value is _MISSING else value
+
+    def refresh(self, name: str) -> None:
+        """Rebuild a value immediately in the calling thread."""
+        entry = self._entries[name]
+        with entry.lock:
+            self._refresh(entry, raise_errors=False)
+
+    def generation(self, name: str) -> int:
+        """Number of successful rebuilds; changes whenever the value in service changes."""
+        return self._entries[name].generation
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        return {
+            name: {
+                "generation": entry.generation,
+                "age_seconds": round(now - entry.loaded_at, 1) if entry.generation else None,
+                "ttl_seconds": entry.ttl,
+                "active": entry.active,
+                "refreshing": entry.refreshing,
+                "last_error": entry.last_error,
+                "fetched_at": entry.fetched_at,
+            }
+            for name, entry in self._entries.items()
+        }
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        # Serve the last snapshots right away; stale ones are refreshed on the first tick
+        for entry in self._entries.values():
+            if entry.value is _MISSING:
+                with entry.lock:
+                    self._restore(entry)
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="refresh")
+        self._thread = threading.Thread(target=self._run, name="refresh-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.tick * 2)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            now = time.monotonic()
+            for entry in list(self._entries.values()):
+                if not entry.active or entry.refreshing or now < entry.next_refresh:
+                    continue
+                entry.refreshing = True
+                assert self._executor is not None
+                self._executor.submit(self._background_refresh, entry)
+            self._stop.wait(self.tick)
+
+    def _background_refresh(self, entry: CachedLoader) -> None:
+        try:
+            with entry.lock:
+                # A request may have loaded it while this task was queued
+                if time.monotonic() >= entry.next_refresh:
+                    self._refresh(entry, raise_errors=False)
+        finally:
+            entry.refreshing = False
+
+    def _snapshots(self, entry: CachedLoader) -> Optional[SnapshotStore]:
+        return self.store if entry.snapshot_version is not None else None
+
+    def _adopt(self, entry: CachedLoader, value: Any, generation: int, fetched_at: float) -> None:
+        """Put a snapshot in service, aged by when it was fetched."""
+        age = max(time.time() - fetched_at, 0.0)
+        entry.value = value
+        # Snapshot generations are shared, so workers serving one snapshot agree on ETags
+        entry.generation = max(generation, entry.generation + 1)
+        entry.fetched_at = fetched_at
+        entry.loaded_at = time.monotonic() - age
+        entry.next_refresh = entry.loaded_at + max(entry.ttl - entry.refresh_ahead, 0.0)
+
+    def _restore(self, entry: CachedLoader) -> bool:
+        store = self._snapshots(entry)
+        if store is None:
+            return False
+        try:
+            snapshot = store.load(entry.name, entry.snapshot_version)
+        except (sqlite3.Error, pickle.UnpicklingError, ValueError, TypeError, AttributeError, ImportError) as e:
+            print(f"⚠️ Could not restore the '{entry.name}' snapshot:", e)
+            return False
+        if snapshot is None:
+            return False
+        count_cache(entry.name, "snapshot_restore")
+        self._adopt(entry, *snapshot)
+        return True
+
+    def _refresh(self, entry: CachedLoader, raise_errors: bool) -> None:
+        store = self._snapshots(entry)
+        if store is None:
+            self._load(entry, raise_errors)
+            return
+
+        try:
+            # Another worker may already have fetched a value fresh enough to serve
+            fetched_at = store.fetched_at(entry.name, entry.snapshot_version)
+            if (fetched_at is not None and fetched_at > (entry.fetched_at or 0.0)
+                    and time.time() - fetched_at < entry.ttl - entry.refresh_ahead
+                    and self._restore(entry)):
+                return
+            leased = store.acquire(entry.name)
+        except sqlite3.Error as e:
+            print(f"⚠️ Snapshot store unavailable for '{entry.name}':", e)
+            self._load(entry, raise_errors)
+            return
+
+        if not leased:
+            if entry.value is not _MISSING:
+                # Another worker is fetching; pick up its snapshot shortly
+                entry.next_refresh = time.monotonic() + min(entry.retry_after, 5.0)
+                return
+            # Nothing to serve meanwhile, so don't wait on it
+            self._load(entry, raise_errors)
+            return
+
+        try:
+            if self._load(entry, raise_errors):
+                try:
+                    entry.generation = max(store.save(entry.name, entry.snapshot_version, entry.value,
+                                                      entry.fetched_at), entry.generation)
+                except (sqlite3.Error, pickle.PicklingError, TypeError, AttributeError) as e:
+                    print(f"⚠️ Could not save the '{entry.name}' snapshot:", e)
+        finally:
+            try:
+                store.release(entry.name)
+            except sqlite3.Error:
+                pass  # the lease expires on its own
+
+    def _load(self, entry: CachedLoader, raise_errors: bool) -> bool:
+        """Call the loader and put its value in service; False if it failed."""
+        started = time.monotonic()
+        try:
+            with span("loader", entry.name):
+                value = entry.loader()
+        except Exception as e:
+            count_cache(entry.name, "refresh_error")
+            entry.last_error = f"{type(e).__name__}: {e}"
+            entry.next_refresh = time.monotonic() + entry.retry_after
+            print(f"❌ Refresh of '{entry.name}' failed, keeping last good value:", e)
+            if entry.value is _MISSING and entry.fallback is not _MISSING:
+                entry.value = entry.fallback
+            if raise_errors:
+                raise
+            return False
+
+        # Single attribute assignment: readers see either the old or the new value
+        count_cache(entry.name, "refresh")
+        entry.value = value
+        entry.generation += 1
+        entry.loaded_at = started
+        entry.fetched_at = time.time()
+        entry.last_error = None
+        entry.next_refresh = started + max(entry.ttl - entry.refresh_ahead, 0.0)
+        return True
+
+
+# Shared by every router that registers an upstream loader
+refresher = RefreshScheduler(store=snapshot_store)
@@ -0,0 +1,5 @@
+"""
+API routes grouped by feature. Each module exposes a FastAPI `router` and a
+`warm_up()` that imports its heavy dependencies ahead of the first request (see
+APP_WARMUP in main.py).
+"""
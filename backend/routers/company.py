@@ -0,0 +1,121 @@
+"""
+Company page routes, served from the cached per-company bundle in company_data, and
+the cross-company peer table from peers. Only the peer table imports pandas.
+"""
+from typing import Any, Dict, Literal, Optional
+
+from fastapi import APIRouter
+
+from columnar import ColumnarResponse, long_to_columnar, wide_to_columnar
+from company_data import get_company_bundle, get_sankey_graphs
+from peers import get_peers
+from refresh import refresher
+from sankey import Graph, build_graph, refresh_sankey, to_records
+
+SANKEY_REFRESH_TTL = 15 * 60
+
+ResponseFormat = Literal["records", "columnar"]
+
+# Per-period Sankey graphs; a refresh only rebuilds companies whose flows changed
+refresher.register("company_sankey", refresh_sankey, ttl=SANKEY_REFRESH_TTL, fallback={}, lazy=True)
+
+router = APIRouter()
+
+
+def warm_up():
+    # Nothing heavy to import; the bundle cache fills per company on first request
+    refresher.activate("company_sankey")
+
+
+def company_sankey_graphs(company_short_name: str) -> Dict[str, Graph]:
+    # Blocks only until the first build in this worker; later refreshes run in the background
+    refresher.get("company_sankey")
+    return get_sankey_graphs(company_short_name)
+
+
+@router.get("/api/company/{company_short_name}")
+def get_company(company_short_name: str):
+    return get_company_bundle(company_short_name).profile or {"error": "Company not found"}
+
+
+@router.get("/api/company/{company_short_name}/dashboard")
+def get_company_dashboard(company_short_name: str):
+    """All company page sections from one consistent, cached read, plus the latest Sankey."""
+    graphs = company_sankey_graphs(company_short_name)
+    latest = next(reversed(graphs), None)
+    return {
+        **get_company_bundle(company_short_name).to_dict(),
+        "sankey": to_records(graphs[latest] if latest else None),
+    }
+
+
+@router.get("/api/production/{company_short_name}")
+def get_company_production(company_short_name: str, format: ResponseFormat = "records"):
+    production = get_company_bundle(company_short_name).production
+    if format == "columnar":
+        return ColumnarResponse(long_to_columnar(production.rows))
+    return production.records()
+
+
+@router.get("/api/extraction/{company_short_name}")
+def get_company_extraction_rate(company_short_name: str):
+    return get_company_bundle(company_short_name).extraction.records()
+
+
+@router.get("/api/plantation-area/{company_short_name}")
+def get_company_plantation_area(company_short_name: str):
+    return get_company_bundle(company_short_name).plantation_area.records()
+
+
+@router.get("/api/earnings/{company_short_name}")
+def get_company_financials(company_short_name: str, format: ResponseFormat = "records"):
+    earnings = get_company_bundle(company_short_name).earnings
+    if format == "columnar":
+        return ColumnarResponse(
+            wide_to_columnar(earnings.columns, earnings.rows, exclude=["company_short_name"])
+        )
+    return earnings.records()
+
+
+@router.get("/api/company/sankey/{company_short_name}")
+def get_company_sankey(company_short_name: str, period: Optional[str] = None, format: ResponseFormat = "records"):
+    """
+    Income statement Sankey for one reporting period (the latest by default) plus the
+    periods available. `period` also takes a comma-separated list or "all", which
+    returns {"periods", "graphs": {period: graph}} for period-over-period comparison.
+    Columnar graphs are a node name list with source/target/value link arrays.
+    """
+    graphs = company_sankey_graphs(company_short_name)
+    periods = list(graphs)
+    if period == "all":
+        requested = periods
+    elif period:
+        requested = [p.strip() for p in period.split(",") if p.strip()]
+    else:
+        requested = periods[-1:]
+
+    missing = [p for p in requested if p not in graphs]
+    if missing:
+        return {"error": f"No Sankey for period {', '.join(missing)}", "periods": periods}
+
+    if format == "columnar":
+        selected: Dict[str, Any] = {p: graphs[p] for p in requested}
+    else:
+        selected = {p: to_records(graphs[p]) for p in requested}
+
+    if period == "all" or len(requested) > 1:
+        content: Dict[str, Any] = {"periods": periods, "graphs": selected}
+    else:
+        single = requested[0] if requested else None
+        if single:
+            graph = selected[single]
+        else:
+            graph = build_graph([]) if format == "columnar" else to_records(None)
+        content = {"period": single, "periods": periods, **graph}
+    return ColumnarResponse(content) if format == "columnar" else content
+
+
+@router.get("/api/peers")
+def get_peer_metrics() -> Dict[str, Any]:
+    """Every company's yield, production, OER and earnings metrics with ranks, in one call."""
+    return get_peers()
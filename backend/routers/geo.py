@@ -0,0 +1,307 @@
+"""
+MSPO risk map: weather forecast, wind raster and earthquake lookups per estate.
+
+Static per-estate risk (wind, nearest station, Aqueduct flood and drought labels) is
+read from the `estate_risk` table kept current by estate_risk.py; the forecast and
+the latest earthquake are joined live. pandas, geopandas, NumPy, rasterio and pyproj
+are imported on first use rather than at startup; `warm_up()` loads them (and the
+forecast, raster and earthquake feed) ahead of the first request.
+"""
+import os
+from functools import lru_cache
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
+
+import metrics
+from columnar import ColumnarResponse
+from db import pool
+from estate_risk import (STATION_PATH, compute_risk, load_estates, load_wind_data, read_estate_risk,
+                         refresh_estate_risk, with_wind_sampling)
+from http_client import upstream_client
+from mspo_map import get_viewport, parse_bbox
+from refresh import refresher
+
+# Upstream endpoints can be pointed at local stand-ins (see benchmarks/fake_upstreams.py)
+WEATHER_FORECAST_API_URL = os.getenv("WEATHER_FORECAST_API_URL", "https://api.data.gov.my/weather/forecast")
+EARTHQUAKE_API_URL = os.getenv("EARTHQUAKE_API_URL", "https://api.data.gov.my/weather/warning/earthquake/")
+WEATHER_REFRESH_TTL = 60 * 60
+EARTHQUAKE_REFRESH_TTL = 60 * 60
+EARTHQUAKE_COLUMNS = ["lat", "lon", "location", "magdefault"]
+ESTATE_RISK_SYNC = os.getenv("ESTATE_RISK_SYNC", "1") == "1"
+ESTATE_RISK_REFRESH_TTL = 6 * 60 * 60
+
+# Keep the estate_risk table current; only estates that moved or are new get recomputed.
+# Lazy, so the raster and spatial stack only load once the risk map is served.
+if ESTATE_RISK_SYNC:
+    refresher.register("estate_risk", refresh_estate_risk, ttl=ESTATE_RISK_REFRESH_TTL,
+                       fallback={}, lazy=True)
+
+router = APIRouter()
+
+
+@lru_cache(maxsize=1)
+def load_pandas():
+    import pandas as pd
+    pd.set_option('future.no_silent_downcasting', True)
+    return pd
+
+
+def warm_up():
+    import geopandas  # noqa: F401
+    load_pandas()
+    load_wind_data()
+    load_weather_data()
+    fetch_earthquake_data()
+    if ESTATE_RISK_SYNC:
+        refresher.activate("estate_risk")
+
+
+@refresher.cached("weather_forecast", ttl=WEATHER_REFRESH_TTL, lazy=True, snapshot_version=1)
+def load_weather_data():
+    import geopandas as gpd
+
+    pd = load_pandas()
+    print("♻️ Loading and processing weather forecast data...")
+
+    # 1️⃣ Fetch API
+    response = upstream_client.get_sync(WEATHER_FORECAST_API_URL, name="weather_forecast", timeout=30)
+    response.raise_for_status()
+    wfcast_json = response.json()
+    wfcast_df = pd.json_normalize(wfcast_json)
+
+    wfcast_df = wfcast_df[['date', 'summary_forecast', 'min_temp', 'max_temp', 'location.location_name']]
+    wfcast_df.rename(columns={'location.location_name': 'location_name'}, inplace=True)
+    wfcast_df['date'] = pd.to_datetime(wfcast_df['date'])
+    
+
+    def assign_color(summary):
+        text = str(summary).lower().strip()
+
+        if any(word in text for word in ["tiada hujan", "no rain", "cerah", "clear"]):
+            return "green"
+        elif any(word in text for word in ["ribut petir", "thunderstorm"]):
+            return "red"
+        elif any(word in text for word in ["hujan", "rain"]):
+            return "orange"
+        elif any(word in text for word in ["berangin", "windy"]):
+            return "yellow"
+        elif any(word in text for word in ["berjerebu", "hazy", "jerebu"]):
+            return "grey"
+        else:
+            return "grey"
+
+    wfcast_df["color"] = wfcast_df["summary_forecast"].apply(assign_color)
+
+    # 2️⃣ Load station base (local CSV)
+    points_df = pd.read_csv(STATION_PATH)
+
+    # 3️⃣ Merge weather + coordinates
+    weather_df = wfcast_df.merge(points_df, on='location_name', how='left')
+    weather_gdf = gpd.GeoDataFrame(
+        weather_df,
+        geometry=gpd.points_from_xy(weather_df.base_longitude, weather_df.base_latitude),
+        crs="EPSG:4326"
+    )
+
+    print("✅ Weather forecast refreshed successfully.")
+    return weather_gdf
+
+
+@refresher.cached("earthquake", ttl=EARTHQUAKE_REFRESH_TTL, fallback=None, lazy=True,
+                  snapshot_version=1)
+def fetch_earthquake_data():
+    """
+    Fetch and cache Malaysia earthquake data for reuse across endpoints.
+    Refreshed in the background every hour; on upstream failure the last good
+    result stays in service (None if there never was one).
+    """
+    pd = load_pandas()
+    print("🌍 Fetching Malaysia earthquake data...")
+    resp = upstream_client.get_sync(EARTHQUAKE_API_URL, name="earthquake")
+    resp.raise_for_status()
+    data = resp.json()
+
+    if not data:
+        print("⚠️ No earthquake data returned.")
+        return pd.DataFrame(columns=EARTHQUAKE_COLUMNS)
+
+    # Sort by 'utcdatetime' to ensure latest comes first
+    df = pd.json_normalize(data)
+    df["utcdatetime"] = pd.to_datetime(df["utcdatetime"], errors="coerce")
+    df = df.sort_values("utcdatetime", ascending=False).head(1)
+
+    df = df[EARTHQUAKE_COLUMNS].dropna()
+    if df.empty:
+        print("⚠️ Latest earthquake record is incomplete.")
+        return pd.DataFrame(columns=EARTHQUAKE_COLUMNS)
+
+    print(f"✅ Latest earthquake: {df.iloc[0]['location']} (M{df.iloc[0]['magdefault']})")
+    return df.reset_index(drop=True)
+
+
+ESTATE_COLUMNS = [
+    'company_name', 'parent_company', 'entity', 'mpobl_license_number', 'category', 'latitude', 'longitude',
+    'certified_area', 'planted_area', 'certified_area_pct', 'nearest_station', 'distance_km',
+    'mean_wind_speed_10m', 'wind_risk', 'earthquake_availability', 'earthquake_origin_distance_km',
+    'cfr_label', 'cfr_pct_overlap', 'rfr_label', 'rfr_pct_overlap', 'drr_label', 'drr_pct_overlap',
+]
+FORECAST_COLUMNS = ['date', 'summary_forecast', 'color', 'min_temp', 'max_temp']
+
+
+def json_records(df):
+    """Rows as dicts with NaN/NaT as None; the flat shape goes through the stdlib JSON encoder."""
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+def normalized_payload(mspo_df, weather_gdf, eq_df):
+    """
+    {"estates": [...], "stations": {name: [forecast days]}, "earthquake": {...}}.
+
+    Each estate appears once instead of once per forecast day; the forecast is listed
+    once per station and the latest earthquake once for the whole response.
+    """
+    estates = mspo_df[ESTATE_COLUMNS].drop_duplicates()
+
+    used = weather_gdf[weather_gdf['location_name'].isin(estates['nearest_station'].dropna().unique())]
+    forecast = used[['location_name'] + FORECAST_COLUMNS].sort_values(['location_name', 'date'])
+    forecast = forecast.assign(date=forecast['date'].dt.strftime('%Y-%m-%d'))
+    stations = {}
+    for name, *day in forecast.itertuples(index=False, name=None):
+        stations.setdefault(name, []).append(dict(zip(FORECAST_COLUMNS, day)))
+
+    earthquake = None
+    if eq_df is not None and not eq_df.empty:
+        latest = eq_df.iloc[0]
+        earthquake = {
+            "origin": latest["location"],
+            "magnitude": float(latest["magdefault"]),
+            "latitude": float(latest["lat"]),
+            "longitude": float(latest["lon"]),
+        }
+
+    with metrics.span("compute", "to_records"):
+        records = estates.to_dict(orient="records")
+    return {"estates": records, "stations": stations, "earthquake": earthquake}
+
+
+def assign_nearest_stations(mspo_df, weather_gdf):
+    """
+    Nearest station per estate among the stations in the current forecast, so every
+    estate is matched to a station that has forecast rows.
+    """
+    import numpy as np
+    from spatial import NearestLocator
+
+    stations = weather_gdf[['location_name', 'base_longitude', 'base_latitude']].drop_duplicates()
+    with metrics.span("compute", "nearest_station", rows=len(mspo_df)):
+        station_index = NearestLocator(stations['base_latitude'], stations['base_longitude'])
+        station_pos, station_dist = station_index.query(mspo_df['latitude'], mspo_df['longitude'])
+    station_names = stations['location_name'].to_numpy()
+    mspo_df['nearest_station'] = np.where(station_pos >= 0, station_names[station_pos], None)
+    mspo_df['distance_km'] = np.round(station_dist, 2)
+    return mspo_df
+
+
+def load_estate_risk(wind_sampling: str):
+    """Per-estate risk from the estate_risk table, computed live until it is populated."""
+    if ESTATE_RISK_SYNC:
+        refresher.activate("estate_risk")
+    estates = read_estate_risk()
+    if estates is None:
+        print("⚠️ Estate risk not precomputed yet; computing live.")
+        with pool.connection() as conn:
+            estates = compute_risk(load_estates(conn))
+    return with_wind_sampling(estates, wind_sampling)
+
+
+@router.get("/api/mspo-certified-entities")
+def get_mspo_certified_entities(
+    wind_sampling: Literal["nearest", "bilinear"] = "nearest",
+    shape: Literal["flat", "normalized"] = "flat",
+):
+    import numpy as np
+    from spatial import NearestLocator
+
+    pd = load_pandas()
+    print("🔍 Fetching MSPO certified entities...")
+
+    # 1️⃣ Load weather data (cached)
+    weather_gdf = load_weather_data()
+
+    # 2️⃣ Load estates with wind and Aqueduct risk (precomputed), then match each to
+    # the nearest station in this forecast
+    mspo_df = assign_nearest_stations(load_estate_risk(wind_sampling), weather_gdf)
+
+    # 3️⃣ Fetch latest earthquake data
+    eq_df = fetch_earthquake_data()
+
+    # 4️⃣ Compute nearest earthquake for all plantations in one pass
+    if eq_df is None or eq_df.empty:
+        mspo_df["earthquake_availability"] = "no"
+        mspo_df["earthquake_origin"] = None
+        mspo_df["earthquake_magnitude"] = None
+        mspo_df["earthquake_origin_distance_km"] = None
+    else:
+        with metrics.span("compute", "nearest_earthquake"):
+            eq_index = NearestLocator(eq_df["lat"].astype(float), eq_df["lon"].astype(float))
+            eq_pos, eq_dist = eq_index.query(mspo_df["latitude"], mspo_df["longitude"])
+        nearest_eq = eq_df.iloc[eq_pos]
+
+        mspo_df["earthquake_availability"] = np.where(
+            eq_dist <= 300, "Earthquake within 300km radius", "No earthquake within 300km radius"
+        )
+        mspo_df["earthquake_origin"] = nearest_eq["location"].to_numpy()
+        mspo_df["earthquake_magnitude"] = nearest_eq["magdefault"].to_numpy()
+        mspo_df["earthquake_origin_distance_km"] = [round(d, 2) for d in eq_dist]
+
+    if shape == "normalized":
+        payload = normalized_payload(mspo_df, weather_gdf, eq_df)
+        print(f"✅ Returned {len(payload['estates'])} plantations across {len(payload['stations'])} stations.")
+        return ColumnarResponse(payload)
+
+    # 5️⃣ Merge weather forecast (flat shape: one row per estate and forecast day)
+    mspo_forecast = pd.merge(
+        mspo_df,
+        weather_gdf,
+        left_on='nearest_station',
+        right_on='location_name',
+        how='left'
+    )
+
+    # 6️⃣ Final cleanup
+    mspo_forecast = mspo_forecast[
+        ['company_name', 'parent_company', 'entity', 'mpobl_license_number', 'category', 'latitude', 'longitude',
+         'certified_area', 'planted_area', 'certified_area_pct',
+         'nearest_station', 'distance_km', 'summary_forecast', 'color',
+         'min_temp', 'max_temp', 'mean_wind_speed_10m', 'wind_risk', 
+         'earthquake_availability', 'earthquake_origin', 'earthquake_magnitude', 'earthquake_origin_distance_km',
+         'cfr_label', 'cfr_pct_overlap', 'rfr_label', 'rfr_pct_overlap', 'drr_label', 'drr_pct_overlap', 'date']
+    ].drop_duplicates()
+
+    # 7️⃣ Return JSON
+    with metrics.span("compute", "to_records"):
+        # Estates without an Aqueduct or forecast match carry NaN, which JSON can't encode
+        result = json_records(mspo_forecast)
+    print(f"✅ Returned {len(result)} plantation records.")
+    return {"data": result}
+
+
+@router.get("/api/mspo-entities")
+def get_mspo_entities(
+    bbox: Optional[str] = None,
+    zoom: int = 8,
+    state: Optional[str] = None,
+    category: Optional[str] = "ESTATE",
+    status: Optional[str] = "ACTIVE",
+):
+    """
+    MSPO entities inside `bbox` ("min_lon,min_lat,max_lon,max_lat", all of Malaysia
+    by default). Below mspo_map.CLUSTER_MAX_ZOOM the estates come back as grid
+    clusters with counts and area sums, otherwise as individual estates.
+    """
+    box = parse_bbox(bbox)
+    if box is None:
+        raise HTTPException(status_code=422, detail="bbox must be finite min_lon,min_lat,max_lon,max_lat")
+    return ORJSONResponse(get_viewport(box, max(0, min(zoom, 22)), state, category, status))
@@ -0,0 +1,245 @@
+"""
+Market data routes: share prices, MPOB statistics, commodity and freight series,
+diesel prices and trade flows. yfinance and pandas are only imported when a share
+price has to be fetched live.
+"""
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, List, Literal, Optional
+
+from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse, StreamingResponse
+
+import metrics
+import queries
+from cache import TTLCache
+from columnar import ColumnarResponse, long_to_columnar
+from db import pool
+from http_client import upstream_client
+from refresh import refresher
+from series import downsample, read_series, refresh_rollups
+from share_prices import close_prices, read_share_prices, sync_share_prices, ticker_for
+from trade import fetch_trade_rows, get_trade_network, iter_trade_ndjson, trade_params
+
+SHARE_PRICE_SYNC = os.getenv("SHARE_PRICE_SYNC", "1") == "1"
+DIESEL_API_URL = os.getenv("DIESEL_API_URL", "https://api.data.gov.my/data-catalogue?id=fuelprice&limit=30")
+SHARE_PRICE_WINDOW_DAYS = 30
+SHARE_PRICE_CACHE_TTL = 15 * 60  # seconds; quotes move slowly enough during market hours
+SHARE_PRICE_SYNC_TTL = 15 * 60
+SHARE_PRICE_WINDOWS = {"1M": SHARE_PRICE_WINDOW_DAYS, "3M": 91, "6M": 182, "1Y": 365, "5Y": 5 * 365}
+DIESEL_REFRESH_TTL = 60 * 60  # fuel prices are set weekly
+TRADE_DEFAULT_YEAR = "2024"
+TRADE_DEFAULT_MIN_VALUE = 10_000_000
+
+SERIES_WINDOWS = {"6M": 182, "1Y": 365, "2Y": 730, "5Y": 5 * 365, "10Y": 10 * 365}
+SERIES_ROLLUP_TTL = 15 * 60
+MIN_SERIES_POINTS = 3
+
+ResponseFormat = Literal["records", "columnar"]
+SeriesResolution = Literal["raw", "weekly", "monthly"]
+SeriesWindow = Literal["6M", "1Y", "2Y", "5Y", "10Y"]
+ShareWindow = Literal["1M", "3M", "6M", "1Y", "5Y"]
+
+quote_cache = TTLCache(ttl=SHARE_PRICE_CACHE_TTL, name="share_prices")
+
+# Keep the local price history current; routes read it instead of calling Yahoo.
+# Lazy, so the sync (and yfinance) only starts once share prices are served.
+if SHARE_PRICE_SYNC:
+    refresher.register("share_price_sync", sync_share_prices, ttl=SHARE_PRICE_SYNC_TTL,
+                       fallback={}, lazy=True)
+
+# Weekly/monthly rollups of the MPOB, commodity and freight series; a refresh only
+# rebuilds sources whose data changed since the last one
+refresher.register("series_rollups", refresh_rollups, ttl=SERIES_ROLLUP_TTL, fallback={}, lazy=True)
+
+router = APIRouter()
+
+
+def warm_up():
+    import pandas  # noqa: F401
+    import yfinance  # noqa: F401
+    if SHARE_PRICE_SYNC:
+        refresher.activate("share_price_sync")
+
+
+def download_share_prices(tickers: List[str], days: int = SHARE_PRICE_WINDOW_DAYS) -> Dict[str, Dict[str, list]]:
+    """
+    Return {ticker: {"dates": [...], "prices": [...]}} for the trailing `days` window.
+    Tickers already in `quote_cache` are served from memory; the rest are pulled
+    from Yahoo Finance with a single multi-ticker download.
+    """
+    hits, missing = quote_cache.get_many((ticker, days) for ticker in tickers)
+    results = {ticker: value for (ticker, _), value in hits.items()}
+    missing_tickers = [ticker for ticker, _ in missing]
+
+    if missing_tickers:
+        import yfinance as yf
+
+        end = datetime.today()
+        start = end - timedelta(days=days)
+        with metrics.upstream("yahoo_finance", tickers=len(missing_tickers)):
+            data = yf.download(missing_tickers, start=start, end=end, progress=False)
+
+        close = close_prices(data, missing_tickers)
+        if not close.empty:
+            for ticker in missing_tickers:
+                if ticker not in close.columns:
+                    continue
+                series = close[ticker].dropna()
+                if series.empty:
+                    continue
+                quote = {
+                    "dates": list(series.index.strftime('%Y-%m-%d')),
+                    "prices": [round(p, 2) for p in series.tolist()]
+                }
+                quote_cache.set((ticker, days), quote)
+                results[ticker] = quote
+
+    return results
+
+
+def get_share_price_history(stock_codes: List[str], days: int) -> Dict[str, Dict[str, list]]:
+    """
+    {stock_code: quote} from the local price history. Stock codes the sync job hasn't
+    stored yet (e.g. on a fresh database) fall back to a live download.
+    """
+    if SHARE_PRICE_SYNC:
+        refresher.activate("share_price_sync")
+    results = read_share_prices(stock_codes, days)
+    missing = [code for code in stock_codes if code not in results]
+    if missing:
+        live = download_share_prices([ticker_for(code) for code in missing], days)
+        results.update({code: live[ticker_for(code)] for code in missing if ticker_for(code) in live})
+    return results
+
+
+@router.get("/api/shareprice/{company_short_name}")
+def get_company_price_data(company_short_name: str, window: ShareWindow = "1M"):
+    with pool.connection() as conn:
+        cur = conn.cursor()
+        cur.row_factory = sqlite3.Row
+        cur.execute(queries.COMPANY_STOCK_CODE, (company_short_name.upper(),))
+        row = cur.fetchone()
+
+    if not row:
+        return {"error": f"Company '{company_short_name}' not found in database."}
+
+    stock_code = str(row['company_stock_code'])
+    quote = get_share_price_history([stock_code], SHARE_PRICE_WINDOWS[window]).get(stock_code)
+
+    if quote is None:
+        return {"error": f"No data found for stock code {ticker_for(stock_code)}"}
+
+    return quote
+
+
+@router.get("/api/shareprices")
+def get_share_prices(codes: str = "all", window: ShareWindow = "1M"):
+    """
+    Batch share prices keyed by company short name.
+    `codes` is a comma separated list of short names (e.g. GENP,KLK) or "all";
+    `window` is the trailing period served from the local price history.
+    """
+    if codes.strip().lower() == "all":
+        requested = None
+        query = queries.COMPANY_STOCK_CODES_ALL
+        params = []
+    else:
+        requested = [c.strip().upper() for c in codes.split(",") if c.strip()]
+        if not requested:
+            return {"data": {}, "missing": []}
+        query = queries.expand(queries.COMPANY_STOCK_CODES_IN, len(requested))
+        params = requested
+
+    with pool.connection() as conn:
+        rows = conn.execute(query, params).fetchall()
+
+    stock_codes = {short: str(stock_code) for short, stock_code in rows if stock_code}
+    quotes = get_share_price_history(sorted(set(stock_codes.values())), SHARE_PRICE_WINDOWS[window])
+
+    data = {short: quotes[code] for short, code in stock_codes.items() if code in quotes}
+    missing = sorted(set(requested if requested is not None else stock_codes) - set(data))
+    return {"data": data, "missing": missing}
+
+
+def series_response(source: str, default_days: int, window: Optional[SeriesWindow],
+                    resolution: SeriesResolution, max_points: Optional[int], format: ResponseFormat):
+    """
+    A (date, category, value) series, optionally from the weekly/monthly rollups and
+    LTTB-downsampled to `max_points` per category. Columnar responses skip pandas.
+    """
+    days = SERIES_WINDOWS[window] if window else default_days
+    since = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+    if resolution != "raw":
+        # Blocks only until the first build in this worker; later refreshes run in the background
+        refresher.get("series_rollups")
+    columns, rows = read_series(source, since, resolution)
+    if max_points:
+        rows = downsample(rows, max(max_points, MIN_SERIES_POINTS))
+    if format == "columnar":
+        return ColumnarResponse(long_to_columnar(row[:3] for row in rows))
+    return [dict(zip(columns, row)) for row in rows]
+
+
+@router.get("/api/mpob-statistics")
+def get_mpob_statistics(format: ResponseFormat = "records", window: Optional[SeriesWindow] = None,
+                        resolution: SeriesResolution = "raw", max_points: Optional[int] = None):
+    return series_response("mpob", 180, window, resolution, max_points, format)
+
+
+@router.get("/api/raw-material-prices")
+def get_raw_material_prices(format: ResponseFormat = "records", window: Optional[SeriesWindow] = None,
+                            resolution: SeriesResolution = "raw", max_points: Optional[int] = None):
+    return series_response("commodities", 720, window, resolution, max_points, format)
+
+
+@router.get("/api/container-freight-index")
+def get_container_freight_index(format: ResponseFormat = "records", window: Optional[SeriesWindow] = None,
+                                resolution: SeriesResolution = "raw", max_points: Optional[int] = None):
+    return series_response("freight", 180, window, resolution, max_points, format)
+
+
+@refresher.cached("diesel", ttl=DIESEL_REFRESH_TTL, lazy=True, snapshot_version=1)
+def load_diesel_prices():
+    response = upstream_client.get_sync(DIESEL_API_URL, name="diesel")
+    response.raise_for_status()
+    data = response.json()
+    data.sort(key=lambda x: x["date"])
+    return data
+
+
+@router.get("/api/diesel-prices")
+def get_diesel_prices():
+    return load_diesel_prices()
+
+
+@router.get("/api/trade-data")
+def get_trade_data(
+    year: str = TRADE_DEFAULT_YEAR,
+    cmd_code: Optional[str] = None,
+    reporter: Optional[str] = None,
+    partner: Optional[str] = None,
+    min_value: float = TRADE_DEFAULT_MIN_VALUE,
+    format: Literal["json", "ndjson"] = "json",
+):
+    """
+    Raw trade rows. Runs in the threadpool; `format=ndjson` streams large exports
+    row by row instead of building the whole list in memory.
+    """
+    params = trade_params(year, min_value, cmd_code, reporter, partner)
+    if format == "ndjson":
+        return StreamingResponse(iter_trade_ndjson(params), media_type="application/x-ndjson")
+    return ORJSONResponse(fetch_trade_rows(params))
+
+
+@router.get("/api/trade-data/network")
+def get_trade_network_data(
+    year: str = TRADE_DEFAULT_YEAR,
+    cmd_code: Optional[str] = None,
+    reporter: Optional[str] = None,
+    partner: Optional[str] = None,
+    min_value: float = TRADE_DEFAULT_MIN_VALUE,
+):
+    """Pre-aggregated node/edge graph of total flows per country pair."""
+    return get_trade_network(trade_params(year, min_value, cmd_code, reporter, partner))
@@ -0,0 +1,163 @@
+"""
+Palm oil headlines scraped from The Edge Malaysia.
+
+BeautifulSoup is imported on first parse, so workers that never serve /api/news
+don't pay for it.
+"""
+import os
+import re
+from datetime import date
+from typing import List
+
+from fastapi import APIRouter
+
+import metrics
+from http_client import upstream_client
+from refresh import refresher
+
+# Upstream endpoints can be pointed at local stand-ins (see benchmarks/fake_upstreams.py)
+NEWS_BASE_URL = os.getenv("NEWS_BASE_URL", "https://theedgemalaysia.com")
+NEWS_SEARCH_URL = NEWS_BASE_URL + "/news-search-results?keywords=palm%20oil&to={today}&from=1999-01-01&language=english&offset={offset}"
+NEWS_PAGE_OFFSETS = [0, 10, 20, 30]  # Extend as needed
+NEWS_MAX_ARTICLES = 40
+NEWS_REQUEST_TIMEOUT = 10
+NEWS_REFRESH_TTL = 15 * 60
+
+router = APIRouter()
+
+
+def warm_up():
+    from bs4 import BeautifulSoup  # noqa: F401
+    load_news()
+
+
+def format_description(text: str) -> str:
+    # Replace "palmoil" with "palm oil"
+    text = re.sub(r'(?i)\bpalmoil\b', 'palm oil', text)
+
+    # Insert a space if words are glued: e.g. "palmOil" -> "palm Oil"
+    text = re.sub(r'(?i)(palm)([A-Z])', r' palm \2', text)
+    text = re.sub(r'(?i)(oil)([A-Z])', r' oil \2', text)
+
+    # Fix missing spaces like "...palmoilexports" -> "...palm oil exports"
+    text = re.sub(r'(?i)(palm)\s?(oil)', r' palm oil', text)
+
+    # Capitalize if "palm" starts a sentence
+    text = re.sub(r'(^|\.\s+)(palm)', lambda m: m.group(1) + "Palm", text, flags=re.IGNORECASE)
+
+    return text
+
+
+def contains_relevant_keyword(text):
+    keywords = [
+        "palm oil", "oil palm", "fcpo", "plantation", 
+        "crude palm oil", "cpo", "kernel", "fresh fruit bunch",
+        "palm", "oilpalm", "palmoil"
+    ]
+    text_lower = text.lower()
+    return any(keyword in text_lower for keyword in keywords)
+
+
+def parse_news_page(content: bytes):
+    """Parse one search results page into (relevant articles, every article link on the page)."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, 'lxml')
+    news_items = soup.find_all('div', class_='NewsList_newsListText__hstO7')
+    articles = []
+    page_links = set()
+
+    for item in news_items:
+        a_tag = item.find('a', href=True)
+        headline_tag = item.find('span', class_='NewsList_newsListItemHead__dg7eK')
+        description_tag = item.find('span', class_='NewsList_newsList__2fXyv')
+
+        parent = item.parent
+        date_tag = parent.find('div', class_='NewsList_infoNewsListSubMobile__SPmAG') # type: ignore
+        publish_date = None
+        if date_tag is not None:
+            span = date_tag.find('span')
+            if span is not None:
+                publish_date = span.get_text(strip=True)
+
+        img_tag = item.find_previous_sibling('div')
+        img_tag = img_tag.find('img', class_='NewsList_newsImage__j_h0a') if img_tag else None
+
+        if a_tag and headline_tag and description_tag:
+            link = str(a_tag['href'])
+            if link.startswith('/'):
+                link = f"{NEWS_BASE_URL}{link}"
+            page_links.add(link)
+
+            headline = headline_tag.get_text(strip=True)
+            if not contains_relevant_keyword(headline):
+                continue
+
+            description = format_description(description_tag.get_text(strip=True))
+            image_url = img_tag['src'] if img_tag else None
+
+            #sentiment, score = analyze_sentiment(headline)
+
+            articles.append({
+                'headline': headline,
+                'link': link,
+                'description': description,
+                'image_url': image_url,
+                'published': publish_date,
+                'sentiment': "Positive"
+                #'score': round(score, 4)
+            })
+
+    return articles, page_links
+
+
+def fetch_news_pages(offsets: List[int]):
+    """Fetch several result pages concurrently and parse them, preserving offset order."""
+    today_str = date.today().strftime("%Y-%m-%d")
+    urls = [NEWS_SEARCH_URL.format(today=today_str, offset=offset) for offset in offsets]
+    responses = upstream_client.get_many_sync(urls, name="news", timeout=NEWS_REQUEST_TIMEOUT)
+
+    pages = []
+    for response in responses:
+        response.raise_for_status()
+        with metrics.span("compute", "parse_news_page"):
+            pages.append(parse_news_page(response.content))
+    return pages
+
+
+@refresher.cached("news", ttl=NEWS_REFRESH_TTL, fallback=[], lazy=True, snapshot_version=1)
+def load_news():
+    """
+    Scrape palm oil headlines from The Edge Malaysia.
+    On refresh only the newest pages are fetched, stopping at the first page that
+    reaches an article already in service.
+    """
+    print("📰 Refreshing palm oil news...")
+    previous = refresher.peek("news", [])
+    previous_links = {article['link'] for article in previous}
+
+    if previous_links:
+        pages = fetch_news_pages(NEWS_PAGE_OFFSETS[:1])
+        if not (pages[0][1] & previous_links):
+            pages += fetch_news_pages(NEWS_PAGE_OFFSETS[1:])
+    else:
+        pages = fetch_news_pages(NEWS_PAGE_OFFSETS)
+
+    fresh = []
+    seen = set(previous_links)
+    for articles, page_links in pages:
+        for article in articles:
+            if article['link'] not in seen:
+                seen.add(article['link'])
+                fresh.append(article)
+        if page_links & previous_links:
+            break
+
+    news = (fresh + previous)[:NEWS_MAX_ARTICLES]
+    print(f"✅ {len(fresh)} new articles, {len(news)} in feed.")
+    return news
+
+
+@router.get("/api/news")
+def get_news():
+    return {"news": load_news()}
@@ -0,0 +1,121 @@
+"""
+Income statement Sankey graphs, precomputed per company and reporting period.
+
+`refresh_sankey()` groups `company_financials_data` by company and period and stores
+each graph in `company_sankey` as one compact orjson document: a node table plus
+parallel source/target/value link arrays indexing into it. Only companies whose
+flows changed since the last refresh (by row count, last date and value total) are
+rebuilt, so the job runs after every report ingestion and on a timer. Routes read
+every period of a company in one lookup and never rebuild the node index.
+
+    cd backend
+    python sankey.py            # rebuild companies whose flows changed
+    python sankey.py --full     # rebuild every company
+"""
+import argparse
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+
+from db import DB_PATH, write_connection
+from migrations import create_tables
+
+FINGERPRINT_SQL = """
+    SELECT company_short_name, COUNT(*), MAX(date), TOTAL(value)
+    FROM company_financials_data
+    WHERE company_short_name IS NOT NULL
+    GROUP BY company_short_name
+"""
+FLOWS_SQL = """
+    SELECT date, source, target, TOTAL(value)
+    FROM company_financials_data
+    WHERE company_short_name = ? AND date IS NOT NULL AND value IS NOT NULL
+    GROUP BY date, source, target
+    ORDER BY date, source, target
+"""
+
+Graph = Dict[str, List[Any]]
+
+
+def build_graph(flows: Sequence[Tuple[str, str, float]]) -> Graph:
+    """(source, target, value) flows -> {"nodes", "source", "target", "value"} arrays."""
+    nodes = sorted({name for source, target, _ in flows for name in (source, target)})
+    index = {name: i for i, name in enumerate(nodes)}
+    return {
+        "nodes": nodes,
+        "source": [index[source] for source, _, _ in flows],
+        "target": [index[target] for _, target, _ in flows],
+        "value": [float(value) for _, _, value in flows],
+    }
+
+
+def to_records(graph: Optional[Graph]) -> Dict[str, list]:
+    """The {"nodes": [{"name"}], "links": [{"source", "target", "value"}]} shape charts take."""
+    if not graph:
+        return {"nodes": [], "links": []}
+    return {
+        "nodes": [{"name": name} for name in graph["nodes"]],
+        "links": [
+            {"source": source, "target": target, "value": value}
+            for source, target, value in zip(graph["source"], graph["target"], graph["value"])
+        ],
+    }
+
+
+def period_graphs(rows: Sequence[Tuple[str, str, str, float]]) -> Dict[str, Graph]:
+    """Date-ordered (date, source, target, value) rows -> {period: graph}."""
+    by_period: Dict[str, List[Tuple[str, str, float]]] = {}
+    for period, source, target, value in rows:
+        by_period.setdefault(str(period), []).append((source, target, value))
+    return {period: build_graph(flows) for period, flows in by_period.items()}
+
+
+def refresh_sankey(path: str = DB_PATH, full: bool = False) -> Dict[str, int]:
+    """Rebuild the graphs of every company whose flows changed. Returns periods written per company."""
+    written: Dict[str, int] = {}
+    with write_connection(path) as conn:
+        create_tables(conn)
+        tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if "company_financials_data" not in tables:
+            return written
+
+        current = {company: f"{count}:{last}:{total!r}"
+                   for company, count, last, total in conn.execute(FINGERPRINT_SQL)}
+        stored = dict(conn.execute("SELECT company_short_name, fingerprint FROM company_sankey_sources"))
+
+        for company in set(stored) - set(current):
+            conn.execute("DELETE FROM company_sankey WHERE company_short_name = ?", (company,))
+            conn.execute("DELETE FROM company_sankey_sources WHERE company_short_name = ?", (company,))
+            written[company] = 0
+
+        for company, fingerprint in current.items():
+            if not full and stored.get(company) == fingerprint:
+                continue
+            graphs = period_graphs(conn.execute(FLOWS_SQL, (company,)).fetchall())
+            conn.execute("DELETE FROM company_sankey WHERE company_short_name = ?", (company,))
+            conn.executemany(
+                "INSERT INTO company_sankey (company_short_name, period, graph) VALUES (?, ?, ?)",
+                [(company, period, orjson.dumps(graph)) for period, graph in graphs.items()],
+            )
+            conn.execute(
+                "INSERT INTO company_sankey_sources (company_short_name, fingerprint) VALUES (?, ?) "
+                "ON CONFLICT (company_short_name) DO UPDATE SET fingerprint = excluded.fingerprint",
+                (company, fingerprint),
+            )
+            written[company] = len(graphs)
+
+    if written:
+        print(f"✅ Sankey graphs refreshed for {len(written)} companies ({sum(written.values())} periods).")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--full", action="store_true", help="rebuild every company")
+    args = parser.parse_args()
+    refresh_sankey(args.db, full=args.full)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Daily (date, category, value) series: weekly/monthly rollups and downsampling.
+
+`refresh_rollups()` keeps the `series_rollups` table in line with the source tables:
+one open/high/low/close/mean row per category and week (starting Monday) or month.
+A source is only rebuilt when its fingerprint (row count, last date, value total)
+changed since the last refresh, so the job is cheap to run after every data load and
+on a timer. `lttb()` downsamples each category to a fixed number of points with
+Largest-Triangle-Three-Buckets, which keeps peaks and troughs that plain striding
+would drop.
+
+    cd backend
+    python series.py            # refresh rollups for sources that changed
+    python series.py --full     # rebuild every source
+"""
+import argparse
+import sqlite3
+from datetime import date
+from typing import Any, Dict, List, Sequence, Tuple
+
+import queries
+from db import DB_PATH, pool, write_connection
+from migrations import create_tables
+
+# Source name -> table of (date, category, value) rows
+SOURCES = {
+    "mpob": "mpob_stats",
+    "commodities": "commodities_data",
+    "freight": "containerized_freight_index",
+}
+RAW_QUERIES = {
+    "mpob": queries.MPOB_STATISTICS,
+    "commodities": queries.RAW_MATERIAL_PRICES,
+    "freight": queries.CONTAINER_FREIGHT_INDEX,
+}
+# Resolution -> SQLite expression for the start date of the period a row falls in
+PERIODS = {
+    "weekly": "date(date, 'weekday 0', '-6 days')",
+    "monthly": "date(date, 'start of month')",
+}
+
+ROLLUP_SQL = """
+    INSERT INTO series_rollups (source, resolution, period, category, open, high, low, close, mean, points)
+    SELECT ?, ?, period, category,
+        MAX(CASE WHEN first_rank = 1 THEN value END),
+        MAX(value),
+        MIN(value),
+        MAX(CASE WHEN last_rank = 1 THEN value END),
+        AVG(value),
+        COUNT(*)
+    FROM (
+        SELECT category, value, {period} AS period,
+            ROW_NUMBER() OVER (PARTITION BY category, {period} ORDER BY date ASC) AS first_rank,
+            ROW_NUMBER() OVER (PARTITION BY category, {period} ORDER BY date DESC) AS last_rank
+        FROM "{table}"
+        WHERE value IS NOT NULL AND date IS NOT NULL
+    )
+    WHERE period IS NOT NULL
+    GROUP BY category, period
+"""
+
+Row = Tuple[Any, ...]
+
+
+def fingerprint(conn: sqlite3.Connection, table: str) -> str:
+    count, last, total = conn.execute(f'SELECT COUNT(*), MAX(date), TOTAL(value) FROM "{table}"').fetchone()
+    return f"{count}:{last}:{total!r}"
+
+
+def refresh_rollups(path: str = DB_PATH, full: bool = False) -> Dict[str, int]:
+    """Rebuild the rollups of every source whose data changed. Returns rows written per source."""
+    written: Dict[str, int] = {}
+    with write_connection(path) as conn:
+        create_tables(conn)
+        tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        stored = dict(conn.execute("SELECT source, fingerprint FROM series_rollup_sources").fetchall())
+
+        for source, table in SOURCES.items():
+            if table not in tables:
+                continue
+            current = fingerprint(conn, table)
+            if not full and stored.get(source) == current:
+                continue
+            conn.execute("DELETE FROM series_rollups WHERE source = ?", (source,))
+            written[source] = 0
+            for resolution, period in PERIODS.items():
+                cur = conn.execute(ROLLUP_SQL.format(period=period, table=table), (source, resolution))
+                written[source] += cur.rowcount
+            conn.execute(
+                "INSERT INTO series_rollup_sources (source, fingerprint) VALUES (?, ?) "
+                "ON CONFLICT (source) DO UPDATE SET fingerprint = excluded.fingerprint",
+                (source, current),
+            )
+
+    if written:
+        print("✅ Series rollups refreshed: " + ", ".join(f"{s} ({n} rows)" for s, n in written.items()))
+    return written
+
+
+def read_series(source: str, since: str, resolution: str = "raw") -> Tuple[List[str], List[Row]]:
+    """(columns, rows) for a source from `since` on; rollups add open/high/low and point counts."""
+    if resolution == "raw":
+        query, params = RAW_QUERIES[source], (since,)
+    else:
+        query, params = queries.SERIES_ROLLUP, (source, resolution, since)
+    with pool.connection() as conn:
+        cur = conn.execute(query, params)
+        return [d[0] for d in cur.description], cur.fetchall()
+
+
+def _ordinal(day: Any) -> int:
+    return date.fromisoformat(str(day)[:10]).toordinal()
+
+
+def lttb(points: Sequence[Tuple[float, float]], threshold: int) -> List[int]:
+    """Indices of the `threshold` points Largest-Triangle-Three-Buckets keeps, in order."""
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    kept = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        stop = int((i + 1) * bucket_size) + 1
+
+        # Average of the next bucket is the third corner of the triangle
+        next_start, next_stop = stop, min(int((i + 2) * bucket_size) + 1, n)
+        span = points[next_start:next_stop] or points[-1:]
+        avg_x = sum(p[0] for p in span) / len(span)
+        avg_y = sum(p[1] for p in span) / len(span)
+
+        ax, ay = points[a]
+        best, best_area = start, -1.0
+        for j in range(start, stop):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        a = best
+    kept.append(n - 1)
+    return kept
+
+
+def downsample(rows: Sequence[Row], max_points: int) -> List[Row]:
+    """
+    Keep at most `max_points` rows per category of (date, category, value, ...) rows,
+    chosen by LTTB on the value. Rows without a value are dropped from downsampled
+    categories; the output stays in date order.
+    """
+    by_category: Dict[Any, List[Row]] = {}
+    for row in rows:
+        by_category.setdefault(row[1], []).append(row)
+
+    kept: List[Row] = []
+    for category_rows in by_category.values():
+        if len(category_rows) <= max_points:
+            kept += category_rows
+            continue
+        valued = [row for row in category_rows if row[2] is not None]
+        points = [(_ordinal(row[0]), float(row[2])) for row in valued]
+        kept += [valued[i] for i in lttb(points, max_points)]
+    kept.sort(key=lambda row: str(row[0]))
+    return kept
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--full", action="store_true", help="rebuild every source")
+    args = parser.parse_args()
+    refresh_rollups(args.db, full=args.full)
+
+
+if __name__ == "__main__":
+    main()
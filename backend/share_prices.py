@@ -0,0 +1,177 @@
+"""
+Local daily share-price history in the `share_prices` table.
+
+`sync_share_prices()` looks up every stock code in company_master_table, works out
+which dates each one is missing, and downloads only those ranges from Yahoo Finance,
+batching tickers that share a start date into one request. The latest stored bar is
+always re-fetched so an intraday close gets replaced by the final one. The share price
+routes read from the table, so any window is served without an upstream call.
+pandas and yfinance are only imported by the sync and live-download paths.
+
+The table lives in its own file (SHARE_PRICE_DB_PATH) rather than the main database:
+during trading hours every sync rewrites the intraday bar, and in the main file that
+would bump `data_version()` and invalidate every cache keyed on it. The share price
+routes are versioned on `data_version(SHARE_PRICE_DB_PATH)` instead.
+
+    cd backend
+    python share_prices.py                 # incremental sync
+    python share_prices.py --years 10      # backfill further for new stock codes
+"""
+import argparse
+import os
+import sqlite3
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+import metrics
+import queries
+from db import BASE_DIR, DB_PATH, ConnectionPool, write_connection
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SHARE_PRICE_DB_PATH = os.getenv(
+    "SHARE_PRICE_DB_PATH", os.path.join(BASE_DIR, "..", "src", "data", "share_prices.db")
+)
+TICKER_SUFFIX = ".KL"  # Bursa Malaysia listings on Yahoo Finance
+SHARE_PRICE_HISTORY_YEARS = 5
+SHARE_PRICE_BATCH_SIZE = 20
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS share_prices (
+        stock_code TEXT NOT NULL,
+        date TEXT NOT NULL,
+        close REAL NOT NULL,
+        PRIMARY KEY (stock_code, date)
+    ) WITHOUT ROWID
+"""
+price_pool = ConnectionPool(SHARE_PRICE_DB_PATH)
+
+
+def ticker_for(stock_code: str) -> str:
+    return f"{stock_code}{TICKER_SUFFIX}"
+
+
+def close_prices(data: Optional["pd.DataFrame"], tickers: List[str]) -> "pd.DataFrame":
+    """Close column per ticker from a yf.download frame, whatever its column layout."""
+    import pandas as pd
+
+    if data is None or data.empty:
+        return pd.DataFrame()
+    if isinstance(data.columns, pd.MultiIndex):
+        return data["Close"]
+    return data[["Close"]].rename(columns={"Close": tickers[0]})
+
+
+def missing_ranges(conn: sqlite3.Connection, stock_codes: Iterable[str], today: date,
+                   history_years: int = SHARE_PRICE_HISTORY_YEARS) -> Dict[date, List[str]]:
+    """Group stock codes by the first date they need: {start date: [stock codes]}."""
+    last_dates = dict(conn.execute(queries.SHARE_PRICE_LAST_DATES).fetchall())
+    backfill_start = today - timedelta(days=365 * history_years)
+    groups: Dict[date, List[str]] = defaultdict(list)
+    for code in stock_codes:
+        last = last_dates.get(code)
+        groups[date.fromisoformat(last) if last else backfill_start].append(code)
+    return dict(groups)
+
+
+def download_rows(stock_codes: List[str], start: date, end: date) -> List[tuple]:
+    """(stock_code, date, close) rows for `stock_codes` in [start, end)."""
+    import yfinance as yf
+
+    tickers = [ticker_for(code) for code in stock_codes]
+    with metrics.upstream("yahoo_finance", tickers=len(tickers)):
+        data = yf.download(tickers, start=start, end=end, progress=False)
+    close = close_prices(data, tickers)
+
+    rows = []
+    for code, ticker in zip(stock_codes, tickers):
+        if ticker not in close.columns:
+            continue
+        series = close[ticker].dropna()
+        rows.extend(
+            (code, day.strftime("%Y-%m-%d"), round(float(price), 4))
+            for day, price in series.items()
+        )
+    return rows
+
+
+def sync_share_prices(path: str = DB_PATH, prices_path: str = SHARE_PRICE_DB_PATH,
+                      history_years: int = SHARE_PRICE_HISTORY_YEARS,
+                      batch_size: int = SHARE_PRICE_BATCH_SIZE) -> Dict[str, int]:
+    """Fetch and upsert every missing daily close. Returns counts for logging."""
+    today = date.today()
+    with write_connection(path) as conn:
+        stock_codes = [str(code) for _, code in conn.execute(queries.COMPANY_STOCK_CODES_ALL) if code]
+    with write_connection(prices_path) as conn:
+        conn.execute(SCHEMA)
+        groups = missing_ranges(conn, stock_codes, today, history_years)
+
+    # Download outside the write connection so readers aren't held up by Yahoo
+    rows: List[tuple] = []
+    downloads = failed = 0
+    for start, codes in sorted(groups.items()):
+        for i in range(0, len(codes), batch_size):
+            batch = codes[i:i + batch_size]
+            downloads += 1
+            try:
+                rows += download_rows(batch, start, today + timedelta(days=1))
+            except Exception as e:
+                failed += 1
+                print(f"⚠️ Share price download failed for {', '.join(batch)}:", e)
+
+    if rows:
+        with write_connection(prices_path) as conn:
+            conn.executemany(
+                """
+                INSERT INTO share_prices (stock_code, date, close) VALUES (?, ?, ?)
+                ON CONFLICT (stock_code, date) DO UPDATE SET close = excluded.close
+                """,
+                rows,
+            )
+    if downloads and failed == downloads:
+        raise RuntimeError("every share price download failed")
+
+    print(f"✅ Share prices synced: {len(rows)} bars for {len(stock_codes)} stock codes "
+          f"in {downloads} downloads.")
+    return {"stock_codes": len(stock_codes), "rows": len(rows), "downloads": downloads, "failed": failed}
+
+
+def read_share_prices(stock_codes: List[str], days: int) -> Dict[str, Dict[str, list]]:
+    """{stock_code: {"dates": [...], "prices": [...]}} for the trailing `days` window."""
+    if not stock_codes:
+        return {}
+    since = (date.today() - timedelta(days=days)).isoformat()
+    query = queries.expand(queries.SHARE_PRICE_HISTORY, len(stock_codes))
+    try:
+        with price_pool.connection() as conn:
+            rows = conn.execute(query, [*stock_codes, since]).fetchall()
+    except sqlite3.OperationalError as e:
+        # File or table not created yet (no sync has run)
+        print("⚠️ Local share prices unavailable:", e)
+        return {}
+
+    results: Dict[str, Dict[str, list]] = {}
+    for code, day, price in rows:
+        quote = results.get(code)
+        if quote is None:
+            quote = results[code] = {"dates": [], "prices": []}
+        quote["dates"].append(day)
+        quote["prices"].append(round(price, 2))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH, help="database holding company_master_table")
+    parser.add_argument("--prices-db", default=SHARE_PRICE_DB_PATH, help="database the prices are stored in")
+    parser.add_argument("--years", type=int, default=SHARE_PRICE_HISTORY_YEARS,
+                        help="history to backfill for stock codes with no stored prices")
+    parser.add_argument("--batch-size", type=int, default=SHARE_PRICE_BATCH_SIZE)
+    args = parser.parse_args()
+    sync_share_prices(args.db, args.prices_db, args.years, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
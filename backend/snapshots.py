@@ -0,0 +1,145 @@
+"""
+Disk-backed snapshots of upstream feeds, shared by every worker on the host.
+
+The refresh scheduler writes the last good value of each snapshot-enabled loader to
+`upstream_snapshots` in a small SQLite file of its own (kept apart from the main
+database so a refresh doesn't bump its data version). A starting worker restores
+those values in milliseconds and serves them straight away while fresher data is
+fetched behind the scenes. Before fetching, a worker adopts a snapshot another
+worker wrote within the TTL, and fetches only while holding a short lease, so
+several uvicorn workers share one upstream call per refresh.
+
+Values are pickled; the file is written and read only by this app. Bump a loader's
+`snapshot_version` when the shape of its value changes so old snapshots are ignored.
+"""
+import os
+import pickle
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, NamedTuple, Optional
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Empty disables snapshots
+SNAPSHOT_DB_PATH = os.getenv(
+    "SNAPSHOT_DB_PATH", os.path.join(BASE_DIR, "..", "src", "data", "upstream_snapshots.db")
+)
+SNAPSHOT_LEASE_SECONDS = 120.0
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS upstream_snapshots (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL,
+        generation INTEGER NOT NULL,
+        fetched_at REAL NOT NULL,
+        payload BLOB NOT NULL,
+        lease_owner TEXT,
+        lease_until REAL
+    )
+"""
+
+
+class Snapshot(NamedTuple):
+    value: Any
+    generation: int
+    fetched_at: float  # Unix time
+
+
+class SnapshotStore:
+    def __init__(self, path: str = SNAPSHOT_DB_PATH, lease_seconds: float = SNAPSHOT_LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._ready = False
+
+    @property
+    def owner(self) -> str:
+        # Per process, so forked workers don't share a lease
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        try:
+            if not self._ready:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(SCHEMA)
+                self._ready = True
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def fetched_at(self, name: str, version: int) -> Optional[float]:
+        """When the stored snapshot was fetched, without unpickling it."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT fetched_at FROM upstream_snapshots WHERE name = ? AND version = ?",
+                               (name, version)).fetchone()
+        return row[0] if row else None
+
+    def load(self, name: str, version: int) -> Optional[Snapshot]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload, generation, fetched_at FROM upstream_snapshots WHERE name = ? AND version = ?",
+                (name, version),
+            ).fetchone()
+        if row is None:
+            return None
+        payload, generation, fetched_at = row
+        return Snapshot(pickle.loads(payload), generation, fetched_at)
+
+    def save(self, name: str, version: int, value: Any, fetched_at: float) -> int:
+        """Store a new value and return its generation, which counts up across workers."""
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                INSERT INTO upstream_snapshots (name, version, generation, fetched_at, payload)
+                VALUES (?, ?, 1, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET
+                    version = excluded.version,
+                    generation = upstream_snapshots.generation + 1,
+                    fetched_at = excluded.fetched_at,
+                    payload = excluded.payload
+                """,
+                (name, version, fetched_at, payload),
+            )
+            (generation,) = conn.execute("SELECT generation FROM upstream_snapshots WHERE name = ?",
+                                         (name,)).fetchone()
+        return generation
+
+    def acquire(self, name: str) -> bool:
+        """Take the fetch lease for `name`; False while another worker holds it."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO upstream_snapshots (name, version, generation, fetched_at, payload) "
+                "VALUES (?, 0, 0, 0, x'')",
+                (name,),
+            )
+            return conn.execute(
+                "UPDATE upstream_snapshots SET lease_owner = ?, lease_until = ? "
+                "WHERE name = ? AND (lease_until IS NULL OR lease_until < ? OR lease_owner = ?)",
+                (self.owner, now + self.lease_seconds, name, now, self.owner),
+            ).rowcount == 1
+
+    def release(self, name: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE upstream_snapshots SET lease_owner = NULL, lease_until = NULL "
+                "WHERE name = ? AND lease_owner = ?",
+                (name, self.owner),
+            )
+
+
+snapshot_store = SnapshotStore() if SNAPSHOT_DB_PATH else None
@@ -0,0 +1,84 @@
+import numpy as np
+from pyproj import Geod
+
+WGS84 = Geod(ellps="WGS84")
+
+
+def unit_vectors(latitudes, longitudes) -> np.ndarray:
+    """Convert lat/lon in degrees to (n, 3) unit vectors on the sphere."""
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lon = np.radians(np.asarray(longitudes, dtype=float))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+class NearestLocator:
+    """
+    Nearest-point index over a fixed set of locations (e.g. weather stations).
+
+    Candidates are shortlisted for every query point at once with a dot-product
+    (haversine) matrix on the unit sphere, then the shortlist is re-ranked with exact
+    WGS84 geodesic distances - the same distances geopy's `geodesic()` returns.
+    Locations with missing coordinates are ignored, as `idxmin` ignores NaN distances.
+    """
+
+    def __init__(self, latitudes, longitudes, candidates: int = 8, chunk_size: int = 4096):
+        lat = np.asarray(latitudes, dtype=float)
+        lon = np.asarray(longitudes, dtype=float)
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+
+        # Positions refer back to the caller's original row order
+        self.positions = np.flatnonzero(valid)
+        self.latitudes = lat[valid]
+        self.longitudes = lon[valid]
+        self.candidates = candidates
+        self.chunk_size = chunk_size
+        self._xyz = unit_vectors(self.latitudes, self.longitudes)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def query(self, latitudes, longitudes):
+        """
+        Return (positions, distances_km) of the nearest location for every query point.
+        Positions index the arrays the locator was built from; -1 / NaN when there is
+        no valid location to compare against.
+        """
+        q_lat = np.asarray(latitudes, dtype=float)
+        q_lon = np.asarray(longitudes, dtype=float)
+        n_queries = len(q_lat)
+
+        nearest = np.full(n_queries, -1, dtype=np.int64)
+        distances = np.full(n_queries, np.nan)
+        if n_queries == 0 or len(self) == 0:
+            return nearest, distances
+
+        k = min(self.candidates, len(self))
+        for start in range(0, n_queries, self.chunk_size):
+            stop = min(start + self.chunk_size, n_queries)
+            lat_c, lon_c = q_lat[start:stop], q_lon[start:stop]
+
+            # Larger dot product = smaller central angle
+            dots = unit_vectors(lat_c, lon_c) @ self._xyz.T
+            if k < len(self):
+                shortlist = np.argpartition(-dots, k - 1, axis=1)[:, :k]
+            else:
+                shortlist = np.broadcast_to(np.arange(len(self)), dots.shape)
+            # Keep candidates in source order so ties resolve to the first row, like idxmin
+            shortlist = np.sort(shortlist, axis=1)
+
+            _, _, metres = WGS84.inv(
+                np.repeat(lon_c, k), np.repeat(lat_c, k),
+                self.longitudes[shortlist].ravel(), self.latitudes[shortlist].ravel()
+            )
+            km = np.asarray(metres).reshape(-1, k) / 1000.0
+
+            best = np.argmin(km, axis=1)
+            rows = np.arange(len(best))
+            chosen = shortlist[rows, best]
+            found = ~np.isnan(lat_c) & ~np.isnan(lon_c)
+
+            nearest[start:stop] = np.where(found, self.positions[chosen], -1)
+            distances[start:stop] = np.where(found, km[rows, best], np.nan)
+
+        return nearest, distances
@@ -0,0 +1,94 @@
+"""
+Trade network data: filtered raw rows, NDJSON export and pre-aggregated node/edge
+graphs. Aggregates are built in SQL once per data version and filter set.
+"""
+from typing import Any, Dict, Iterator, Optional
+
+import orjson
+
+import queries
+from cache import TTLCache
+from db import data_version, pool
+
+TRADE_NETWORK_TTL = 60 * 60
+NDJSON_BATCH_SIZE = 1000
+
+network_cache = TTLCache(ttl=TRADE_NETWORK_TTL, maxsize=128, name="trade_network")
+
+
+def trade_params(year: str, min_value: float, cmd_code: Optional[str] = None,
+                 reporter: Optional[str] = None, partner: Optional[str] = None):
+    """Positional parameters for queries.TRADE_FILTERS."""
+    reporter = reporter.upper() if reporter else None
+    partner = partner.upper() if partner else None
+    return (year, min_value, cmd_code, cmd_code, reporter, reporter, partner, partner)
+
+
+def fetch_trade_rows(params) -> list:
+    with pool.connection() as conn:
+        cur = conn.execute(queries.TRADE_DATA, params)
+        columns = [d[0] for d in cur.description]
+        return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+
+def iter_trade_ndjson(params) -> Iterator[bytes]:
+    """
+    Yield matching rows as newline-delimited JSON in batches. The stream lasts as long
+    as the client keeps reading, so it reads on a dedicated connection, not a pooled one.
+    """
+    with pool.dedicated() as conn:
+        cur = conn.execute(queries.TRADE_DATA, params)
+        columns = [d[0] for d in cur.description]
+        while True:
+            rows = cur.fetchmany(NDJSON_BATCH_SIZE)
+            if not rows:
+                break
+            yield b"".join(orjson.dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+
+def build_network(flows) -> Dict[str, Any]:
+    """
+    Nodes carry total, export and import value plus degree; links are directed
+    exporter -> importer with summed value. Roles follow the frontend legend.
+    """
+    nodes: Dict[str, Dict[str, Any]] = {}
+
+    def node(iso: str) -> Dict[str, Any]:
+        entry = nodes.get(iso)
+        if entry is None:
+            entry = nodes[iso] = {
+                "id": iso, "value": 0.0, "export_value": 0.0, "import_value": 0.0, "degree": 0
+            }
+        return entry
+
+    links = []
+    for source, target, value, records in flows:
+        value = float(value or 0)
+        exporter, importer = node(source), node(target)
+        exporter["value"] += value
+        exporter["export_value"] += value
+        exporter["degree"] += 1
+        importer["value"] += value
+        importer["import_value"] += value
+        importer["degree"] += 1
+        links.append({"source": source, "target": target, "value": value, "records": records})
+
+    for entry in nodes.values():
+        exports, imports = entry["export_value"] > 0, entry["import_value"] > 0
+        entry["role"] = "both" if exports and imports else ("export" if exports else "import")
+
+    return {
+        "nodes": sorted(nodes.values(), key=lambda n: n["value"], reverse=True),
+        "links": links,
+    }
+
+
+def get_trade_network(params) -> Dict[str, Any]:
+    key = (data_version(), params)
+    network = network_cache.get(key)
+    if network is None:
+        with pool.connection() as conn:
+            flows = conn.execute(queries.TRADE_FLOWS, params).fetchall()
+        network = build_network(flows)
+        network_cache.set(key, network)
+    return network
@@ -14,13 +14,17 @@ import { useTheme } from "next-themes";
 /* ------------------------------------------------------------------ */
 /*  Data types                                                        */
 /* ------------------------------------------------------------------ */
-interface TradeData {
-  reporterISO: string;
-  partnerISO: string;
-  reporterDesc: "M" | "X"; // M = import, X = export
-  refMonth: number;
-  cmdCode: string;
-  fobvalue: number;
+/* Pre-aggregated by /api/trade-data/network */
+interface TradeNetwork {
+  nodes: {
+    id: string;
+    value: number;
+    export_value: number;
+    import_value: number;
+    degree: number;
+    role: "import" | "export" | "both";
+  }[];
+  links: { source: string; target: string; value: number }[];
 }
 
 /* Node – extends D3 simulation node (x/y/fx/fy are required) */
@@ -42,20 +46,17 @@ interface Link extends d3.SimulationLinkDatum<Node> {
 
 /* ------------------------------------------------------------------ */
 export function GlobalTradeNetwork() {
-  const [data, setData] = React.useState<TradeData[]>([]);
+  const [data, setData] = React.useState<TradeNetwork>({ nodes: [], links: [] });
   const [loading, setLoading] = React.useState(true);
   const svgRef = React.useRef<SVGSVGElement>(null);
   const { resolvedTheme } = useTheme(); // light / dark
 
   /* --------------------- FETCH --------------------- */
   React.useEffect(() => {
-    fetch("http://127.0.0.1:8000/api/trade-data")
+    fetch("http://127.0.0.1:8000/api/trade-data/network?cmd_code=palm%20oil")
       .then((r) => r.json())
-      .then((raw: TradeData[]) => {
-        const palm = raw.filter((d) =>
-          d.cmdCode.toLowerCase().includes("palm oil")
-        );
-        setData(palm);
+      .then((network: TradeNetwork) => {
+        setData(network);
         setLoading(false);
       })
       .catch((e) => {
@@ -66,7 +67,7 @@ export function GlobalTradeNetwork() {
 
   /* --------------------- D3 RENDER --------------------- */
   React.useEffect(() => {
-    if (loading || data.length === 0 || !svgRef.current) return;
+    if (loading || data.nodes.length === 0 || !svgRef.current) return;
 
     const width = 900;
     const height = 600;
@@ -83,57 +84,20 @@ export function GlobalTradeNetwork() {
 
     svg.selectAll("*").remove();
 
-    /* ---------- BUILD NODES & DETERMINE ROLE ---------- */
-    const importSet = new Set<string>();
-    const exportSet = new Set<string>();
-
-    data.forEach((d) => {
-      if (d.reporterDesc === "M") {
-        importSet.add(d.reporterISO);
-        exportSet.add(d.partnerISO);
-      } else {
-        exportSet.add(d.reporterISO);
-        importSet.add(d.partnerISO);
-      }
-    });
-
-    const nodesMap = new Map<string, Node>();
-    data.forEach((d) => {
-      [d.reporterISO, d.partnerISO].forEach((iso) => {
-        if (!nodesMap.has(iso)) {
-          const role: "import" | "export" | "both" =
-            importSet.has(iso) && exportSet.has(iso)
-              ? "both"
-              : importSet.has(iso)
-              ? "import"
-              : "export";
-
-          nodesMap.set(iso, {
-            id: iso,
-            country: iso,
-            value: 0,
-            role,
-            x: 0,
-            y: 0,
-          });
-        }
-        nodesMap.get(iso)!.value += d.fobvalue;
-      });
-    });
-    const nodes: Node[] = Array.from(nodesMap.values());
-
-    /* ---------- LINKS (directed) ---------- */
-    const linkMap = new Map<string, number>();
-    data.forEach((d) => {
-      const source = d.reporterDesc === "M" ? d.partnerISO : d.reporterISO;
-      const target = d.reporterDesc === "M" ? d.reporterISO : d.partnerISO;
-      const key = `${source}→${target}`;
-      linkMap.set(key, (linkMap.get(key) || 0) + d.fobvalue);
-    });
-    const links: Link[] = Array.from(linkMap.entries()).map(([k, v]) => {
-      const [source, target] = k.split("→");
-      return { source, target, value: v };
-    });
+    /* ---------- NODES & LINKS (aggregated server-side) ---------- */
+    const nodes: Node[] = data.nodes.map((n) => ({
+      id: n.id,
+      country: n.id,
+      value: n.value,
+      role: n.role,
+      x: 0,
+      y: 0,
+    }));
+    const links: Link[] = data.links.map((l) => ({
+      source: l.source,
+      target: l.target,
+      value: l.value,
+    }));
 
     /* ---------- SCALES ---------- */
     const nodeRadius = d3
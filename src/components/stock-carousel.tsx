@@ -37,16 +37,18 @@ export function StockCarousel() {
   React.useEffect(() => {
     async function loadStocks() {
       const results: StockItem[] = [];
+      const codes = companies.map((c) => c.short).join(",");
 
-      for (const c of companies) {
-        try {
-          const res = await fetch(`http://127.0.0.1:8000/api/shareprice/${c.short}`);
-          const json = await res.json();
+      try {
+        const res = await fetch(`http://127.0.0.1:8000/api/shareprices?codes=${codes}`);
+        const json = await res.json();
 
-          if (!json.prices || json.prices.length === 0) continue;
+        for (const c of companies) {
+          const quote = json.data?.[c.short];
+          if (!quote?.prices || quote.prices.length === 0) continue;
 
-          const latest = json.prices[json.prices.length - 1];
-          const prev = json.prices[json.prices.length - 2] ?? latest;
+          const latest = quote.prices[quote.prices.length - 1];
+          const prev = quote.prices[quote.prices.length - 2] ?? latest;
 
           const change = (((latest - prev) / prev) * 100).toFixed(2);
 
@@ -57,9 +59,9 @@ export function StockCarousel() {
             change: `${change}%`,
             up: Number(change) >= 0,
           });
-        } catch (err) {
-          console.error("Error fetching stock:", c.short, err);
         }
+      } catch (err) {
+        console.error("Error fetching stock prices:", err);
       }
 
       setStockData(results);